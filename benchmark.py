@@ -0,0 +1,398 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Optional, TextIO
+from class_book import Book
+from class_library import Library
+
+# Building blocks of the synthetic catalogue, roughly two thirds of it Russian and one third English
+RUSSIAN_TITLE_WORDS = [
+    "война", "мир", "преступление", "наказание", "мастер", "маргарита", "отцы", "дети", "тихий", "дон",
+    "мёртвые", "души", "герой", "нашего", "времени", "белая", "гвардия", "собачье", "сердце", "идиот",
+    "братья", "карамазовы", "вишнёвый", "сад", "капитанская", "дочка", "тёмные", "аллеи", "жизнь", "судьба",
+    "доктор", "живаго", "обломов", "горе", "от", "ума", "старик", "море", "остров", "сокровищ", "история",
+    "город", "ночь", "дорога", "зимний", "вечер", "летние", "сны", "последний", "рассвет", "северный",
+]
+ENGLISH_TITLE_WORDS = [
+    "war", "peace", "the", "old", "man", "and", "sea", "great", "expectations", "pride", "prejudice",
+    "brave", "new", "world", "catcher", "in", "rye", "lord", "of", "rings", "silent", "spring", "night",
+    "garden", "river", "city", "stars", "winter", "summer", "last", "first", "journey", "house", "light",
+]
+RUSSIAN_FIRST_NAMES = ["Лев", "Фёдор", "Антон", "Михаил", "Иван", "Александр", "Николай", "Анна", "Марина",
+                       "Борис", "Сергей", "Владимир", "Ольга", "Татьяна", "Евгений", "Максим"]
+RUSSIAN_LAST_NAMES = ["Толстой", "Достоевский", "Чехов", "Булгаков", "Тургенев", "Пушкин", "Гоголь",
+                      "Ахматова", "Цветаева", "Пастернак", "Бунин", "Шолохов", "Лермонтов", "Гончаров"]
+ENGLISH_FIRST_NAMES = ["John", "Jane", "George", "Mary", "Ernest", "Virginia", "Charles", "Emily",
+                       "William", "Agatha", "Mark", "Harper"]
+ENGLISH_LAST_NAMES = ["Austen", "Orwell", "Dickens", "Hemingway", "Woolf", "Bronte", "Christie",
+                      "Twain", "Lee", "Salinger", "Tolkien", "Steinbeck"]
+
+# Latency percentiles reported for every operation
+PERCENTILES = (50, 90, 99)
+
+
+def generate_catalogue(count: int, seed: int = 0) -> Iterator[Book]:
+    """
+    Generates a reproducible synthetic catalogue: titles of two to five words, authors drawn from
+    a pool of about one author per 20 books with a few prolific ones, and years skewed to recent decades.
+
+    Args:
+        count (int): The number of books to generate.
+        seed (int, optional): The seed of the generator, the same seed gives the same catalogue.
+
+    Yields:
+        Book: The generated books, with IDs generated from the seed as well.
+    """
+    rng = random.Random(seed)
+    authors = []
+    for _ in range(max(1, count // 20)):
+        if rng.random() < 2 / 3:
+            authors.append(f"{rng.choice(RUSSIAN_FIRST_NAMES)} {rng.choice(RUSSIAN_LAST_NAMES)}")
+        else:
+            authors.append(f"{rng.choice(ENGLISH_FIRST_NAMES)} {rng.choice(ENGLISH_LAST_NAMES)}")
+    for _ in range(count):
+        words = RUSSIAN_TITLE_WORDS if rng.random() < 2 / 3 else ENGLISH_TITLE_WORDS
+        title = ' '.join(rng.choices(words, k=rng.randint(2, 5))).capitalize()
+        # Squaring the uniform value makes the first authors of the pool the most prolific
+        author = authors[int(rng.random() ** 2 * len(authors))]
+        year = 2024 - int(rng.expovariate(1 / 40)) % 300
+        book_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        yield Book(title, author, year, rng.random() < 0.8, book_id)
+
+
+def generate_queries(books: list[Book], count: int, seed: int = 0) -> list[str]:
+    """
+    Generates search queries: title words, author names, years and fragments of words,
+    plus a few queries that match nothing.
+
+    Args:
+        books (list[Book]): The catalogue the queries are run against.
+        count (int): The number of queries.
+        seed (int, optional): The seed of the generator.
+
+    Returns:
+        list[str]: The queries.
+    """
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(count):
+        book = rng.choice(books)
+        kind = rng.random()
+        if kind < 0.35:
+            queries.append(rng.choice(book.title.split()))
+        elif kind < 0.6:
+            queries.append(book.author.split()[-1])
+        elif kind < 0.75:
+            queries.append(book.year)
+        elif kind < 0.95:
+            word = rng.choice(book.title.split())
+            queries.append(word[:max(3, len(word) // 2)])
+        else:
+            queries.append(f"нет такой книги {rng.randint(0, 10 ** 6)}")
+    return queries
+
+
+def summarize(operation: str, size: int, latencies: list[float], items: int,
+              peak_memory: Optional[int]) -> dict:
+    """
+    Summarizes the timings of an operation.
+
+    Args:
+        operation (str): The name of the operation.
+        size (int): The number of books in the catalogue.
+        latencies (list[float]): The duration of every call in seconds.
+        items (int): The number of books or queries processed by all calls, for the throughput.
+        peak_memory (Optional[int]): The peak of the memory allocated by a call in bytes, if measured.
+
+    Returns:
+        dict: The result of the operation.
+    """
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    latency = {'min': ordered[0], 'mean': total / len(ordered), 'max': ordered[-1]}
+    for percentile in PERCENTILES:
+        latency[f'p{percentile}'] = ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)]
+    return {
+        'operation': operation,
+        'size': size,
+        'calls': len(ordered),
+        'total_s': total,
+        'throughput_per_s': items / total if total else None,
+        'latency_ms': {name: value * 1000 for name, value in latency.items()},
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def peak_memory_of(call: Callable[[], object]) -> int:
+    """
+    Runs a call under tracemalloc and returns the peak of the memory it allocated.
+    The call is not timed, tracing slows Python code down several times.
+    """
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def time_calls(call: Callable[[], object], repeat: int) -> list[float]:
+    """
+    Times every one of several calls of a function.
+
+    Returns:
+        list[float]: The duration of every call in seconds.
+    """
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def benchmark_size(size: int, repeat: int, query_count: int, seed: int, memory: bool,
+                   directory: str) -> list[dict]:
+    """
+    Benchmarks every operation on a synthetic catalogue of the given size.
+
+    Args:
+        size (int): The number of books in the catalogue.
+        repeat (int): The number of calls of the whole-library operations (bulk add and remove, dump, load, __str__).
+        query_count (int): The number of search queries.
+        seed (int): The seed of the catalogue and of the queries.
+        memory (bool): Whether to measure the peak memory of every operation.
+        directory (str): A directory for the JSON files written by the benchmark.
+
+    Returns:
+        list[dict]: The results of the operations, see summarize.
+    """
+    results = []
+    books = list(generate_catalogue(size, seed))
+
+    # Every book is timed on its own, the latencies show the cost of growing the dict and the indexes
+    library = Library()
+    latencies = []
+    for book in books:
+        start = time.perf_counter()
+        library.add_book(book)
+        latencies.append(time.perf_counter() - start)
+    peak = peak_memory_of(lambda: Library().add_books(generate_catalogue(size, seed))) if memory else None
+    results.append(summarize("add_book", size, latencies, size, peak))
+    # The whole catalogue in one call, to compare with adding the books one at a time
+    latencies = time_calls(lambda: Library().add_books(books), repeat)
+    results.append(summarize("add_books", size, latencies, size * repeat, peak))
+    del latencies
+
+    queries = generate_queries(books, query_count, seed)
+    del books
+    # The first search builds the trigram index, it is reported as a call of its own
+    first_search = time_calls(lambda: library.search_book(queries[0]), 1)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        library.search_book(query)
+        latencies.append(time.perf_counter() - start)
+    peak = peak_memory_of(lambda: [library.search_book(query) for query in queries[:10]]) if memory else None
+    results.append(summarize("search_book", size, latencies, len(queries), peak))
+    results.append(summarize("search_book_first", size, first_search, 1, None))
+
+    path = os.path.join(directory, f"benchmark-{size}.json")
+    # Every dump writes a new file, an unchanged library is not written again to the same one
+    paths = iter(f"{path}.{attempt}" for attempt in range(repeat + 1))
+    latencies = time_calls(lambda: library.dump_to_json(next(paths)), repeat)
+    peak = peak_memory_of(lambda: library.dump_to_json(next(paths))) if memory else None
+    results.append(summarize("dump_to_json", size, latencies, size * repeat, peak))
+    results[-1]['file_bytes'] = os.path.getsize(f"{path}.0")
+
+    latencies = time_calls(lambda: Library.load_from_json(f"{path}.0"), repeat)
+    peak = peak_memory_of(lambda: Library.load_from_json(f"{path}.0")) if memory else None
+    results.append(summarize("load_from_json", size, latencies, size * repeat, peak))
+    for attempt in range(repeat + 1):
+        if os.path.exists(f"{path}.{attempt}"):
+            os.remove(f"{path}.{attempt}")
+
+    latencies = time_calls(lambda: str(library), repeat)
+    peak = peak_memory_of(lambda: str(library)) if memory else None
+    results.append(summarize("__str__", size, latencies, size * repeat, peak))
+
+    # Removing every book one at a time and in one call, from a copy of the library
+    book_ids = list(library.books)
+    emptied = Library()
+    emptied.add_books(library.books.values())
+    latencies = []
+    for book_id in book_ids:
+        start = time.perf_counter()
+        emptied.remove_book(book_id)
+        latencies.append(time.perf_counter() - start)
+    results.append(summarize("remove_book", size, latencies, size, None))
+    latencies = []
+    for _ in range(repeat):
+        emptied.add_books(library.books.values())
+        latencies.extend(time_calls(lambda: emptied.remove_books(book_ids), 1))
+    results.append(summarize("remove_books", size, latencies, size * repeat, None))
+    return results
+
+
+def run(sizes: list[int], repeat: int = 3, query_count: int = 200, seed: int = 0, memory: bool = True,
+        log: Optional[TextIO] = None) -> dict:
+    """
+    Runs the benchmark at every catalogue size.
+
+    Args:
+        sizes (list[int]): The catalogue sizes.
+        repeat (int, optional): The number of calls of the whole-library operations.
+        query_count (int, optional): The number of search queries.
+        seed (int, optional): The seed of the catalogue and of the queries.
+        memory (bool, optional): Whether to measure the peak memory of every operation.
+        log (Optional[TextIO], optional): Where progress is reported. Defaults to nowhere.
+
+    Returns:
+        dict: The description of the run ("meta") and the results of every operation at every size ("results").
+    """
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sizes': sizes,
+            'repeat': repeat,
+            'queries': query_count,
+            'seed': seed,
+        },
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            if log is not None:
+                print(f"Benchmarking {size} books...", file=log, flush=True)
+            report['results'].extend(benchmark_size(size, repeat, query_count, seed, memory, directory))
+    return report
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2, metric: str = "p50") -> list[dict]:
+    """
+    Compares the results of two runs, operation by operation and size by size.
+    An operation regressed if its latency or its peak memory grew by more than the threshold.
+
+    Args:
+        baseline (dict): The report of the earlier run.
+        current (dict): The report of the later run.
+        threshold (float, optional): The tolerated relative growth, 0.2 is 20%.
+        metric (str, optional): The latency compared: "min", "mean", "p50", "p90", "p99" or "max".
+
+    Returns:
+        list[dict]: The comparison of every operation and size present in both runs, with the relative
+        change of the latency and of the memory and whether it is a regression.
+    """
+    previous = {(result['operation'], result['size']): result for result in baseline['results']}
+    comparisons = []
+    for result in current['results']:
+        before = previous.get((result['operation'], result['size']))
+        if before is None:
+            continue
+        comparison = {'operation': result['operation'], 'size': result['size'], 'metric': metric,
+                      'before_ms': before['latency_ms'][metric], 'after_ms': result['latency_ms'][metric],
+                      'latency_change': None, 'memory_change': None}
+        if comparison['before_ms']:
+            comparison['latency_change'] = comparison['after_ms'] / comparison['before_ms'] - 1
+        if before['peak_memory_bytes'] and result['peak_memory_bytes'] is not None:
+            comparison['memory_change'] = result['peak_memory_bytes'] / before['peak_memory_bytes'] - 1
+        comparison['regression'] = any(change is not None and change > threshold
+                                       for change in (comparison['latency_change'], comparison['memory_change']))
+        comparisons.append(comparison)
+    return comparisons
+
+
+def format_comparison(comparison: dict) -> str:
+    """
+    Formats the comparison of an operation as a line of text.
+    """
+    line = (f"{comparison['operation']:<18} {comparison['size']:>9} "
+            f"{comparison['metric']} {comparison['before_ms']:10.3f} ms -> {comparison['after_ms']:10.3f} ms")
+    if comparison['latency_change'] is not None:
+        line += f" ({comparison['latency_change']:+.1%})"
+    if comparison['memory_change'] is not None:
+        line += f", memory {comparison['memory_change']:+.1%}"
+    if comparison['regression']:
+        line += "  REGRESSION"
+    return line
+
+
+def parse_size(text: str) -> int:
+    """
+    Parses a catalogue size, either an integer or a power of ten like 1e6.
+    """
+    try:
+        size = int(float(text)) if 'e' in text.lower() else int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r}")
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"size must be positive: {text!r}")
+    return size
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks the hot paths of Library on synthetic catalogues.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark and write the results as JSON")
+    run_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[1000, 10000, 100000],
+                            help="catalogue sizes, e.g. 1e3 1e4 1e7 (default: 1e3 1e4 1e5)")
+    run_parser.add_argument("--repeat", type=int, default=3,
+                            help="calls of dump_to_json, load_from_json and __str__ (default: %(default)s)")
+    run_parser.add_argument("--queries", type=int, default=200, help="search queries (default: %(default)s)")
+    run_parser.add_argument("--seed", type=int, default=0, help="seed of the catalogue (default: %(default)s)")
+    run_parser.add_argument("--no-memory", action="store_true",
+                            help="skip the peak memory measurement, which runs every operation once more")
+    run_parser.add_argument("--output", metavar="PATH", help="write the results to PATH instead of stdout")
+
+    compare_parser = commands.add_parser("compare", help="compare two runs, exit with 1 if anything regressed")
+    compare_parser.add_argument("baseline", help="results of the earlier run")
+    compare_parser.add_argument("current", help="results of the later run")
+    compare_parser.add_argument("--threshold", type=float, default=0.2,
+                                help="tolerated relative growth of latency and memory (default: %(default)s)")
+    compare_parser.add_argument("--metric", choices=["min", "mean", "max"] + [f"p{p}" for p in PERCENTILES],
+                                default="p50", help="latency compared (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if args.repeat <= 0 or args.queries <= 0:
+            parser.error("--repeat and --queries must be positive")
+        report = run(args.sizes, args.repeat, args.queries, args.seed, not args.no_memory, log=sys.stderr)
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.output is None:
+            print(text)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        return 0
+
+    reports = []
+    for path in (args.baseline, args.current):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Can't read benchmark results {path}: {e}", file=sys.stderr)
+            return 2
+    comparisons = compare(*reports, threshold=args.threshold, metric=args.metric)
+    for comparison in comparisons:
+        print(format_comparison(comparison))
+    regressions = sum(comparison['regression'] for comparison in comparisons)
+    print(f"{regressions} regression(s) in {len(comparisons)} comparison(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
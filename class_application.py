@@ -1,6 +1,11 @@
 import os.path
+import sys
 from class_library import Library
 from class_book import Book
+from class_binary_snapshot import BinarySnapshot
+from class_compression import Compression
+from class_sqlite_library import SqliteBooks, SqliteLibrary
+from class_metrics import metrics
 
 
 class Application:
@@ -9,11 +14,25 @@ class Application:
     It provides methods to view, load, save, add, remove, and modify books in a library.
     """
 
+    # Number of books printed before asking whether to continue
+    PAGE_SIZE = 50
+    # Number of best matches printed by the search
+    SEARCH_LIMIT = 20
+    # Number of search results kept in the library's search cache
+    SEARCH_CACHE_SIZE = 64
+    # Sort orders offered when printing the library
+    SORT_ORDERS = {"название": "title", "автор": "author", "год": "year"}
+    # Number of processes parsing a large JSON library, None for one per available CPU
+    LOAD_WORKERS = None
+    # Level of the databases saved compressed (.gz, .bz2, .xz), None for the default of the format
+    COMPRESSION_LEVEL = None
+
     def __init__(self):
         """
         Initializes the Application instance with a new Library object.
         """
         self.library = Library()
+        self.library.enable_search_cache(self.SEARCH_CACHE_SIZE)
 
     def main_cycle(self):
         """
@@ -44,8 +63,10 @@ class Application:
                     break
                 case "9":
                     print(self.controls())
+                case "10":
+                    self.handle_show_metrics()
                 case _:
-                    print("Код команды неверный, пожалуйста введите число от 1 до 9")
+                    print("Код команды неверный, пожалуйста введите число от 1 до 10")
 
     def controls(self):
         """
@@ -59,13 +80,31 @@ class Application:
 6 - изменить статус книги
 7 - поиск книги
 8 - выход
-9 - показать список команд"""
+9 - показать список команд
+10 - показать статистику операций"""
 
     def handle_print_library(self):
         """
         Prints the current list of books in the library.
+        Books are streamed to the console page by page; if the library doesn't fit a single page,
+        the user is asked for a sort order and whether to continue after every page.
         """
-        print(self.library)
+        if not self.library.books:
+            print("Библиотека пуста")
+            return
+        sort_by = None
+        if len(self.library.books) > self.PAGE_SIZE:
+            order = input("Сортировать по (название/автор/год, Enter - без сортировки): ").lower()
+            sort_by = self.SORT_ORDERS.get(order)
+        offset = 0
+        while True:
+            offset += self.library.render(sys.stdout, sort_by, offset, self.PAGE_SIZE)
+            if offset >= len(self.library.books):
+                break
+            answer = input(f"Показано {offset} из {len(self.library.books)}. "
+                           f"Enter - следующая страница, q - закончить просмотр: ")
+            if answer.lower() == "q":
+                break
 
     def handle_load_from_file(self):
         """
@@ -74,26 +113,44 @@ class Application:
         """
         db_path = input("Укажите путь к имеющемуся файлу библиотеки .json: ")
         if os.path.exists(db_path):
-            self.library = Library.load_from_json(db_path)
+            # The format (JSON, binary snapshot or SQLite) is detected from the file header,
+            # an SQLite database is served in place instead of being read into memory
+            library_class = SqliteLibrary if SqliteBooks.is_database(db_path) else Library
+            self.library = library_class.load(db_path, workers=self.LOAD_WORKERS)
+            if self.library is not None:
+                # A reloaded library starts with an empty cache
+                self.library.enable_search_cache(self.SEARCH_CACHE_SIZE)
             print(f"Файл библиотеки {db_path} загружен")
         else:
             print("Неверный путь к файлу")
 
     def handle_save_to_file(self):
         """
-        Saves the current library data to a JSON file.
+        Saves the current library data to a JSON file, or to a binary snapshot or an SQLite database
+        if the file name has their extension. The file is compressed if the name ends with .gz, .bz2 or .xz.
         Prompts the user for the file name and confirms overwriting if the file already exists.
         """
         db_path = input("Укажите имя файла: ")
         if os.path.exists(db_path):
             rewrite = input("Файл уже существует. Перезаписать? (любой ответ кроме да == нет)")
             if rewrite.lower() == "да":
-                self.library.dump_to_json(db_path)
+                self._save(db_path)
                 print(f"Библиотека сохранена в {os.path.abspath(db_path)}")
         else:
-            self.library.dump_to_json(db_path)
+            self._save(db_path)
             print(f"Библиотека сохранена в {os.path.abspath(db_path)}")
 
+    def _save(self, db_path: str):
+        """
+        Saves the library in the format and compression chosen by the file extensions.
+        """
+        if Compression.strip_extension(db_path).endswith(BinarySnapshot.EXTENSION):
+            self.library.dump_to_binary(db_path, self.COMPRESSION_LEVEL)
+        elif db_path.endswith(SqliteLibrary.EXTENSION):
+            self.library.dump_to_sqlite(db_path)
+        else:
+            self.library.dump_to_json(db_path, compression_level=self.COMPRESSION_LEVEL)
+
     def handle_add_book(self):
         """
         Adds a new book to the library.
@@ -142,12 +199,30 @@ class Application:
     def handle_search(self):
         """
         Searches for books in the library based on a user-provided query.
-        Prompts the user for a search term and displays matching books.
+        Prompts the user for a search term and displays the best matching books, best first.
+        If nothing contains the search term, the closest matches allowing typos are displayed instead.
         """
         prompt = input("Введите поисковый запрос (название/автор/год): ")
-        result_list = self.library.search_book(prompt)
+        result_list = self.library.search_ranked(prompt, self.SEARCH_LIMIT)
+        if not result_list:
+            # Fall back to the typo-tolerant search
+            result_list = self.library.search_fuzzy(prompt, self.SEARCH_LIMIT)
+            if result_list:
+                print("Точных совпадений не найдено, возможно вы искали:")
         if result_list:
             for book in result_list:
                 print(book)
+            if len(result_list) == self.SEARCH_LIMIT:
+                print(f"Показаны {self.SEARCH_LIMIT} лучших совпадений, уточните запрос, чтобы увидеть остальные")
         else:
             print("Книг по вашему запросу не найдено")
+
+    def handle_show_metrics(self):
+        """
+        Prints the call counts, latencies and file traffic of the library operations and the handlers,
+        if the application was started with metrics enabled.
+        """
+        if not metrics.enabled:
+            print("Статистика не собирается, запустите приложение с параметром --metrics")
+            return
+        print(metrics.report())
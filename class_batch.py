@@ -0,0 +1,182 @@
+import json
+import sys
+import time
+from typing import Iterable, Optional, TextIO
+from class_book import Book
+from class_binary_snapshot import BinarySnapshot
+from class_compression import Compression
+from class_library import Library
+from class_sqlite_library import SqliteLibrary
+
+
+class BatchRunner:
+    """
+    Runs a stream of commands against a library without any prompts.
+
+    Every line is a JSON object in the format of the network server: {"command": "add", "title": ...,
+    "author": ..., "year": ...}, {"command": "remove", "id": ...}, {"command": "status", "id": ...,
+    "status": ...} or {"command": "search", "query": ..., "limit": ...}. Empty lines and lines starting
+    with "#" are skipped. Consecutive commands of the same kind are applied as one bulk operation of up
+    to BATCH_SIZE items, and searches flush the pending changes first, so they see every change made
+    by the lines above them. Search results are written to the output stream as JSON lines.
+    """
+
+    # Maximum number of changes applied in a single bulk operation
+    BATCH_SIZE = 10000
+    # Number of books a search returns when the command doesn't give a limit
+    SEARCH_LIMIT = 20
+
+    def __init__(self, library: Library, output: Optional[TextIO] = None):
+        """
+        Initializes the runner.
+
+        Args:
+            library (Library): The library to run the commands against.
+            output (Optional[TextIO], optional): Where search results are written. Defaults to stdout.
+        """
+        self.library = library
+        self.output = sys.stdout if output is None else output
+        # Number of commands and errors, and the number of items with each outcome of the bulk operations
+        self.commands = 0
+        self.errors = 0
+        self.searches = 0
+        self.counts = {}
+        self.seconds = 0.0
+        self._pending_command = None
+        self._pending = []
+
+    @staticmethod
+    def _text(request: dict, name: str) -> str:
+        """
+        Returns a required string parameter of a command.
+
+        Raises:
+            ValueError: If the parameter is missing or is not a string.
+        """
+        value = request.get(name)
+        if not isinstance(value, str):
+            raise ValueError(f"Missing or invalid parameter {name!r}")
+        return value
+
+    def _parse(self, request: dict) -> tuple[str, object]:
+        """
+        Validates a command and converts it into an item of a bulk operation.
+
+        Args:
+            request (dict): The parsed command.
+
+        Returns:
+            tuple[str, object]: The command and its item: a Book for add, an ID for remove,
+            an (ID, status) pair for status and the request itself for search.
+
+        Raises:
+            ValueError: If the command is unknown or its parameters are invalid.
+        """
+        command = request.get("command")
+        match command:
+            case "add":
+                title = self._text(request, "title")
+                author = self._text(request, "author")
+                year = request.get("year")
+                if not isinstance(year, (str, int)) or isinstance(year, bool):
+                    raise ValueError("Missing or invalid parameter 'year'")
+                return command, Book(title, author, year)
+            case "remove":
+                return command, self._text(request, "id")
+            case "status":
+                return command, (self._text(request, "id"), self._text(request, "status"))
+            case "search":
+                self._text(request, "query")
+                return command, request
+            case _:
+                raise ValueError(f"Unknown command {command!r}")
+
+    def _flush(self):
+        """
+        Applies the pending changes as one bulk operation.
+        """
+        if not self._pending:
+            return
+        match self._pending_command:
+            case "add":
+                result = self.library.add_books(self._pending)
+            case "remove":
+                result = self.library.remove_books(self._pending)
+            case _:
+                result = self.library.change_books_status(self._pending)
+        for outcome, count in result.counts.items():
+            self.counts[outcome] = self.counts.get(outcome, 0) + count
+        self._pending = []
+        self._pending_command = None
+
+    def _search(self, request: dict):
+        """
+        Runs a search and writes its result to the output stream.
+        """
+        limit = request.get("limit", self.SEARCH_LIMIT)
+        if not isinstance(limit, int) or isinstance(limit, bool) or limit < 0:
+            raise ValueError("Invalid parameter 'limit'")
+        books = self.library.search_ranked(request["query"], limit)
+        self.output.write(json.dumps({"query": request["query"], "books": [book.to_dict() for book in books]},
+                                     ensure_ascii=False) + '\n')
+        self.searches += 1
+
+    def run(self, lines: Iterable[str]):
+        """
+        Runs the commands, reporting the invalid ones and skipping them.
+
+        Args:
+            lines (Iterable[str]): The command lines, e.g. an open file.
+        """
+        start = time.perf_counter()
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            self.commands += 1
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Command must be a JSON object")
+                command, item = self._parse(request)
+                if command == "search":
+                    self._flush()
+                    self._search(item)
+                    continue
+            except ValueError as e:
+                self.errors += 1
+                print(f"Skipping line {line_number}: {e}", file=sys.stderr)
+                continue
+            if command != self._pending_command or len(self._pending) >= self.BATCH_SIZE:
+                self._flush()
+                self._pending_command = command
+            self._pending.append(item)
+        self._flush()
+        self.seconds += time.perf_counter() - start
+
+    def save(self, path_to_database: str, compression_level: Optional[int] = None) -> bool:
+        """
+        Saves the library in the format and compression chosen by the file extensions.
+
+        Args:
+            path_to_database (str): Path to the database file.
+            compression_level (Optional[int], optional): The level of a compressed file (.gz, .bz2, .xz),
+                                                         None for the default of the format.
+
+        Returns:
+            bool: True if the library was saved, False otherwise.
+        """
+        if Compression.strip_extension(path_to_database).endswith(BinarySnapshot.EXTENSION):
+            return self.library.dump_to_binary(path_to_database, compression_level)
+        if path_to_database.endswith(SqliteLibrary.EXTENSION):
+            return self.library.dump_to_sqlite(path_to_database)
+        return self.library.dump_to_json(path_to_database, compression_level=compression_level)
+
+    def report(self) -> str:
+        """
+        Returns a summary of the run with its throughput.
+        """
+        rate = self.commands / self.seconds if self.seconds else 0
+        outcomes = ', '.join(f"{outcome}: {count}" for outcome, count in self.counts.items())
+        return (f"Обработано команд: {self.commands} за {self.seconds:.2f} с ({rate:.0f} команд/с). "
+                f"Результаты: {outcomes or 'нет изменений'}, поисков: {self.searches}, ошибок: {self.errors}")
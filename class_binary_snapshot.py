@@ -0,0 +1,333 @@
+import json
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sized
+from typing import BinaryIO, Iterable, Iterator, Optional
+from class_book import Book
+from class_compression import Compression
+from class_json_stream import JsonArrayReader
+
+
+class SnapshotFormatError(ValueError):
+    """
+    Raised when a binary snapshot is malformed or has an unsupported version.
+    """
+
+
+class BinarySnapshot:
+    """
+    A versioned, length-prefixed binary format of a library database.
+
+    The file starts with a header: the magic bytes, the format version, reserved flags and the
+    number of books. Every book follows as a record: its length in bytes, the status byte, the
+    lengths in characters of the ID, title, author and year, and then the four strings
+    concatenated and encoded in UTF-8, so a record is decoded with one unpack and one decode.
+    Since version 2 the records are followed by an index: the offsets of the records sorted by
+    book ID, and the offset of the index itself as the last 8 bytes of the file, which lets a
+    reader find a book by ID without decoding the others. All numbers are little-endian.
+    """
+
+    MAGIC = b'LMSB'
+    VERSION = 2
+    SUPPORTED_VERSIONS = (1, 2)
+    EXTENSION = '.lmsb'
+
+    _header = struct.Struct('<4sHHQ')
+    _index_offset = struct.Struct('<Q')
+    _record_length = struct.Struct('<I')
+    # Status and the lengths of the ID, title, author and year in characters
+    _fields = struct.Struct('<BIIII')
+
+    @classmethod
+    def is_binary(cls, path: str) -> bool:
+        """
+        Checks whether a file is a binary snapshot by its header, looking into compressed files.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            bool: True if the file, once decompressed, starts with the snapshot magic bytes.
+        """
+        return Compression.read_header(path, len(cls.MAGIC)) == cls.MAGIC
+
+    @classmethod
+    def encode_book(cls, book: Book) -> bytes:
+        """
+        Encodes a book into a record, including its length prefix.
+
+        Args:
+            book (Book): The book to encode.
+
+        Returns:
+            bytes: The encoded record.
+        """
+        fields = [str(book.id), str(book.title), str(book.author), book.year]
+        payload = cls._fields.pack(1 if book.status else 0, *map(len, fields)) + ''.join(fields).encode('utf-8')
+        return cls._record_length.pack(len(payload)) + payload
+
+    @classmethod
+    def decode_book(cls, buffer, offset: int) -> Book:
+        """
+        Decodes the record starting at the given offset.
+
+        Args:
+            buffer: A bytes-like object holding the snapshot.
+            offset (int): The offset of the record, pointing at its length prefix.
+
+        Returns:
+            Book: The decoded book.
+        """
+        (length,) = cls._record_length.unpack_from(buffer, offset)
+        status, id_length, title_length, author_length, year_length = cls._fields.unpack_from(
+            buffer, offset + cls._record_length.size)
+        start = offset + cls._record_length.size + cls._fields.size
+        text = str(buffer[start:offset + cls._record_length.size + length], 'utf-8')
+        title_start = id_length
+        author_start = title_start + title_length
+        year_start = author_start + author_length
+        return Book(text[title_start:author_start], text[author_start:year_start],
+                    text[year_start:year_start + year_length], status == 1, text[:id_length])
+
+    @classmethod
+    def write(cls, f: BinaryIO, books: Iterable[Book]):
+        """
+        Writes books to a binary stream as a snapshot.
+        The header is written first with the number of books if the books are a collection, or otherwise
+        with a placeholder count, which is patched once every book is written, so the books may come from
+        a generator.
+
+        Args:
+            f (BinaryIO): A binary stream positioned where the snapshot should start, it has to be
+                          seekable unless the books are a collection.
+            books (Iterable[Book]): The books to write.
+        """
+        start = f.tell()
+        count = len(books) if isinstance(books, Sized) else 0
+        f.write(cls._header.pack(cls.MAGIC, cls.VERSION, 0, count))
+        offset = cls._header.size
+        # (ID, record offset) pairs for the index
+        entries = []
+        batch = []
+        for book in books:
+            record = cls.encode_book(book)
+            entries.append((str(book.id), offset))
+            offset += len(record)
+            batch.append(record)
+            if len(batch) >= 4096:
+                f.write(b''.join(batch))
+                batch.clear()
+        f.write(b''.join(batch))
+
+        entries.sort()
+        index = array('Q', (record_offset for _, record_offset in entries))
+        if sys.byteorder == 'big':
+            index.byteswap()
+        f.write(index.tobytes())
+        f.write(cls._index_offset.pack(offset))
+        if len(entries) != count:
+            end = f.tell()
+            f.seek(start)
+            f.write(cls._header.pack(cls.MAGIC, cls.VERSION, 0, len(entries)))
+            f.seek(end)
+
+    @classmethod
+    def read_header(cls, buffer) -> tuple[int, int, Optional[int]]:
+        """
+        Validates the header of a snapshot and locates its sections.
+
+        Args:
+            buffer: A bytes-like object holding the snapshot.
+
+        Returns:
+            tuple[int, int, Optional[int]]: The number of books, the offset where the records end
+            and the offset of the ID index (None for version 1 snapshots, which have no index).
+
+        Raises:
+            SnapshotFormatError: If the header is not valid or the version is not supported.
+        """
+        size = len(buffer)
+        if size < cls._header.size:
+            raise SnapshotFormatError("File is too short to be a binary snapshot")
+        magic, version, _, count = cls._header.unpack_from(buffer, 0)
+        if magic != cls.MAGIC:
+            raise SnapshotFormatError("Not a binary snapshot")
+        if version not in cls.SUPPORTED_VERSIONS:
+            raise SnapshotFormatError(f"Unsupported binary snapshot version {version}")
+        if version == 1:
+            return count, size, None
+
+        if size < cls._header.size + cls._index_offset.size:
+            raise SnapshotFormatError("Snapshot is truncated")
+        (index_offset,) = cls._index_offset.unpack_from(buffer, size - cls._index_offset.size)
+        if index_offset + count * 8 + cls._index_offset.size != size:
+            raise SnapshotFormatError("Snapshot index is corrupted")
+        return count, index_offset, index_offset
+
+    @classmethod
+    def read_index(cls, buffer, index_offset: int, count: int) -> memoryview | array:
+        """
+        Returns the offsets of the records sorted by book ID. On little-endian machines the offsets are
+        a view of the buffer itself, so reading the index costs nothing whatever the size of the snapshot.
+
+        Args:
+            buffer: A bytes-like object holding the snapshot.
+            index_offset (int): The offset of the index, as returned by read_header.
+            count (int): The number of books in the snapshot.
+
+        Returns:
+            memoryview or array: The record offsets. A view has to be released before the buffer is closed.
+        """
+        if sys.byteorder == 'little':
+            return memoryview(buffer)[index_offset:index_offset + count * 8].cast('Q')
+        index = array('Q')
+        index.frombytes(buffer[index_offset:index_offset + count * 8])
+        index.byteswap()
+        return index
+
+    @classmethod
+    def record_id(cls, buffer, offset: int) -> str:
+        """
+        Decodes only the ID of the record starting at the given offset.
+
+        Args:
+            buffer: A bytes-like object holding the snapshot.
+            offset (int): The offset of the record, pointing at its length prefix.
+
+        Returns:
+            str: The ID of the book.
+        """
+        _, id_length, _, _, _ = cls._fields.unpack_from(buffer, offset + cls._record_length.size)
+        start = offset + cls._record_length.size + cls._fields.size
+        # A character takes at most 4 bytes in UTF-8, the cut-off tail is ignored
+        return str(buffer[start:start + id_length * 4], 'utf-8', 'ignore')[:id_length]
+
+    @classmethod
+    def record_offsets(cls, buffer) -> Iterator[int]:
+        """
+        Walks the records of a snapshot without decoding them.
+
+        Args:
+            buffer: A bytes-like object holding the whole snapshot.
+
+        Yields:
+            int: The offsets of the records in the order they were written.
+
+        Raises:
+            SnapshotFormatError: If the snapshot is malformed.
+        """
+        count, records_end, _ = cls.read_header(buffer)
+        offset = cls._header.size
+        for _ in range(count):
+            if offset + cls._record_length.size > records_end:
+                raise SnapshotFormatError("Snapshot is truncated")
+            (length,) = cls._record_length.unpack_from(buffer, offset)
+            end = offset + cls._record_length.size + length
+            if end > records_end:
+                raise SnapshotFormatError("Snapshot is truncated")
+            yield offset
+            offset = end
+        if offset != records_end:
+            raise SnapshotFormatError("Unexpected data after the last record")
+
+    @classmethod
+    def read(cls, buffer) -> Iterator[Book]:
+        """
+        Decodes the books of a snapshot held in memory.
+
+        Args:
+            buffer: A bytes-like object holding the whole snapshot.
+
+        Yields:
+            Book: The books in the order they were written.
+
+        Raises:
+            SnapshotFormatError: If the snapshot is malformed.
+        """
+        offset = cls._header.size
+        try:
+            for offset in cls.record_offsets(buffer):
+                yield cls.decode_book(buffer, offset)
+        except (struct.error, UnicodeDecodeError) as e:
+            raise SnapshotFormatError(f"Malformed record at offset {offset}: {e}")
+
+    @staticmethod
+    def write_json(f, rows: Iterable[dict]):
+        """
+        Writes book dictionaries as a JSON array formatted like Library.dump_to_json, one row at a time.
+
+        Args:
+            f: A text stream to write to.
+            rows (Iterable[dict]): The book dictionaries to write.
+        """
+        first = True
+        for row in rows:
+            f.write('[\n    ' if first else ',\n    ')
+            f.write(json.dumps(row, indent=4).replace('\n', '\n    '))
+            first = False
+        f.write('[]' if first else '\n]')
+
+    @staticmethod
+    def _parse_rows(rows: Iterable[dict]) -> Iterator[Book]:
+        """
+        Builds books from dictionaries, reporting and skipping the ones that can't be parsed.
+        """
+        for row in rows:
+            try:
+                yield Book.from_dict(row)
+            except Exception as book_error:
+                print(f"Error parsing book: {book_error}")
+
+    @classmethod
+    def convert(cls, source: str, target: str) -> bool:
+        """
+        Converts a database between the JSON and the binary format, one book at a time.
+        The format of the source is detected from its header and the target gets the other format.
+        Either file may be compressed: the source is detected from its magic bytes, and the target
+        is compressed if it has the extension of a compression. The target is replaced atomically,
+        so a failed conversion leaves it intact, and it can't be the source itself.
+
+        Args:
+            source (str): Path to the database to convert.
+            target (str): Path to the converted database.
+
+        Returns:
+            bool: True if the database was converted, False otherwise.
+        """
+        # Imported here, the library imports the snapshot format
+        from class_library import Library
+        try:
+            if os.path.realpath(source) == os.path.realpath(target) or \
+                    os.path.exists(target) and os.path.samefile(source, target):
+                print(f"Can't convert {source} into itself, choose another target.")
+                return False
+            if cls.is_binary(source):
+                with Compression.open(source) as f:
+                    data = f.read()
+                Library._write_atomically(
+                    target, lambda stream: cls.write_json(stream, (book.to_dict() for book in cls.read(data))))
+            else:
+                def write(stream: BinaryIO):
+                    with Compression.open(source, text=True) as src:
+                        books = cls._parse_rows(JsonArrayReader(src))
+                        # A compressed stream can't seek back to patch the number of books
+                        cls.write(stream, books if Compression.from_extension(target) is None else list(books))
+                Library._write_atomically(target, write, binary=True)
+            return True
+        except OSError as e:
+            print(f"OS error occurred while converting {source}: {e}")
+        except Compression.ERRORS as e:
+            print(f"Invalid compressed data in {source}: {e}")
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Error converting {source}: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(f"Usage: python {os.path.basename(sys.argv[0])} SOURCE TARGET\n"
+              f"Converts a JSON database into a binary snapshot or a binary snapshot into JSON.")
+        sys.exit(2)
+    sys.exit(0 if BinarySnapshot.convert(sys.argv[1], sys.argv[2]) else 1)
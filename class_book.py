@@ -1,13 +1,53 @@
+import sys
 import uuid
 from typing import Optional
 
+# Shared year objects, years repeat a lot across a catalogue.
+# Maps both the numbers and their canonical strings to the shared number
+_year_cache = {}
+# Maximum number of entries of the year cache, far more than the years of a real catalogue.
+# Years beyond it are parsed and stored as usual but not shared, so distinct years can't grow the cache forever
+_YEAR_CACHE_SIZE = 8192
+
+
+def _shared_year(number: int, year: Optional[str] = None) -> int:
+    """
+    Returns the shared object of a year number, caching the number and its canonical string while the cache has room.
+
+    Args:
+        number (int): The year.
+        year (Optional[str], optional): The canonical string of the year, to cache as well.
+
+    Returns:
+        int: The shared number, or the number itself once the cache is full.
+    """
+    shared = _year_cache.get(number)
+    if len(_year_cache) >= _YEAR_CACHE_SIZE:
+        return number if shared is None else shared
+    if shared is None:
+        shared = _year_cache[number] = number
+    if year is not None:
+        _year_cache[year] = shared
+    return shared
+
 
 class Book:
     """
     A class representing a book in a library system.
     Each book has a title, author, year of publication, availability status, and a unique ID.
+
+    Books are stored compactly: the class uses __slots__ instead of a per-instance __dict__,
+    authors are interned, a canonical numeric year is kept as a shared int and, if compact_ids
+    is enabled, a canonical UUID is kept as its 128-bit value. The public attributes are still
+    strings, converted on access.
     """
 
+    __slots__ = ('title', '_author', '_year', 'status', '_id')
+
+    # Store canonical UUID IDs as integers. Off by default, as a Library keys its books by the
+    # ID string anyway, and sharing that string with the book is cheaper than packing it
+    compact_ids = False
+
     def __init__(self, title: str, author: str, year: str | int,
                  status: Optional[bool] = True, book_id: Optional[str] = None):
         """
@@ -35,6 +75,79 @@ class Book:
         else:
             self.id = book_id
 
+    @property
+    def author(self) -> str:
+        """
+        The author of the book.
+        """
+        return self._author
+
+    @author.setter
+    def author(self, author: str):
+        # The same authors repeat across a catalogue, so share a single string between their books
+        self._author = sys.intern(author) if type(author) is str else author
+
+    @property
+    def year(self) -> str:
+        """
+        The year the book was published, as a string.
+        """
+        return str(self._year)
+
+    @year.setter
+    def year(self, year: str | int):
+        if type(year) is int:
+            self._year = _shared_year(year)
+            return
+        year = str(year)
+        cached = _year_cache.get(year)
+        if cached is not None:
+            # A year string seen before, already known to be canonical
+            self._year = cached
+            return
+        try:
+            number = int(year)
+        except ValueError:
+            self._year = year
+            return
+        # Only keep the number if it converts back to exactly the same string (e.g. not "0123")
+        if str(number) == year:
+            self._year = _shared_year(number, year)
+        else:
+            self._year = year
+
+    @property
+    def id(self) -> str:
+        """
+        The unique ID of the book, as a string.
+        """
+        if type(self._id) is int:
+            return str(uuid.UUID(int=self._id))
+        return self._id
+
+    @id.setter
+    def id(self, book_id: str):
+        self._id = book_id
+        if self.compact_ids and type(book_id) is str and len(book_id) == 36:
+            try:
+                packed = uuid.UUID(book_id)
+            except ValueError:
+                return
+            # Only pack IDs that can be restored to exactly the same string
+            if str(packed) == book_id:
+                self._id = packed.int
+
+    def year_as_int(self) -> Optional[int]:
+        """
+        Returns the publication year as a number.
+
+        Returns:
+            int or None: The year, or None if the year is not a plain number.
+        """
+        if type(self._year) is int:
+            return self._year
+        return None
+
     def __str__(self) -> str:
         """
         Returns a string representation of the book with its details and status.
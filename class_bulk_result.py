@@ -0,0 +1,76 @@
+from typing import Iterable
+
+
+class BulkResult:
+    """
+    A per-item summary of a bulk library operation.
+    Every item of the batch gets an outcome such as "added", "removed", "updated", "unchanged",
+    "not found" or "invalid status".
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty summary.
+        """
+        # (book ID, outcome) pairs in the order the items were processed
+        self.items = []
+        self.counts = {}
+
+    def __len__(self) -> int:
+        """
+        Returns the number of processed items.
+        """
+        return len(self.items)
+
+    def __str__(self) -> str:
+        """
+        Returns the number of items with each outcome, e.g. "added: 10, not found: 2".
+        """
+        return ', '.join(f"{outcome}: {count}" for outcome, count in self.counts.items())
+
+    def record(self, book_id: str, outcome: str):
+        """
+        Records the outcome of a single item.
+
+        Args:
+            book_id (str): The ID of the book the item refers to.
+            outcome (str): What happened to the item.
+        """
+        self.items.append((book_id, outcome))
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def record_many(self, book_ids: Iterable[str], outcome: str):
+        """
+        Records the same outcome of many items.
+
+        Args:
+            book_ids (Iterable[str]): The IDs of the books the items refer to.
+            outcome (str): What happened to the items.
+        """
+        before = len(self.items)
+        self.items.extend((book_id, outcome) for book_id in book_ids)
+        self.counts[outcome] = self.counts.get(outcome, 0) + len(self.items) - before
+
+    def count(self, outcome: str) -> int:
+        """
+        Returns the number of items with the given outcome.
+        """
+        return self.counts.get(outcome, 0)
+
+    def ids(self, outcome: str) -> list[str]:
+        """
+        Returns the IDs of the items with the given outcome.
+        """
+        return [book_id for book_id, item_outcome in self.items if item_outcome == outcome]
+
+    def to_dict(self) -> dict:
+        """
+        Converts the summary into a dictionary format for serialization.
+
+        Returns:
+            dict: The outcome counts and the per-item outcomes.
+        """
+        return {
+            'counts': dict(self.counts),
+            'items': [{'id': book_id, 'outcome': outcome} for book_id, outcome in self.items]
+        }
@@ -0,0 +1,92 @@
+import itertools
+import uuid
+from typing import Iterable, Optional
+
+
+class ChangeFeed:
+    """
+    A sequenced in-memory log of library mutations, followed by replicas to stay in sync with a primary library.
+
+    Every add, remove and status change gets the next sequence number and is kept as a journal record
+    (see Journal.record_add, record_remove and record_status). Only the latest changes are retained,
+    so a replica that fell further behind than the feed remembers has to start over from a snapshot.
+    Every feed has a random ID: sequence numbers of different feeds (e.g. of a primary that was restarted
+    or reloaded) are unrelated, and a replica seeing another ID has to start over too.
+    """
+
+    # Number of changes retained by default
+    DEFAULT_CAPACITY = 10000
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initializes an empty feed.
+
+        Args:
+            capacity (int, optional): The number of latest changes retained.
+
+        Raises:
+            ValueError: If the capacity is not positive.
+        """
+        if capacity <= 0:
+            raise ValueError(f"Change feed capacity must be positive, got {capacity}")
+        self.id = uuid.uuid4().hex
+        self.capacity = capacity
+        # The sequence number of the last change, 0 before the first one
+        self.sequence = 0
+        # Ring buffer of the retained changes, the oldest one at _start once the buffer is full.
+        # Unlike a deque, it gives any range of changes in O(length of the range)
+        self._records = []
+        self._start = 0
+
+    @property
+    def oldest_sequence(self) -> int:
+        """
+        The oldest sequence number a replica may follow the feed from: the changes after it are all retained.
+        """
+        return self.sequence - len(self._records)
+
+    def extend(self, records: Iterable[dict]):
+        """
+        Appends changes to the feed, dropping the oldest ones beyond the capacity.
+
+        Args:
+            records (Iterable[dict]): The journal records of the changes, in the order they were applied.
+        """
+        records = list(records)
+        self.sequence += len(records)
+        capacity = self.capacity
+        if len(records) >= capacity:
+            self._records = records[-capacity:]
+            self._start = 0
+            return
+        free = capacity - len(self._records)
+        self._records.extend(records[:free])
+        for record in records[free:]:
+            self._records[self._start] = record
+            self._start = (self._start + 1) % capacity
+
+    def since(self, sequence: int, limit: Optional[int] = None) -> Optional[list[tuple[int, dict]]]:
+        """
+        Returns the changes following a sequence number. Costs O(number of returned changes),
+        whatever the size of the library and the number of retained changes.
+
+        Args:
+            sequence (int): The sequence number of the last change the replica applied.
+            limit (Optional[int], optional): The maximum number of changes to return, the oldest first.
+
+        Returns:
+            list[tuple[int, dict]] or None: (sequence number, record) pairs, or None if some of the changes
+            following the sequence number are no longer retained, or the sequence number is ahead of the feed.
+        """
+        if not self.oldest_sequence <= sequence <= self.sequence:
+            return None
+        count = self.sequence - sequence if limit is None else min(self.sequence - sequence, limit)
+        if count <= 0:
+            return []
+        # Only the returned changes are copied, from where the first of them lies in the ring buffer
+        size = len(self._records)
+        first = (self._start + size - (self.sequence - sequence)) % size
+        records = self._records[first:first + count]
+        if len(records) < count:
+            records += self._records[:count - len(records)]
+        return list(zip(itertools.count(sequence + 1), records))
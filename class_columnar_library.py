@@ -0,0 +1,417 @@
+from array import array
+from collections.abc import MutableMapping
+from typing import Iterable, Iterator, Optional
+from class_book import Book
+from class_library import Library
+
+
+class StringDictionary:
+    """
+    A dictionary encoding of repeated values: every distinct value is stored once and
+    referred to by its integer code.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty dictionary.
+        """
+        self.values = []
+        self._codes = {}
+
+    def __len__(self) -> int:
+        """
+        Returns the number of distinct values.
+        """
+        return len(self.values)
+
+    def encode(self, value) -> int:
+        """
+        Returns the code of a value, adding the value to the dictionary if needed.
+
+        Args:
+            value: The value to encode.
+
+        Returns:
+            int: The code of the value.
+        """
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class BookColumns(MutableMapping):
+    """
+    A column-oriented store of books that can be used in place of the Library.books dictionary.
+    Every field is kept in its own column: statuses and years in contiguous arrays, titles and
+    authors as dictionary codes. Book objects are only built when a caller asks for one, and
+    changes made to such a Book are not written back (use the Library methods instead).
+
+    Removed rows are left as tombstones to keep the insertion order, and the columns are
+    compacted once more than half of the rows are tombstones.
+    """
+
+    DELETED = -1
+    # Year column value of books whose year is not a plain number
+    OTHER_YEAR = -(1 << 63)
+    # Tombstones are not compacted away in small stores
+    COMPACT_MIN_ROWS = 1024
+
+    def __init__(self):
+        """
+        Initializes an empty store.
+        """
+        self._ids = []
+        self._rows = {}
+        self._titles = array('L')
+        self._authors = array('L')
+        self._years = array('q')
+        # 1 - available, 0 - checked out, DELETED - removed row
+        self._statuses = array('b')
+        self._other_years = {}
+        self._title_dictionary = StringDictionary()
+        self._author_dictionary = StringDictionary()
+        self._deleted = 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of books in the store.
+        """
+        return len(self._rows)
+
+    def __contains__(self, book_id) -> bool:
+        """
+        Checks whether a book with the given ID is in the store.
+        """
+        return book_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterates over the IDs of the books in insertion order.
+        """
+        for book_id in self._ids:
+            if book_id is not None:
+                yield book_id
+
+    def __getitem__(self, book_id: str) -> Book:
+        """
+        Materializes the book with the given ID.
+        """
+        return self._materialize(self._rows[book_id])
+
+    def __setitem__(self, book_id: str, book: Book):
+        """
+        Stores a book, overwriting the row of the book with the same ID if there is one.
+        """
+        row = self._rows.get(book_id)
+        year = book.year_as_int()
+        if year is not None and not self.OTHER_YEAR < year < -self.OTHER_YEAR:
+            # Doesn't fit the year column
+            year = None
+        if row is None:
+            row = len(self._ids)
+            self._rows[book_id] = row
+            self._ids.append(book_id)
+            self._titles.append(self._title_dictionary.encode(book.title))
+            self._authors.append(self._author_dictionary.encode(book.author))
+            self._years.append(self.OTHER_YEAR if year is None else year)
+            self._statuses.append(1 if book.status else 0)
+        else:
+            self._titles[row] = self._title_dictionary.encode(book.title)
+            self._authors[row] = self._author_dictionary.encode(book.author)
+            self._years[row] = self.OTHER_YEAR if year is None else year
+            self._statuses[row] = 1 if book.status else 0
+            self._other_years.pop(row, None)
+        if year is None:
+            self._other_years[row] = book.year
+
+    def __delitem__(self, book_id: str):
+        """
+        Removes the book with the given ID, leaving a tombstone in its row.
+        """
+        row = self._rows.pop(book_id)
+        self._ids[row] = None
+        self._statuses[row] = self.DELETED
+        self._other_years.pop(row, None)
+        self._deleted += 1
+        if self._deleted > self.COMPACT_MIN_ROWS and self._deleted * 2 > len(self._ids):
+            self._compact()
+
+    def _materialize(self, row: int) -> Book:
+        """
+        Builds a Book object from a row of the columns.
+        """
+        year = self._years[row]
+        return Book(
+            title=self._title_dictionary.values[self._titles[row]],
+            author=self._author_dictionary.values[self._authors[row]],
+            year=self._other_years[row] if year == self.OTHER_YEAR else year,
+            status=self._statuses[row] == 1,
+            book_id=self._ids[row]
+        )
+
+    def _compact(self):
+        """
+        Rebuilds the columns without the removed rows, keeping the insertion order.
+        """
+        live = [row for row, status in enumerate(self._statuses) if status != self.DELETED]
+        other_years = {}
+        for new_row, row in enumerate(live):
+            if row in self._other_years:
+                other_years[new_row] = self._other_years[row]
+        self._ids = [self._ids[row] for row in live]
+        self._rows = {book_id: row for row, book_id in enumerate(self._ids)}
+        self._titles = array('L', (self._titles[row] for row in live))
+        self._authors = array('L', (self._authors[row] for row in live))
+        self._years = array('q', (self._years[row] for row in live))
+        self._statuses = array('b', (self._statuses[row] for row in live))
+        self._other_years = other_years
+        self._deleted = 0
+
+    def set_status(self, book_id: str, status: bool):
+        """
+        Updates the status column of a book.
+
+        Args:
+            book_id (str): The ID of the book.
+            status (bool): The new status of the book.
+        """
+        self._statuses[self._rows[book_id]] = 1 if status else 0
+
+    def count_status(self, status: bool) -> int:
+        """
+        Counts the books with the given status over the status column.
+
+        Args:
+            status (bool): True to count available books, False to count checked out ones.
+
+        Returns:
+            int: The number of books.
+        """
+        return self._statuses.count(1 if status else 0)
+
+    def ids_with_status(self, status: bool) -> list[str]:
+        """
+        Returns the IDs of the books with the given status, in insertion order.
+
+        Args:
+            status (bool): True for available books, False for checked out ones.
+
+        Returns:
+            list[str]: IDs of the matching books.
+        """
+        value = 1 if status else 0
+        ids = self._ids
+        return [ids[row] for row, row_status in enumerate(self._statuses) if row_status == value]
+
+    def ids_published_between(self, start: int, end: int) -> list[str]:
+        """
+        Returns the IDs of the books published in the given range of years,
+        ordered by year and books of the same year in insertion order.
+        Books whose year is not a plain number are never included.
+
+        Args:
+            start (int): The first year of the range.
+            end (int): The last year of the range, inclusive.
+
+        Returns:
+            list[str]: IDs of the matching books.
+        """
+        ids = self._ids
+        years = self._years
+        # Removed rows have no ID
+        rows = [row for row, year in enumerate(years)
+                if start <= year <= end and year != self.OTHER_YEAR and ids[row] is not None]
+        rows.sort(key=years.__getitem__)
+        return [ids[row] for row in rows]
+
+    def search_ids(self, prompt: str, candidate_ids: Optional[Iterable[str]] = None) -> list[str]:
+        """
+        Returns the IDs of the books whose title, author or year contains the prompt.
+        Every distinct title and author is checked at most once per call.
+
+        Args:
+            prompt (str): The lowercased search query.
+            candidate_ids (Optional[Iterable[str]], optional): The IDs to check, in the order the result
+                                                               should have. Defaults to every book.
+
+        Returns:
+            list[str]: IDs of the matching books.
+        """
+        if candidate_ids is None:
+            candidate_ids = self
+        title_values = self._title_dictionary.values
+        author_values = self._author_dictionary.values
+        title_matches = {}
+        author_matches = {}
+        results = []
+
+        for book_id in candidate_ids:
+            row = self._rows[book_id]
+            code = self._titles[row]
+            matched = title_matches.get(code)
+            if matched is None:
+                matched = title_matches[code] = prompt in title_values[code].lower()
+            if not matched:
+                code = self._authors[row]
+                matched = author_matches.get(code)
+                if matched is None:
+                    matched = author_matches[code] = prompt in author_values[code].lower()
+            if not matched:
+                year = self._years[row]
+                year = self._other_years[row] if year == self.OTHER_YEAR else str(year)
+                matched = prompt in year.lower()
+            if matched:
+                results.append(book_id)
+
+        return results
+
+    def ranked_ids(self, prompt: str, limit: int, candidate_ids: Optional[Iterable[str]] = None) -> list[str]:
+        """
+        Returns the IDs of the books that match the prompt best, ranked like Library.search_ranked.
+        Every distinct title and author is scored at most once per call.
+
+        Args:
+            prompt (str): The lowercased search query.
+            limit (int): The maximum number of IDs to return.
+            candidate_ids (Optional[Iterable[str]], optional): The IDs to check, in insertion order.
+                                                               Defaults to every book.
+
+        Returns:
+            list[str]: IDs of the best matching books, best first.
+        """
+        if candidate_ids is None:
+            candidate_ids = self
+        title_values = self._title_dictionary.values
+        author_values = self._author_dictionary.values
+        title_scores = {}
+        author_scores = {}
+        match_rank = Library._match_rank
+        match_ranks = Library.MATCH_RANKS
+
+        def scored():
+            for book_id in candidate_ids:
+                row = self._rows[book_id]
+                code = self._titles[row]
+                score = title_scores.get(code)
+                if score is None:
+                    rank = match_rank(prompt, title_values[code].lower())
+                    score = title_scores[code] = rank * match_ranks + Library.TITLE if rank else 0
+                code = self._authors[row]
+                author_score = author_scores.get(code)
+                if author_score is None:
+                    rank = match_rank(prompt, author_values[code].lower())
+                    author_score = author_scores[code] = rank * match_ranks + Library.AUTHOR if rank else 0
+                year = self._years[row]
+                year = self._other_years[row] if year == self.OTHER_YEAR else str(year)
+                rank = match_rank(prompt, year.lower())
+                yield max(score, author_score, rank * match_ranks + Library.YEAR if rank else 0), book_id
+
+        return Library._top_matches(scored(), limit)
+
+
+class ColumnarLibrary(Library):
+    """
+    A library that keeps its books in a BookColumns store instead of a dictionary of Book objects.
+    Serves the same API as Library, with Book objects materialized on demand, and adds bulk
+    queries that run over the columns.
+    """
+
+    def __init__(self):
+        """
+        Initializes the ColumnarLibrary instance with an empty column store.
+        """
+        super().__init__()
+        self.books = BookColumns()
+        # The columns answer status and year queries themselves
+        self._status_index = None
+        self._year_index = None
+
+    def _set_status(self, book: Book, status: bool):
+        """
+        Writes a new status of a book to the status column.
+        """
+        super()._set_status(book, status)
+        self.books.set_status(book.id, status)
+
+    def _set_statuses(self, changes: list[tuple[Book, bool]]):
+        """
+        Writes many status changes to the status column.
+        """
+        super()._set_statuses(changes)
+        for book, status in changes:
+            self.books.set_status(book.id, status)
+
+    def _find_books(self, prompt: str) -> list[Book]:
+        """
+        Finds the books that match the prompt, see Library.search_book.
+        Matches are checked over the dictionary-encoded columns and only the matching books are materialized.
+
+        Args:
+            prompt (str): The lowercased search query.
+
+        Returns:
+            list[Book]: The matching books in insertion order.
+        """
+        candidate_ids = self._search_candidates(prompt)
+        return [self.books[book_id] for book_id in self.books.search_ids(prompt, candidate_ids)]
+
+    def _find_ranked(self, prompt: str, limit: int) -> list[Book]:
+        """
+        Finds the best matches of the prompt, see Library.search_ranked.
+        Scores are computed over the dictionary-encoded columns and only the returned books are materialized.
+
+        Args:
+            prompt (str): The lowercased search query.
+            limit (int): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The best matching books, best first.
+        """
+        candidate_ids = self._search_candidates(prompt)
+        return [self.books[book_id] for book_id in self.books.ranked_ids(prompt, limit, candidate_ids)]
+
+    def available_books(self) -> list[Book]:
+        """
+        Returns the books that are available ("в наличии"), scanning the status column.
+
+        Returns:
+            list[Book]: The available books in insertion order.
+        """
+        return [self.books[book_id] for book_id in self.books.ids_with_status(True)]
+
+    def checked_out_books(self) -> list[Book]:
+        """
+        Returns the books that are checked out ("выдана"), scanning the status column.
+
+        Returns:
+            list[Book]: The checked out books in insertion order.
+        """
+        return [self.books[book_id] for book_id in self.books.ids_with_status(False)]
+
+    def count_by_status(self, status: bool) -> int:
+        """
+        Counts the books that are available or checked out over the status column.
+
+        Args:
+            status (bool): True to count available books, False to count checked out ones.
+
+        Returns:
+            int: The number of books with the given status.
+        """
+        return self.books.count_status(status)
+
+    def books_published_between(self, start: int, end: int) -> list[Book]:
+        """
+        Returns the books published in the given range of years, scanning the year column.
+
+        Args:
+            start (int): The first year of the range.
+            end (int): The last year of the range, inclusive.
+
+        Returns:
+            list[Book]: The matching books ordered by year, books of the same year in insertion order.
+        """
+        return [self.books[book_id] for book_id in self.books.ids_published_between(start, end)]
@@ -0,0 +1,176 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zlib
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+
+class Compression:
+    """
+    Transparent gzip, bz2 and xz (lzma) compression of database files.
+    Compressed files are recognized by their magic bytes when read and by their extension when written,
+    and are always decompressed and compressed as streams, so they are never held in memory as a whole.
+    """
+
+    # Format -> (magic bytes, file extension)
+    FORMATS = {
+        'gzip': (b'\x1f\x8b', '.gz'),
+        'bz2': (b'BZh', '.bz2'),
+        'lzma': (b'\xfd7zXZ\x00', '.xz'),
+    }
+    # Format -> (lowest, highest, default) compression level. The default of gzip is lower than the one of
+    # the gzip module, level 9 takes several times longer for a file only a few percent smaller
+    LEVELS = {'gzip': (0, 9, 6), 'bz2': (1, 9, 9), 'lzma': (0, 9, 6)}
+    # Errors raised on corrupted compressed data, on top of OSError
+    ERRORS = (EOFError, lzma.LZMAError, zlib.error)
+
+    @classmethod
+    def detect(cls, path: str) -> Optional[str]:
+        """
+        Detects the compression of a file from its magic bytes.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            str or None: "gzip", "bz2" or "lzma", or None if the file is not compressed.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(max(len(magic) for magic, _ in cls.FORMATS.values()))
+        for compression, (magic, _) in cls.FORMATS.items():
+            if header.startswith(magic):
+                return compression
+        return None
+
+    @classmethod
+    def from_extension(cls, path: str) -> Optional[str]:
+        """
+        Returns the compression a file gets from the extension of its name.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            str or None: "gzip" for .gz, "bz2" for .bz2, "lzma" for .xz, or None for any other extension.
+        """
+        extension = os.path.splitext(str(path))[1].lower()
+        for compression, (_, compression_extension) in cls.FORMATS.items():
+            if extension == compression_extension:
+                return compression
+        return None
+
+    @classmethod
+    def strip_extension(cls, path: str) -> str:
+        """
+        Returns the path without the extension of its compression, e.g. "library.json" for "library.json.gz".
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            str: The path of the file once decompressed.
+        """
+        path = str(path)
+        if cls.from_extension(path) is None:
+            return path
+        return os.path.splitext(path)[0]
+
+    @classmethod
+    def check_level(cls, compression: str, level: Optional[int]) -> int:
+        """
+        Validates a compression level.
+
+        Args:
+            compression (str): "gzip", "bz2" or "lzma".
+            level (Optional[int]): The level, None for the default of the format.
+
+        Returns:
+            int: The level to compress with.
+
+        Raises:
+            ValueError: If the level is out of the range of the format.
+        """
+        lowest, highest, default = cls.LEVELS[compression]
+        if level is None:
+            return default
+        if not lowest <= level <= highest:
+            raise ValueError(f"Compression level of {compression} must be between {lowest} and {highest}, got {level}")
+        return level
+
+    @classmethod
+    def open(cls, path: str, text: bool = False, newline: Optional[str] = None):
+        """
+        Opens a file for reading, decompressing it on the fly if it is compressed.
+
+        Args:
+            path (str): Path to the file.
+            text (bool, optional): Open the file as UTF-8 text instead of bytes. Defaults to False.
+            newline (Optional[str], optional): The newline mode of a text file, see open().
+
+        Returns:
+            The open file object.
+        """
+        mode, encoding = ('rt', 'utf-8') if text else ('rb', None)
+        opener = {None: open, 'gzip': gzip.open, 'bz2': bz2.open, 'lzma': lzma.open}[cls.detect(path)]
+        return opener(path, mode, encoding=encoding, newline=newline if text else None)
+
+    @classmethod
+    def read_header(cls, path: str, size: int) -> bytes:
+        """
+        Reads the first bytes of the content of a file, decompressed if the file is compressed.
+
+        Args:
+            path (str): Path to the file.
+            size (int): The number of bytes to read.
+
+        Returns:
+            bytes: Up to size first bytes, nothing if the compressed data is corrupted.
+        """
+        with cls.open(path) as f:
+            try:
+                return f.read(size)
+            except (OSError, *cls.ERRORS):
+                return b''
+
+    @classmethod
+    @contextmanager
+    def writing(cls, f: BinaryIO, compression: Optional[str] = None, level: Optional[int] = None,
+                text: bool = False) -> Iterator:
+        """
+        Writes into an open binary file through a compressor. Leaving the block writes the end of the
+        compressed stream but leaves the file itself open, so it can still be flushed to disk.
+
+        Args:
+            f (BinaryIO): The file to write into.
+            compression (Optional[str], optional): "gzip", "bz2" or "lzma", None to write uncompressed.
+            level (Optional[int], optional): The compression level, None for the default of the format.
+            text (bool, optional): Yield a UTF-8 text stream instead of a binary one. Defaults to False.
+
+        Yields:
+            The stream to write to.
+
+        Raises:
+            ValueError: If the compression level is out of the range of the format.
+        """
+        if compression is None:
+            compressed = f
+        else:
+            level = cls.check_level(compression, level)
+            match compression:
+                case 'gzip':
+                    # No file name and time in the header, so the same library always compresses the same
+                    compressed = gzip.GzipFile(filename='', mode='wb', compresslevel=level, fileobj=f, mtime=0)
+                case 'bz2':
+                    compressed = bz2.BZ2File(f, 'wb', compresslevel=level)
+                case _:
+                    compressed = lzma.LZMAFile(f, 'wb', preset=level)
+        stream = io.TextIOWrapper(compressed, encoding='utf-8') if text else compressed
+        yield stream
+        if text:
+            # Flushes the text without closing the stream under it
+            stream.detach()
+        if compressed is not f:
+            compressed.close()
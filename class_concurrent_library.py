@@ -0,0 +1,249 @@
+import copy
+import functools
+import threading
+from typing import Callable, Iterable, Optional
+from class_book import Book
+from class_library import Library
+from class_read_write_lock import ReadWriteLock
+
+
+def _reading(method: Callable) -> Callable:
+    """
+    Wraps a Library method to run under the read lock of the library.
+    """
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _writing(method: Callable) -> Callable:
+    """
+    Wraps a Library method to run under the write lock of the library.
+    """
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock.write():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+class ConcurrentLibrary(Library):
+    """
+    A library that can be shared between threads.
+    Lookups, searches and listings run under a read lock, so any number of threads read in parallel,
+    while changes run one at a time under the write lock. Saving only holds the read lock while the
+    snapshot of the books is taken, the file is written without blocking anyone.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty library and its locks.
+        """
+        super().__init__()
+        self._lock = ReadWriteLock()
+        # Builds the lazily created search indexes once when several readers need them at the same time
+        self._build_lock = threading.Lock()
+        # Saves run one at a time, so an older snapshot never replaces a newer one.
+        # It is always acquired before the read/write lock
+        self._save_lock = threading.RLock()
+        # Incremented on every change, tells whether a snapshot is still current once it is written
+        self._version = 0
+
+    get_book_by_id = _reading(Library.get_book_by_id)
+    search_book = _reading(Library.search_book)
+    search_ranked = _reading(Library.search_ranked)
+    available_books = _reading(Library.available_books)
+    checked_out_books = _reading(Library.checked_out_books)
+    count_by_status = _reading(Library.count_by_status)
+    books_published_between = _reading(Library.books_published_between)
+    changes_since = _reading(Library.changes_since)
+    replication_snapshot = _reading(Library.replication_snapshot)
+    # Writers wait until the export is written, readers don't
+    export_records = _reading(Library.export_records)
+
+    add_book = _writing(Library.add_book)
+    add_books = _writing(Library.add_books)
+    remove_book = _writing(Library.remove_book)
+    remove_books = _writing(Library.remove_books)
+    change_book_status = _writing(Library.change_book_status)
+    change_books_status = _writing(Library.change_books_status)
+    apply_journal_record = _writing(Library.apply_journal_record)
+    enable_search_cache = _writing(Library.enable_search_cache)
+    disable_search_cache = _writing(Library.disable_search_cache)
+    enable_change_feed = _writing(Library.enable_change_feed)
+
+    def _mark_dirty(self, book_id: str):
+        """
+        Records a change of a book and moves to the next version of the library.
+        """
+        self._version += 1
+        super()._mark_dirty(book_id)
+
+    def _mark_books_dirty(self, book_ids: Iterable[str]):
+        """
+        Records a change of many books and moves to the next version of the library.
+        """
+        self._version += 1
+        super()._mark_books_dirty(book_ids)
+
+    def replace_contents(self, library: Library):
+        """
+        Replaces the books of the library with those of another library, e.g. one just loaded from a file.
+        Threads sharing this library keep using it: the changes in flight finish on the old books under
+        the write lock, and every following call sees the new ones. The search cache is emptied and
+        the change feed, if any, starts over, so replicas reload the whole library.
+
+        Args:
+            library (Library): The library to take the books and indexes of, it isn't used afterwards.
+        """
+        with self._save_lock, self._lock.write():
+            self.books = library.books
+            self._search_index = library._search_index
+            self._fuzzy_index = library._fuzzy_index
+            self._status_index = library._status_index
+            self._year_index = library._year_index
+            self._dirty_ids = library._dirty_ids
+            self._saved_as = library._saved_as
+            self._version += 1
+            if self.search_cache is not None:
+                self.search_cache.clear()
+            if self.change_feed is not None:
+                # The wrapped method would wait for the write lock held here
+                Library.enable_change_feed(self, self.change_feed.capacity)
+
+    def _page(self, sort_by: Optional[str], offset: int, limit: Optional[int]) -> list[Book]:
+        """
+        Selects the books of a page of the listing under the read lock, see Library.iter_lines.
+        The page is collected before it is formatted, so streaming it doesn't hold the lock.
+        """
+        with self._lock.read():
+            return list(super()._page(sort_by, offset, limit))
+
+    def _search_candidates(self, prompt: str) -> Optional[list[str]]:
+        """
+        Returns the IDs of the books that may match the prompt, see Library._search_candidates.
+        The trigram index is built by a single thread.
+        """
+        if self._search_index is None:
+            with self._build_lock:
+                if self._search_index is None:
+                    return super()._search_candidates(prompt)
+        return super()._search_candidates(prompt)
+
+    def search_fuzzy(self, prompt: str, limit: int = 10) -> list[Book]:
+        """
+        Searches for books tolerating typos under the read lock, see Library.search_fuzzy.
+        The word index is built by a single thread.
+        """
+        with self._lock.read():
+            if self._fuzzy_index is None:
+                with self._build_lock:
+                    return super().search_fuzzy(prompt, limit)
+            return super().search_fuzzy(prompt, limit)
+
+    def compact(self) -> bool:
+        """
+        Folds the journal into a fresh snapshot, see Library.compact.
+        Changes wait until the journal is truncated, so none of them is lost between the snapshot and the truncation.
+        """
+        with self._save_lock, self._lock.write():
+            return super().compact()
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Whether the library was changed since it was last saved or loaded.
+        """
+        with self._lock.read():
+            return bool(self._dirty_ids)
+
+    @property
+    def changed_book_ids(self) -> frozenset[str]:
+        """
+        IDs of the books added, removed or changed since the library was last saved or loaded.
+        """
+        with self._lock.read():
+            return frozenset(self._dirty_ids)
+
+    def _save(self, path_to_database: str, file_format: str, snapshot: Callable[[], object],
+              write: Callable[[object], bool], options: Optional[tuple] = None) -> bool:
+        """
+        Takes a snapshot of the books under the read lock and writes it without holding the lock.
+        The file is only recorded as current if the library didn't change in the meantime.
+
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+            file_format (str): The format of the file, "json", "binary" or "sqlite".
+            snapshot (Callable[[], object]): Copies the books, called under the read lock.
+            write (Callable[[object], bool]): Writes the copy, returns whether the file was written.
+            options (Optional[tuple], optional): The write options, see Library._mark_saved.
+
+        Returns:
+            bool: True if the library was saved, False otherwise.
+        """
+        with self._save_lock:
+            with self._lock.read():
+                if self._is_saved_as(path_to_database, file_format, options):
+                    return True
+                books = snapshot()
+                version = self._version
+            if not write(books):
+                return False
+            with self._lock.write():
+                if self._version == version:
+                    self._mark_saved(path_to_database, file_format, options)
+            return True
+
+    def dump_to_json(self, path_to_database: str, compact: bool = False,
+                     compression_level: Optional[int] = None) -> bool:
+        """
+        Saves a consistent snapshot of the library to a JSON file, see Library.dump_to_json.
+        Readers are never blocked, and writers only while the book dictionaries are collected.
+
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+            compact (bool, optional): Write the JSON without indentation. Defaults to False.
+            compression_level (Optional[int], optional): The level of a compressed file.
+
+        Returns:
+            bool: True if the library was saved, False otherwise.
+        """
+        return self._save(path_to_database, 'json',
+                          lambda: [book.to_dict() for book in self.books.values()],
+                          lambda book_data: self._write_json(path_to_database, book_data, compact, compression_level),
+                          (compact, compression_level))
+
+    def dump_to_binary(self, path_to_database: str, compression_level: Optional[int] = None) -> bool:
+        """
+        Saves a consistent snapshot of the library to a binary snapshot, see Library.dump_to_binary.
+        Readers are never blocked, and writers only while the books are copied.
+
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+            compression_level (Optional[int], optional): The level of a compressed file.
+
+        Returns:
+            bool: True if the library was saved, False otherwise.
+        """
+        # Books are copied, since a status change modifies the Book object in place
+        return self._save(path_to_database, 'binary',
+                          lambda: [copy.copy(book) for book in self.books.values()],
+                          lambda books: self._write_binary(path_to_database, books, compression_level),
+                          (compression_level,))
+
+    def dump_to_sqlite(self, path_to_database: str) -> bool:
+        """
+        Saves a consistent snapshot of the library to an SQLite database, see Library.dump_to_sqlite.
+        Readers are never blocked, and writers only while the books are copied.
+
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+
+        Returns:
+            bool: True if the library was saved, False otherwise.
+        """
+        return self._save(path_to_database, 'sqlite',
+                          lambda: [copy.copy(book) for book in self.books.values()],
+                          lambda books: self._write_sqlite(path_to_database, books))
@@ -0,0 +1,263 @@
+import heapq
+import re
+from collections import defaultdict
+from typing import Iterable
+
+
+class FuzzyIndex:
+    """
+    A typo-tolerant index over the words of book titles and authors.
+    Maps every distinct word to the IDs of the books containing it and every trigram of a word
+    to the words containing it, so a fuzzy query only computes edit distances against the words
+    sharing enough trigrams with it instead of against every book.
+    """
+
+    GRAM_SIZE = 3
+    _word_pattern = re.compile(r'\w+')
+
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        # Word -> set of IDs of the books whose title or author contains it
+        self._books = {}
+        # Trigram -> set of indexed words containing it
+        self._words = defaultdict(set)
+        # Book ID -> insertion ordinal, used to rank equally scored books in insertion order
+        self._order = {}
+        self._counter = 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of indexed books.
+        """
+        return len(self._order)
+
+    @classmethod
+    def words(cls, text: str) -> set[str]:
+        """
+        Splits a text into its distinct lowercased words.
+
+        Args:
+            text (str): The text to split.
+
+        Returns:
+            set[str]: The words of the text.
+        """
+        return set(cls._word_pattern.findall(str(text).lower()))
+
+    @classmethod
+    def _grams(cls, word: str) -> set[str]:
+        """
+        Splits a word padded with spaces into its trigrams, so that even short words have some.
+
+        Args:
+            word (str): The lowercased word.
+
+        Returns:
+            set[str]: The trigrams of the padded word.
+        """
+        padded = f" {word} "
+        size = cls.GRAM_SIZE
+        return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+    @staticmethod
+    def max_distance(word: str) -> int:
+        """
+        Returns the number of typos tolerated in a query word, which grows with its length.
+
+        Args:
+            word (str): The query word.
+
+        Returns:
+            int: 0 for words up to 2 characters, 1 up to 5 characters and 2 for longer words.
+        """
+        if len(word) <= 2:
+            return 0
+        if len(word) <= 5:
+            return 1
+        return 2
+
+    @staticmethod
+    def edit_distance(first: str, second: str, max_distance: int) -> int:
+        """
+        Computes the edit distance between two strings, giving up once it exceeds a bound.
+        Insertions, deletions, substitutions and transpositions of adjacent characters cost one edit each.
+
+        Args:
+            first (str): The first string.
+            second (str): The second string.
+            max_distance (int): The largest distance of interest.
+
+        Returns:
+            int: The distance, or max_distance + 1 if it is larger than max_distance.
+        """
+        if abs(len(first) - len(second)) > max_distance:
+            return max_distance + 1
+        before_previous = None
+        previous = list(range(len(second) + 1))
+        for i, first_char in enumerate(first, start=1):
+            current = [i]
+            for j, second_char in enumerate(second, start=1):
+                distance = min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (first_char != second_char))
+                if (before_previous is not None and j > 1 and first_char == second[j - 2]
+                        and first[i - 2] == second_char):
+                    distance = min(distance, before_previous[j - 2] + 1)
+                current.append(distance)
+            # A transposition reaches back two rows, so both have to be out of bounds
+            if min(current) > max_distance and min(previous) >= max_distance:
+                return max_distance + 1
+            before_previous, previous = previous, current
+        return min(previous[-1], max_distance + 1)
+
+    def _book_words(self, book) -> set[str]:
+        """
+        Returns the words a book is indexed under.
+        They are recomputed on removal instead of being stored, which would cost a set per book.
+        """
+        return self.words(book.title) | self.words(book.author)
+
+    def add(self, book):
+        """
+        Indexes a book under the words of its title and author.
+        The book's title and author must not change while it is indexed.
+
+        Args:
+            book (Book): The book to index.
+        """
+        book_id = book.id
+        for word in self._book_words(book):
+            book_ids = self._books.get(word)
+            if book_ids is None:
+                book_ids = self._books[word] = set()
+                for gram in self._grams(word):
+                    self._words[gram].add(word)
+            book_ids.add(book_id)
+        self._order[book_id] = self._counter
+        self._counter += 1
+
+    def add_words(self, words: Iterable[str]):
+        """
+        Indexes words without any book, so similar_words finds them while search doesn't.
+        Used as a vocabulary of books kept elsewhere.
+
+        Args:
+            words (Iterable[str]): The lowercased words.
+        """
+        for word in words:
+            if word not in self._books:
+                self._books[word] = set()
+                for gram in self._grams(word):
+                    self._words[gram].add(word)
+
+    def remove(self, book):
+        """
+        Removes a book from the index. Books that are not indexed are ignored.
+
+        Args:
+            book (Book): The book to remove, with the same title and author it was indexed with.
+        """
+        book_id = book.id
+        if self._order.pop(book_id, None) is None:
+            return
+        for word in self._book_words(book):
+            book_ids = self._books.get(word)
+            if book_ids is None:
+                continue
+            book_ids.discard(book_id)
+            if not book_ids:
+                # Forget the words no book uses any more
+                del self._books[word]
+                for gram in self._grams(word):
+                    words = self._words[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._words[gram]
+
+    def clear(self):
+        """
+        Removes every book from the index.
+        """
+        self._books.clear()
+        self._words.clear()
+        self._order.clear()
+        self._counter = 0
+
+    def similar_words(self, word: str) -> dict[str, int]:
+        """
+        Finds the indexed words within the tolerated number of typos of a query word.
+        A typo changes at most GRAM_SIZE + 1 trigrams, so only the words sharing enough trigrams
+        with the query word are compared with it.
+
+        Args:
+            word (str): The lowercased query word.
+
+        Returns:
+            dict[str, int]: The similar words and their edit distances to the query word.
+        """
+        max_distance = self.max_distance(word)
+        grams = self._grams(word)
+        required = max(1, len(grams) - (self.GRAM_SIZE + 1) * max_distance)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self._words.get(gram, ()):
+                shared[candidate] += 1
+
+        similar = {}
+        for candidate, count in shared.items():
+            if count < required:
+                continue
+            distance = self.edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                similar[candidate] = distance
+        return similar
+
+    def search(self, prompt: str, limit: int = 10) -> list[str]:
+        """
+        Finds the books whose title or author contains every word of the prompt, allowing typos.
+        A book scores the sum over the prompt words of the similarity of its closest word,
+        so books with fewer typos rank first.
+
+        Args:
+            prompt (str): The search query.
+            limit (int, optional): The maximum number of IDs to return.
+
+        Returns:
+            list[str]: IDs of the best matching books, best first, equally scored books in insertion order.
+        """
+        query_words = self.words(prompt)
+        if not query_words or limit <= 0:
+            return []
+
+        # (similarity, IDs of the books) of every indexed word close to each prompt word
+        matches = []
+        for word in query_words:
+            word_matches = [(1 - distance / (len(word) + 1), self._books[candidate])
+                            for candidate, distance in self.similar_words(word).items()]
+            if not word_matches:
+                return []
+            matches.append(word_matches)
+        # Starting from the rarest prompt word keeps the intermediate scores small
+        matches.sort(key=lambda word_matches: sum(len(book_ids) for _, book_ids in word_matches))
+
+        scores = {}
+        for similarity, book_ids in matches[0]:
+            for book_id in book_ids:
+                if similarity > scores.get(book_id, 0):
+                    scores[book_id] = similarity
+        for word_matches in matches[1:]:
+            # Every word of the prompt has to match, so only the books matching so far are checked
+            next_scores = {}
+            for book_id, score in scores.items():
+                similarity = max((similarity for similarity, book_ids in word_matches if book_id in book_ids),
+                                 default=0)
+                if similarity:
+                    next_scores[book_id] = score + similarity
+            scores = next_scores
+            if not scores:
+                return []
+
+        order = self._order
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -order[item[0]]))
+        return [book_id for book_id, _ in best]
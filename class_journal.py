@@ -0,0 +1,139 @@
+import json
+import os
+from typing import Iterator
+
+
+class Journal:
+    """
+    An append-only write-ahead log of library mutations.
+    Every add, remove and status change is stored as one compact JSON record per line,
+    so persisting a single change costs O(1) disk I/O instead of rewriting the whole database.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        """
+        Initializes the journal. The file is created lazily on the first append.
+
+        Args:
+            path (str): Path to the journal file.
+            fsync (bool, optional): Whether to fsync the file after every record. Defaults to False,
+                                    in which case records are only flushed to the OS.
+        """
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+
+    def _write(self, lines: list[str]):
+        """
+        Appends already serialized records to the journal file.
+
+        Args:
+            lines (list[str]): Serialized records without trailing newlines.
+
+        Raises:
+            OSError: If the records couldn't be written, the change they describe must not be applied.
+        """
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(''.join(line + '\n' for line in lines))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            print(f"OS error occurred while writing journal {self.path}: {e}")
+            # The file is reopened by the next append
+            try:
+                self.close()
+            except OSError:
+                self._file = None
+            raise
+
+    @staticmethod
+    def _serialize(record: dict) -> str:
+        """
+        Serializes a record into a single compact JSON line.
+        """
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+    def append(self, record: dict):
+        """
+        Appends a single record to the journal.
+
+        Args:
+            record (dict): The record to append, see record_add, record_remove and record_status.
+
+        Raises:
+            OSError: If the record couldn't be written.
+        """
+        self._write([self._serialize(record)])
+
+    def append_many(self, records: list[dict]):
+        """
+        Appends a batch of records to the journal with a single write.
+
+        Args:
+            records (list[dict]): The records to append.
+
+        Raises:
+            OSError: If the records couldn't be written.
+        """
+        self._write([self._serialize(record) for record in records])
+
+    @staticmethod
+    def record_add(book) -> dict:
+        """
+        Returns a record describing a book being added.
+        """
+        return {'op': 'add', 'book': book.to_dict()}
+
+    @staticmethod
+    def record_remove(book_id: str) -> dict:
+        """
+        Returns a record describing a book being removed.
+        """
+        return {'op': 'remove', 'id': book_id}
+
+    @staticmethod
+    def record_status(book_id: str, status: bool) -> dict:
+        """
+        Returns a record describing a change of a book's status.
+        """
+        return {'op': 'status', 'id': book_id, 'status': status}
+
+    def replay(self) -> Iterator[dict]:
+        """
+        Reads the records stored in the journal in the order they were written.
+        A record that can't be parsed (e.g. the last one torn by a crash) is reported and skipped.
+
+        Yields:
+            dict: The journal records.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping corrupted journal record {self.path}:{line_number}: {e}")
+
+    def truncate(self):
+        """
+        Discards every record in the journal, used once its records are folded into a snapshot.
+        """
+        self.close()
+        try:
+            open(self.path, 'w').close()
+        except OSError as e:
+            print(f"OS error occurred while truncating journal {self.path}: {e}")
+
+    def close(self):
+        """
+        Closes the journal file if it is open.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,134 @@
+import json
+from typing import Iterator, TextIO
+
+
+class NotAnArrayError(ValueError):
+    """
+    Raised when the top level of a JSON document is not an array.
+    """
+
+
+class JsonArrayReader:
+    """
+    An incremental parser of a JSON document whose top level is an array.
+    Reads the stream in chunks and yields the array elements one at a time,
+    so only a single element has to be held in memory at once.
+    """
+
+    CHUNK_SIZE = 1 << 16
+    # A decode error this close to the end of the buffer may come from an element cut by the chunk boundary:
+    # the longest tokens are literals like -Infinity and escaped surrogate pairs like \ud83d\ude00
+    TRUNCATION_MARGIN = 16
+
+    def __init__(self, stream: TextIO, chunk_size: int = CHUNK_SIZE):
+        """
+        Initializes the reader.
+
+        Args:
+            stream (TextIO): A text stream positioned at the start of the JSON document.
+            chunk_size (int, optional): The number of characters read from the stream at once.
+        """
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """
+        Reads the next chunk of the stream into the buffer, dropping the already parsed part.
+
+        Returns:
+            bool: False if the stream is exhausted.
+        """
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _skip_whitespace(self) -> str:
+        """
+        Advances past whitespace, reading more of the stream if needed.
+
+        Returns:
+            str: The next significant character, or an empty string at the end of the stream.
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\n\r':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        """
+        Builds a decode error pointing at the current position.
+        """
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _is_truncated(self, error: json.JSONDecodeError) -> bool:
+        """
+        Tells whether a decode error may come from an element that continues in the next chunk,
+        rather than from invalid JSON inside the buffer.
+        """
+        # An unterminated string runs to the end of the buffer, whatever the position of its opening quote
+        return error.pos >= len(self._buffer) - self.TRUNCATION_MARGIN or error.msg == "Unterminated string starting at"
+
+    def _decode_element(self):
+        """
+        Decodes the array element starting at the current position, reading more of the stream
+        until the element is complete. Invalid JSON inside the buffer is reported at once,
+        without reading the rest of the stream.
+        """
+        while True:
+            try:
+                element, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if self._is_truncated(e) and self._fill():
+                    continue
+                raise
+            # A number may continue in the next chunk, only trust the element once its delimiter is read
+            if (end == len(self._buffer) or self._buffer[end] not in ' \t\n\r,]') and self._fill():
+                continue
+            self._pos = end
+            return element
+
+    def __iter__(self) -> Iterator:
+        """
+        Yields the elements of the top-level array.
+
+        Raises:
+            NotAnArrayError: If the top level of the document is not an array.
+            json.JSONDecodeError: If the document is not valid JSON.
+        """
+        first = self._skip_whitespace()
+        if first == '':
+            raise self._error("Expecting value")
+        if first != '[':
+            raise NotAnArrayError("Expected a JSON array")
+        self._pos += 1
+
+        if self._skip_whitespace() == ']':
+            self._pos += 1
+        else:
+            while True:
+                if self._skip_whitespace() == '':
+                    raise self._error("Expecting value")
+                yield self._decode_element()
+                separator = self._skip_whitespace()
+                self._pos += 1
+                if separator == ']':
+                    break
+                if separator != ',':
+                    self._pos -= 1
+                    raise self._error("Expecting ',' delimiter")
+
+        if self._skip_whitespace() != '':
+            raise self._error("Extra data")
@@ -1,7 +1,29 @@
 import json
 from class_book import Book
+from class_search_index import SearchIndex
+from class_fuzzy_index import FuzzyIndex
+from class_secondary_index import StatusIndex, YearIndex
+from class_journal import Journal
+from class_change_feed import ChangeFeed
+from class_json_stream import JsonArrayReader, NotAnArrayError
+from class_binary_snapshot import BinarySnapshot, SnapshotFormatError
+from class_bulk_result import BulkResult
+from class_search_cache import SearchCache
+from class_record_stream import RecordStream
+from class_parallel_loader import ParallelJsonLoader
+from class_compression import Compression
+import heapq
 import os
-from typing import Optional
+import tempfile
+from collections.abc import Sized
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+# Permissions of a new file as open() would create it under the umask of the process.
+# Reading the umask means setting it, so it is read once at import, before any thread could create a file
+_umask = os.umask(0o022)
+os.umask(_umask)
+NEW_FILE_MODE = 0o666 & ~_umask
 
 
 class Library:
@@ -11,11 +33,36 @@ class Library:
     loads/reads the library's state to/from JSON files.
     """
 
+    # Accepted status names and the status values they stand for
+    STATUSES = {"в наличии": True, "выдана": False}
+
     def __init__(self):
         """
         Initializes the Library instance with an empty collection of books.
         """
         self.books = {}
+        # Trigram index used by search_book to avoid scanning every book.
+        # Built on the first search, so loading a library doesn't pay for it
+        self._search_index = None
+        # Word index used by search_fuzzy, also built on the first search
+        self._fuzzy_index = None
+        # Optional cache of search results, see enable_search_cache
+        self.search_cache = None
+        # Indexes backing the status and year queries
+        self._status_index = StatusIndex()
+        self._year_index = YearIndex()
+        # Write-ahead journal of mutations, only used in journaled persistence mode
+        self.journal = None
+        self._snapshot_path = None
+        # Sequenced log of mutations followed by replicas, see enable_change_feed
+        self.change_feed = None
+        # IDs of the books added, removed or changed since the last save or load, and the files known
+        # to hold the current state of the library: absolute path -> (format, write options, fingerprint)
+        self._dirty_ids = set()
+        self._saved_as = {}
+
+    # Number of lines render joins into a single write
+    RENDER_CHUNK_SIZE = 1000
 
     def __str__(self) -> str:
         """
@@ -23,15 +70,143 @@ class Library:
         """
         if not self.books:
             return "Библиотека пуста"
-        return '\n'.join(str(book) for book in self.books.values())
+        return '\n'.join(self.iter_lines())
+
+    @staticmethod
+    def _year_sort_key(book: Book) -> tuple:
+        """
+        Orders books by numeric year, books without a numeric year go last, ordered by their year string.
+        """
+        year = book.year_as_int()
+        return year is None, year or 0, book.year
 
     @classmethod
-    def load_from_json(cls, filename: str):
+    def _sort_key(cls, sort_by: str) -> Callable[[Book], object]:
+        """
+        Returns the key function of a sort order.
+
+        Args:
+            sort_by (str): "title", "author" or "year".
+
+        Returns:
+            Callable[[Book], object]: The key function.
+
+        Raises:
+            ValueError: If the sort order is unknown.
         """
-        Loads a library from a JSON file.
+        match sort_by:
+            case "title":
+                return lambda book: str(book.title).casefold()
+            case "author":
+                return lambda book: str(book.author).casefold()
+            case "year":
+                return cls._year_sort_key
+            case _:
+                raise ValueError(f"Unknown sort order {sort_by!r}, expected title, author or year")
+
+    def iter_lines(self, sort_by: Optional[str] = None, offset: int = 0,
+                   limit: Optional[int] = None) -> Iterator[str]:
+        """
+        Formats the books of the library one at a time.
+        Only the books of the requested page are formatted. Without a sort order the books are taken in
+        insertion order and nothing past the page is visited; with a sort order and a limit only the first
+        offset + limit books are selected with a heap instead of sorting the whole library.
+
+        Args:
+            sort_by (Optional[str], optional): "title", "author" or "year", insertion order if not given.
+            offset (int, optional): The number of books to skip.
+            limit (Optional[int], optional): The maximum number of books to format, all the rest if not given.
+
+        Yields:
+            str: The string representation of every book of the page.
+
+        Raises:
+            ValueError: If the sort order is unknown.
+        """
+        for book in self._page(sort_by, offset, limit):
+            yield str(book)
+
+    def _page(self, sort_by: Optional[str], offset: int, limit: Optional[int]) -> Iterable[Book]:
+        """
+        Selects the books of a page of the listing, see iter_lines.
+
+        Returns:
+            Iterable[Book]: The books of the page, in the order they are listed.
+        """
+        end = None if limit is None else offset + limit
+        books = self.books.values()
+        if sort_by is not None:
+            key = self._sort_key(sort_by)
+            books = sorted(books, key=key) if end is None else heapq.nsmallest(end, books, key=key)
+        return islice(books, offset, end)
+
+    def books_page(self, sort_by: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> list[Book]:
+        """
+        Returns a page of the listing as books, selected like in iter_lines.
+
+        Args:
+            sort_by (Optional[str], optional): "title", "author" or "year", insertion order if not given.
+            offset (int, optional): The number of books to skip.
+            limit (Optional[int], optional): The maximum number of books to return, all the rest if not given.
+
+        Returns:
+            list[Book]: The books of the page.
+
+        Raises:
+            ValueError: If the sort order is unknown.
+        """
+        return list(self._page(sort_by, offset, limit))
+
+    def render(self, stream: TextIO, sort_by: Optional[str] = None, offset: int = 0,
+               limit: Optional[int] = None) -> int:
+        """
+        Writes the books of the library to a stream, one line per book, in chunks of RENDER_CHUNK_SIZE lines,
+        so the whole listing is never held in memory.
+
+        Args:
+            stream (TextIO): A writable text stream.
+            sort_by (Optional[str], optional): "title", "author" or "year", insertion order if not given.
+            offset (int, optional): The number of books to skip.
+            limit (Optional[int], optional): The maximum number of books to write, all the rest if not given.
+
+        Returns:
+            int: The number of written books.
+
+        Raises:
+            ValueError: If the sort order is unknown.
+        """
+        written = 0
+        chunk = []
+        for line in self.iter_lines(sort_by, offset, limit):
+            chunk.append(line)
+            if len(chunk) >= self.RENDER_CHUNK_SIZE:
+                stream.write('\n'.join(chunk) + '\n')
+                written += len(chunk)
+                chunk.clear()
+        if chunk:
+            stream.write('\n'.join(chunk) + '\n')
+            written += len(chunk)
+        return written
+
+    @classmethod
+    def load_from_json(cls, filename: str, progress: Optional[Callable[[int], None]] = None,
+                       workers: Optional[int] = 1):
+        """
+        Loads a library from a JSON file, which may be compressed (see Compression).
+        The file is parsed incrementally, one book at a time, so the whole list of book
+        dictionaries is never held in memory next to the library.
+        With several workers, ranges of the file are parsed and validated in parallel processes
+        (see ParallelJsonLoader) and their books are added in file order, so the result is the same.
+        Small files, see ParallelJsonLoader.worker_count, are parsed in this process whatever the number
+        of workers, and so are compressed files, which can't be split into ranges.
 
         Args:
             filename (str): Path to the JSON file containing serialized book data.
+            progress (Optional[Callable[[int], None]], optional): Called with the number of processed
+                                                                  records after each record, or after
+                                                                  each range when loading in parallel.
+            workers (Optional[int], optional): Number of processes parsing the file, None for one per CPU.
+                                               Defaults to 1, parsing the file in this process.
 
         Returns:
             Library or None: A Library instance populated with books from the file,
@@ -45,23 +220,44 @@ class Library:
 
             # Create a new library instance
             existing_library = cls()
+            # Taken before reading, so a file changed while it is read isn't taken for the loaded state
+            fingerprint = cls._fingerprint(filename)
 
-            # Attempt to open and parse the file
-            with open(filename, 'r') as f:
-                book_data = json.load(f)
+            # Whether the library holds every record of the file as it is, so saving to it may be skipped.
+            # Skipped records and regenerated IDs only get to the file with the next save
+            lossless = True
 
-            # Validate that json.load returned a list
-            if not isinstance(book_data, list):
-                print(f"Invalid JSON format in {filename}. Expected a list of books.")
-                return None
+            if workers != 1 and Compression.detect(filename) is None:
+                workers = ParallelJsonLoader.worker_count(filename, workers)
+            else:
+                workers = 1
+            if workers > 1:
+                for books, errors, processed in ParallelJsonLoader(filename, workers):
+                    for book_error in errors:
+                        print(f"Error parsing book: {book_error}")
+                        lossless = False
+                    for book in books:
+                        lossless &= existing_library._add_loaded_book(book)
+                    if progress is not None:
+                        progress(processed)
+                if lossless:
+                    existing_library._mark_saved(filename, 'json', fingerprint=fingerprint)
+                return existing_library
 
-            # Add books, with additional error handling for individual book parsing
-            for book in book_data:
-                try:
-                    existing_library.add_book(Book.from_dict(book))
-                except Exception as book_error:
-                    print(f"Error parsing book: {book_error}")
+            # Attempt to open and parse the file
+            with Compression.open(filename, text=True) as f:
+                # Add books, with additional error handling for individual book parsing
+                for processed, book in enumerate(JsonArrayReader(f), start=1):
+                    try:
+                        lossless &= existing_library._add_loaded_book(Book.from_dict(book))
+                    except Exception as book_error:
+                        print(f"Error parsing book: {book_error}")
+                        lossless = False
+                    if progress is not None:
+                        progress(processed)
 
+            if lossless:
+                existing_library._mark_saved(filename, 'json', fingerprint=fingerprint)
             return existing_library
 
         except FileNotFoundError:
@@ -70,6 +266,10 @@ class Library:
         except json.JSONDecodeError as e:
             print(f"Invalid JSON in {filename}: {e}")
             return None
+        except NotAnArrayError:
+            # Validate that the file holds a list
+            print(f"Invalid JSON format in {filename}. Expected a list of books.")
+            return None
         except PermissionError:
             print(f"Permission denied when trying to read {filename}.")
             return None
@@ -77,26 +277,469 @@ class Library:
             print(f"Unexpected error loading library from {filename}: {e}")
             return None
 
-    def dump_to_json(self, path_to_database: str):
+    def _add_loaded_book(self, book: Book) -> bool:
+        """
+        Adds a book read from a file.
+
+        Args:
+            book (Book): The book to add.
+
+        Returns:
+            bool: True if the book kept its ID, False if the ID was taken and a new one was generated.
+        """
+        book_id = book.id
+        self.add_book(book)
+        return book.id == book_id
+
+    @classmethod
+    def load_from_binary(cls, filename: str):
+        """
+        Loads a library from a binary snapshot written by dump_to_binary, which may be compressed.
+
+        Args:
+            filename (str): Path to the binary snapshot.
+
+        Returns:
+            Library or None: A Library instance populated with books from the file,
+            or None if the file does not exist or is not a valid snapshot.
+        """
+        try:
+            if not os.path.exists(filename):
+                print(f"File {filename} does not exist.")
+                return None
+
+            existing_library = cls()
+            fingerprint = cls._fingerprint(filename)
+            with Compression.open(filename) as f:
+                data = f.read()
+            lossless = True
+            for book in BinarySnapshot.read(data):
+                lossless &= existing_library._add_loaded_book(book)
+            if lossless:
+                existing_library._mark_saved(filename, 'binary', fingerprint=fingerprint)
+            return existing_library
+
+        except SnapshotFormatError as e:
+            print(f"Invalid binary snapshot {filename}: {e}")
+            return None
+        except PermissionError:
+            print(f"Permission denied when trying to read {filename}.")
+            return None
+        except Exception as e:
+            print(f"Unexpected error loading library from {filename}: {e}")
+            return None
+
+    @classmethod
+    def load_from_sqlite(cls, filename: str):
+        """
+        Loads a library from an SQLite database written by dump_to_sqlite or kept by SqliteLibrary.
+        The books are read into this library, SqliteLibrary.load_from_sqlite opens the database in place instead.
+
+        Args:
+            filename (str): Path to the database.
+
+        Returns:
+            Library or None: A Library instance populated with books from the database,
+            or None if the database can't be read.
+        """
+        # Imported here, the SQLite library extends Library
+        from class_sqlite_library import SqliteLibrary
+        database = SqliteLibrary.load_from_sqlite(filename)
+        if database is None:
+            return None
+        # Taken once the database is open, opening it may switch its journal mode
+        fingerprint = cls._fingerprint(filename)
+        try:
+            existing_library = cls()
+            # The rows are read in chunks of IMPORT_CHUNK_SIZE books, each added in bulk
+            books = database.books.values()
+            while chunk := list(islice(books, cls.IMPORT_CHUNK_SIZE)):
+                existing_library.add_books(chunk)
+            existing_library._mark_saved(filename, 'sqlite', fingerprint=fingerprint)
+            return existing_library
+        except Exception as e:
+            print(f"Unexpected error loading library from {filename}: {e}")
+            return None
+        finally:
+            database.close()
+
+    @classmethod
+    def load(cls, filename: str, workers: Optional[int] = 1):
+        """
+        Loads a library from a JSON file, a binary snapshot or an SQLite database,
+        detecting the format from the file header. JSON files and binary snapshots may be compressed.
+
+        Args:
+            filename (str): Path to the database file.
+            workers (Optional[int], optional): Number of processes parsing a JSON file, see load_from_json.
+
+        Returns:
+            Library or None: A Library instance populated with books from the file,
+            or None if the file can't be loaded.
+        """
+        # Imported here, the SQLite library extends Library
+        from class_sqlite_library import SqliteBooks
+        try:
+            is_binary = BinarySnapshot.is_binary(filename)
+            is_database = SqliteBooks.is_database(filename)
+        except OSError:
+            # Let the JSON loader report the missing or unreadable file
+            is_binary = is_database = False
+        if is_binary:
+            return cls.load_from_binary(filename)
+        if is_database:
+            return cls.load_from_sqlite(filename)
+        return cls.load_from_json(filename, workers=workers)
+
+    @classmethod
+    def open_journaled(cls, snapshot_path: str, journal_path: Optional[str] = None):
+        """
+        Opens a library in journaled persistence mode. The last JSON snapshot is loaded (if it exists),
+        the journal is replayed on top of it and every following mutation is appended to the journal.
+
+        Args:
+            snapshot_path (str): Path to the JSON snapshot of the library.
+            journal_path (Optional[str], optional): Path to the journal file.
+                                                    Defaults to the snapshot path with a ".journal" suffix.
+
+        Returns:
+            Library or None: The restored library, or None if the snapshot exists but can't be loaded.
+        """
+        if journal_path is None:
+            journal_path = f"{snapshot_path}.journal"
+
+        if os.path.exists(snapshot_path):
+            library = cls.load_from_json(snapshot_path)
+            if library is None:
+                return None
+        else:
+            library = cls()
+
+        journal = Journal(journal_path)
+        for record in journal.replay():
+            try:
+                library.apply_journal_record(record)
+            except Exception as record_error:
+                print(f"Error applying journal record: {record_error}")
+
+        library.journal = journal
+        library._snapshot_path = snapshot_path
+        return library
+
+    def apply_journal_record(self, record: dict):
+        """
+        Applies a single journal record to the library. Replaying a record is idempotent,
+        so records already folded into the snapshot may be safely applied again.
+
+        Args:
+            record (dict): The record to apply, as produced by Journal.record_* methods.
+        """
+        match record['op']:
+            case 'add':
+                book = Book.from_dict(record['book'])
+                # The record has the final ID of the book, replace it instead of generating a new one
+                self.remove_book(book.id)
+                self.add_book(book)
+            case 'remove':
+                self.remove_book(record['id'])
+            case 'status':
+                self.change_book_status(record['id'], "в наличии" if record['status'] else "выдана")
+            case op:
+                raise ValueError(f"Unknown journal operation {op!r}")
+
+    def compact(self) -> bool:
+        """
+        Folds the journal into a fresh snapshot: saves the library to the snapshot file
+        and truncates the journal once the snapshot is written.
+
+        Returns:
+            bool: True if the journal was compacted, False if the library is not journaled
+            or the snapshot couldn't be saved (the journal is kept intact in that case).
+        """
+        if self.journal is None:
+            print("Library is not opened in journaled mode.")
+            return False
+        if not self.dump_to_json(self._snapshot_path):
+            return False
+        self.journal.truncate()
+        return True
+
+    @property
+    def _is_logging(self) -> bool:
+        """
+        Whether mutations are recorded, in the journal or in the change feed.
+        """
+        return self.journal is not None or self.change_feed is not None
+
+    def _log_changes(self, records: list[dict], undo: Optional[Callable[[], object]] = None):
+        """
+        Hands the records of mutations to the journal and the change feed, if any.
+        The journal has to hold every change of the library, so mutations it couldn't record are taken back.
+
+        Args:
+            records (list[dict]): The records, as produced by Journal.record_* methods.
+            undo (Optional[Callable[[], object]], optional): Takes back mutations already applied,
+                called if the journal couldn't record them. Not needed for mutations logged before they are applied.
+
+        Raises:
+            OSError: If the journal couldn't record the mutations.
+        """
+        if self.journal is not None:
+            try:
+                self.journal.append_many(records)
+            except OSError:
+                if undo is not None:
+                    undo()
+                raise
+        if self.change_feed is not None:
+            self.change_feed.extend(records)
+
+    def enable_change_feed(self, capacity: int = ChangeFeed.DEFAULT_CAPACITY) -> ChangeFeed:
+        """
+        Starts recording every following mutation in a change feed, so replicas may follow the library
+        by applying only the changes (see changes_since) instead of reloading the whole library.
+        An existing feed is replaced, replicas following it start over from a snapshot.
+
+        Args:
+            capacity (int, optional): The number of latest changes the feed retains.
+
+        Returns:
+            ChangeFeed: The new feed.
+
+        Raises:
+            ValueError: If the capacity is not positive.
+        """
+        self.change_feed = ChangeFeed(capacity)
+        return self.change_feed
+
+    def changes_since(self, feed_id: str, sequence: int, limit: Optional[int] = None) -> Optional[dict]:
+        """
+        Returns the changes a replica hasn't applied yet.
+
+        Args:
+            feed_id (str): The ID of the feed the replica follows.
+            sequence (int): The sequence number of the last change the replica applied.
+            limit (Optional[int], optional): The maximum number of changes to return.
+
+        Returns:
+            dict or None: {"feed": ID, "sequence": the last sequence number of the feed,
+            "changes": [(sequence number, journal record), ...]}, or None if the replica has to start over
+            from a snapshot: it follows another feed or fell behind further than the feed retains.
+
+        Raises:
+            ValueError: If the library has no change feed.
+        """
+        if self.change_feed is None:
+            raise ValueError("The library has no change feed, see enable_change_feed")
+        if feed_id != self.change_feed.id:
+            return None
+        changes = self.change_feed.since(sequence, limit)
+        if changes is None:
+            return None
+        return {'feed': self.change_feed.id, 'sequence': self.change_feed.sequence, 'changes': changes}
+
+    def replication_snapshot(self) -> dict:
+        """
+        Returns the whole library with the position of the change feed it is current at,
+        the starting point of a replica.
+
+        Returns:
+            dict: {"feed": ID, "sequence": the last sequence number of the feed, "books": [book dicts]}.
+
+        Raises:
+            ValueError: If the library has no change feed.
+        """
+        if self.change_feed is None:
+            raise ValueError("The library has no change feed, see enable_change_feed")
+        return {'feed': self.change_feed.id, 'sequence': self.change_feed.sequence,
+                'books': [book.to_dict() for book in self.books.values()]}
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Whether the library was changed since it was last saved or loaded.
+        """
+        return bool(self._dirty_ids)
+
+    @property
+    def changed_book_ids(self) -> frozenset[str]:
+        """
+        IDs of the books added, removed or changed since the library was last saved or loaded.
+        """
+        return frozenset(self._dirty_ids)
+
+    def _mark_dirty(self, book_id: str):
+        """
+        Records a change of a book, making every saved file outdated.
+        """
+        self._dirty_ids.add(book_id)
+        self._saved_as.clear()
+
+    def _mark_books_dirty(self, book_ids: Iterable[str]):
+        """
+        Records a change of many books at once, see _mark_dirty.
+        """
+        self._dirty_ids.update(book_ids)
+        self._saved_as.clear()
+
+    # The write options of a file the library was loaded from, see _mark_saved
+    DEFAULT_SAVE_OPTIONS = {'json': (False, None), 'binary': (None,), 'sqlite': ()}
+
+    @staticmethod
+    def _fingerprint(path_to_database: str) -> Optional[tuple[int, int, int]]:
+        """
+        Returns what tells whether a file was changed: its modification time, size and inode.
+
+        Returns:
+            tuple[int, int, int] or None: The fingerprint, or None if the file can't be accessed.
+        """
+        try:
+            stat = os.stat(path_to_database)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _mark_saved(self, path_to_database: str, file_format: str, options: Optional[tuple] = None,
+                    fingerprint: Optional[tuple[int, int, int]] = None):
+        """
+        Records that a file holds the current state of the library.
+
+        Args:
+            path_to_database (str): Path to the file.
+            file_format (str): "json", "binary" or "sqlite".
+            options (Optional[tuple], optional): The options the file was written with, e.g. (compact, compression level)
+                                                 for JSON. Defaults to the default options of the format, used for
+                                                 a file the library was loaded from.
+            fingerprint (Optional[tuple[int, int, int]], optional): The fingerprint of the file when it was read,
+                                                                    defaults to its current fingerprint.
+        """
+        self._dirty_ids.clear()
+        if options is None:
+            options = self.DEFAULT_SAVE_OPTIONS[file_format]
+        if fingerprint is None:
+            fingerprint = self._fingerprint(path_to_database)
+        if fingerprint is not None:
+            self._saved_as[os.path.abspath(path_to_database)] = (file_format, options, fingerprint)
+
+    def _is_saved_as(self, path_to_database: str, file_format: str, options: Optional[tuple] = None) -> bool:
+        """
+        Checks whether a file still holds the current state of the library, so saving to it can be skipped:
+        it was written with the same format and options and wasn't changed or replaced since.
+
+        Args:
+            path_to_database (str): Path to the file.
+            file_format (str): "json", "binary" or "sqlite".
+            options (Optional[tuple], optional): The options of the save, defaults to the default options of the format.
+        """
+        saved = self._saved_as.get(os.path.abspath(path_to_database))
+        if options is None:
+            options = self.DEFAULT_SAVE_OPTIONS[file_format]
+        return saved is not None and saved == (file_format, options, self._fingerprint(path_to_database))
+
+    @staticmethod
+    def _file_mode(path_to_database: str) -> int:
+        """
+        Returns the permissions a file replacing another one should get. mkstemp creates files readable
+        by the owner only, the replacement keeps the permissions of the replaced file, and a new file gets
+        the permissions open() would create it with.
+        """
+        try:
+            return os.stat(path_to_database).st_mode & 0o777
+        except FileNotFoundError:
+            return NEW_FILE_MODE
+
+    @staticmethod
+    def _write_atomically(path_to_database: str, write: Callable, binary: bool = False,
+                          compression_level: Optional[int] = None):
+        """
+        Writes a file through a temporary file in the same directory that replaces the target
+        only once it is completely written, so a crash never leaves a half-written database.
+        A file with the extension of a compression (.gz, .bz2, .xz) is compressed as it is written.
+
+        Args:
+            path_to_database (str): Path to the file to write.
+            write (Callable): Called with the open temporary file to write the content.
+            binary (bool, optional): Whether the file is opened in binary mode. Defaults to False.
+            compression_level (Optional[int], optional): The compression level of a compressed file,
+                                                         None for the default of the format.
+
+        Raises:
+            ValueError: If the compression level is out of the range of the format.
+        """
+        compression = Compression.from_extension(path_to_database)
+        if compression is not None:
+            # Reported before anything is written
+            Compression.check_level(compression, compression_level)
+        absolute_path_to_database = os.path.abspath(path_to_database)
+        directory = os.path.dirname(absolute_path_to_database)
+        # Ensure the directory exists
+        os.makedirs(directory, exist_ok=True)
+
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(absolute_path_to_database)}.", suffix='.tmp')
+        try:
+            with open(descriptor, 'wb') as f:
+                with Compression.writing(f, compression, compression_level, text=not binary) as stream:
+                    write(stream)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, Library._file_mode(absolute_path_to_database))
+            os.replace(temp_path, absolute_path_to_database)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def dump_to_json(self, path_to_database: str, compact: bool = False,
+                     compression_level: Optional[int] = None) -> bool:
         """
         Saves the current state of the library to a JSON file.
+        Nothing is written if the file already holds the current state, and otherwise the file
+        is replaced atomically. A file named with the extension of a compression (e.g. library.json.gz)
+        is compressed while it is written.
 
         Args:
             path_to_database (str): Path to the file where the library data will be saved.
+            compact (bool, optional): Write the JSON without indentation, which is about half the size
+                                      and faster to write. Defaults to False.
+            compression_level (Optional[int], optional): The level of a compressed file, None for the default
+                                                         of the format (see Compression.LEVELS).
+
+        Returns:
+            bool: True if the library was saved, False otherwise.
         """
-        try:
-            # Prepare the book data
-            book_data = [book.to_dict() for book in self.books.values()]
+        options = (compact, compression_level)
+        if self._is_saved_as(path_to_database, 'json', options):
+            return True
+        # Prepare the book data
+        book_data = [book.to_dict() for book in self.books.values()]
+        if not self._write_json(path_to_database, book_data, compact, compression_level):
+            return False
+        self._mark_saved(path_to_database, 'json', options)
+        return True
 
-            # Get absolute path to the file
-            absolute_path_to_database = os.path.abspath(path_to_database)
+    def _write_json(self, path_to_database: str, book_data: list[dict], compact: bool,
+                    compression_level: Optional[int] = None) -> bool:
+        """
+        Writes book dictionaries to a JSON file atomically, reporting any error.
 
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(absolute_path_to_database), exist_ok=True)
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+            book_data (list[dict]): The dictionaries of the books.
+            compact (bool): Write the JSON without indentation.
+            compression_level (Optional[int], optional): The level of a compressed file.
 
+        Returns:
+            bool: True if the file was written, False otherwise.
+        """
+        try:
             # Write to file with error handling
-            with open(path_to_database, 'w') as f:
-                json.dump(book_data, f, indent=4)
+            if compact:
+                self._write_atomically(path_to_database, lambda f: json.dump(book_data, f, separators=(',', ':')),
+                                       compression_level=compression_level)
+            else:
+                self._write_atomically(path_to_database, lambda f: json.dump(book_data, f, indent=4),
+                                       compression_level=compression_level)
+            return True
 
         except PermissionError:
             print(f"Error: No permission to write to {path_to_database}")
@@ -104,13 +747,256 @@ class Library:
             print(f"OS error occurred while saving library: {e}")
         except TypeError as e:
             print(f"Error serializing library data: {e}")
+        except ValueError as e:
+            print(f"Error saving library to {path_to_database}: {e}")
+        except Exception as e:
+            print(f"Unexpected error saving library to {path_to_database}: {e}")
+        return False
+
+    def dump_to_binary(self, path_to_database: str, compression_level: Optional[int] = None) -> bool:
+        """
+        Saves the current state of the library to a binary snapshot, which loads much faster than JSON.
+        Like dump_to_json, skips unchanged files, replaces the file atomically and compresses it
+        if it has the extension of a compression.
+
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+            compression_level (Optional[int], optional): The level of a compressed file, None for the default
+                                                         of the format (see Compression.LEVELS).
+
+        Returns:
+            bool: True if the library was saved, False otherwise.
+        """
+        options = (compression_level,)
+        if self._is_saved_as(path_to_database, 'binary', options):
+            return True
+        if not self._write_binary(path_to_database, self.books.values(), compression_level):
+            return False
+        self._mark_saved(path_to_database, 'binary', options)
+        return True
+
+    def _write_binary(self, path_to_database: str, books: Iterable[Book],
+                      compression_level: Optional[int] = None) -> bool:
+        """
+        Writes books to a binary snapshot atomically, reporting any error.
+
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+            books (Iterable[Book]): The books to write.
+            compression_level (Optional[int], optional): The level of a compressed file.
+
+        Returns:
+            bool: True if the file was written, False otherwise.
+        """
+        if Compression.from_extension(path_to_database) is not None and not isinstance(books, Sized):
+            # A compressed stream can't seek back to patch the number of books
+            books = list(books)
+        try:
+            self._write_atomically(path_to_database, lambda f: BinarySnapshot.write(f, books), binary=True,
+                                   compression_level=compression_level)
+            return True
+
+        except PermissionError:
+            print(f"Error: No permission to write to {path_to_database}")
+        except OSError as e:
+            print(f"OS error occurred while saving library: {e}")
+        except Exception as e:
+            print(f"Unexpected error saving library to {path_to_database}: {e}")
+        return False
+
+    def dump_to_sqlite(self, path_to_database: str) -> bool:
+        """
+        Saves the current state of the library to a new SQLite database, which SqliteLibrary can serve
+        without reading it into memory. Like dump_to_json, skips unchanged files and replaces the file atomically.
+
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+
+        Returns:
+            bool: True if the library was saved, False otherwise.
+        """
+        if self._is_saved_as(path_to_database, 'sqlite'):
+            return True
+        if not self._write_sqlite(path_to_database, self.books.values()):
+            return False
+        self._mark_saved(path_to_database, 'sqlite')
+        return True
+
+    def _write_sqlite(self, path_to_database: str, books: Iterable[Book]) -> bool:
+        """
+        Writes books to a new SQLite database atomically, reporting any error.
+
+        Args:
+            path_to_database (str): Path to the file where the library data will be saved.
+            books (Iterable[Book]): The books to write.
+
+        Returns:
+            bool: True if the file was written, False otherwise.
+        """
+        # Imported here, the SQLite library extends Library
+        from class_sqlite_library import SqliteLibrary
+        try:
+            SqliteLibrary.create(path_to_database, books)
+            return True
+
+        except PermissionError:
+            print(f"Error: No permission to write to {path_to_database}")
+        except OSError as e:
+            print(f"OS error occurred while saving library: {e}")
         except Exception as e:
             print(f"Unexpected error saving library to {path_to_database}: {e}")
+        return False
+
+    # Number of imported books added to the library at once
+    IMPORT_CHUNK_SIZE = 10000
+
+    def import_records(self, path: str, file_format: Optional[str] = None,
+                       on_error: Optional[Callable[[int, str], None]] = None) -> tuple[int, int]:
+        """
+        Adds the books of a CSV or JSON Lines file, which may be compressed, to the library.
+        The file is parsed and validated one record at a time and the books are added in chunks of
+        IMPORT_CHUNK_SIZE with add_books, so memory use doesn't depend on the size of the file.
+        Invalid records are skipped, books with an existing ID get a new one like in add_book.
+
+        Args:
+            path (str): Path to the file.
+            file_format (Optional[str], optional): "csv" or "jsonl", detected from the extension if not given.
+            on_error (Optional[Callable[[int, str], None]], optional): Called with the line number and the error
+                                                                       of every invalid record. Defaults to
+                                                                       printing the error.
+
+        Returns:
+            tuple[int, int]: The numbers of imported and of skipped records.
+        """
+        if on_error is None:
+            def on_error(line_number: int, message: str):
+                print(f"Skipping line {line_number} of {path}: {message}")
+
+        imported = skipped = 0
+        try:
+            if file_format is None:
+                file_format = RecordStream.detect_format(path)
+            chunk = []
+            with Compression.open(path, text=True, newline='') as f:
+                for line_number, book in RecordStream.read(f, file_format):
+                    if isinstance(book, Exception):
+                        on_error(line_number, str(book))
+                        skipped += 1
+                        continue
+                    chunk.append(book)
+                    if len(chunk) >= self.IMPORT_CHUNK_SIZE:
+                        imported += len(self.add_books(chunk))
+                        chunk = []
+            if chunk:
+                imported += len(self.add_books(chunk))
+
+        except FileNotFoundError:
+            print(f"File {path} not found.")
+        except PermissionError:
+            print(f"Permission denied when trying to read {path}.")
+        except UnicodeDecodeError as e:
+            print(f"Invalid UTF-8 in {path}: {e}")
+        except ValueError as e:
+            print(f"Error importing {path}: {e}")
+        return imported, skipped
+
+    def export_records(self, path: str, file_format: Optional[str] = None,
+                       compression_level: Optional[int] = None) -> bool:
+        """
+        Saves the books of the library to a CSV or JSON Lines file.
+        Rows are written one book at a time instead of being collected first, and the file is replaced atomically
+        and compressed if it has the extension of a compression (e.g. books.csv.gz).
+
+        Args:
+            path (str): Path to the file.
+            file_format (Optional[str], optional): "csv" or "jsonl", detected from the extension if not given.
+            compression_level (Optional[int], optional): The level of a compressed file, None for the default
+                                                         of the format (see Compression.LEVELS).
+
+        Returns:
+            bool: True if the books were exported, False otherwise.
+        """
+        try:
+            if file_format is None:
+                file_format = RecordStream.detect_format(path)
+            self._write_atomically(path, lambda f: RecordStream.write(f, self.books.values(), file_format),
+                                   compression_level=compression_level)
+            return True
+
+        except PermissionError:
+            print(f"Error: No permission to write to {path}")
+        except OSError as e:
+            print(f"OS error occurred while exporting library: {e}")
+        except ValueError as e:
+            print(f"Error exporting library to {path}: {e}")
+        return False
 
     def add_book(self, book: Book):
         """
         Adds a book to the library. If a book with the same ID exists, regenerates a new ID.
 
+        Args:
+            book (Book): The book instance to add to the library.
+
+        Raises:
+            OSError: If the journal couldn't record the book, which is not added then.
+        """
+        self._store_book(book)
+        if self._is_logging:
+            self._log_changes([Journal.record_add(book)], lambda: self._discard_book(book.id))
+
+    def add_books(self, books: Iterable[Book]) -> BulkResult:
+        """
+        Adds many books to the library at once. Books with an existing ID get a new one, like in add_book.
+        The journal and the change feed, if any, get the whole batch at once.
+
+        Args:
+            books (Iterable[Book]): The books to add.
+
+        Returns:
+            BulkResult: The final ID of every book with the outcome "added".
+
+        Raises:
+            OSError: If the journal couldn't record the books, which are not added then.
+        """
+        # The whole batch is taken before anything is stored, so a failing iterable leaves the library as is
+        added = self._store_books(list(books))
+        result = BulkResult()
+        result.record_many(added, "added")
+        if self._is_logging and added:
+            self._log_changes([Journal.record_add(book) for book in added.values()],
+                              lambda: self._discard_books(added))
+        return result
+
+    def _store_books(self, books: list[Book]) -> dict[str, Book]:
+        """
+        Stores many books in the library and its indexes without journaling them.
+        The IDs of the whole batch are checked first, then the books are stored and indexed in one pass each.
+
+        Args:
+            books (list[Book]): The books to add.
+
+        Returns:
+            dict[str, Book]: The added books by their final IDs, in the order of the batch.
+        """
+        stored = self.books
+        added = {}
+        for book in books:
+            book_id = book.id
+            # Regenerate an ID taken by a stored book or by an earlier book of the batch
+            while book_id in added or book_id in stored:
+                book_id = book.id = book._generate_id()
+            added[book_id] = book
+        if added:
+            stored.update(added)
+            self._index_books(added)
+            self._mark_books_dirty(added)
+        return added
+
+    def _store_book(self, book: Book):
+        """
+        Stores a book in the library and its indexes without journaling it.
+
         Args:
             book (Book): The book instance to add to the library.
         """
@@ -119,6 +1005,8 @@ class Library:
             # If ID exists, regenerate, however the possibility is very low
             book.id = book._generate_id()
         self.books[book.id] = book
+        self._index_book(book)
+        self._mark_dirty(book.id)
 
     def remove_book(self, book_id: str):
         """
@@ -126,10 +1014,152 @@ class Library:
 
         Args:
             book_id (str): The ID of the book to remove.
+
+        Raises:
+            OSError: If the journal couldn't record the removal, the book is kept then.
+        """
+        # Logged before the book is removed, so a failing journal leaves the library as is
+        if self._is_logging and book_id in self.books:
+            self._log_changes([Journal.record_remove(book_id)])
+        self._discard_book(book_id)
+
+    def remove_books(self, book_ids: Iterable[str]) -> BulkResult:
+        """
+        Removes many books from the library at once.
+        The journal and the change feed, if any, get the whole batch at once.
+
+        Args:
+            book_ids (Iterable[str]): The IDs of the books to remove.
+
+        Returns:
+            BulkResult: Every ID with the outcome "removed" or "not found".
+
+        Raises:
+            OSError: If the journal couldn't record the removals, the books are kept then.
+        """
+        result = BulkResult()
+        removed = {}
+        stored = self.books
+        for book_id in book_ids:
+            book = stored.get(book_id)
+            if book is None or book_id in removed:
+                result.record(book_id, "not found")
+            else:
+                result.record(book_id, "removed")
+                removed[book_id] = book
+        if removed:
+            # Logged before the books are removed, so a failing journal leaves the library as is
+            if self._is_logging:
+                self._log_changes([Journal.record_remove(book_id) for book_id in removed])
+            self._discard_books(removed)
+        return result
+
+    def _discard_books(self, books: dict[str, Book]):
+        """
+        Removes stored books from the library and its indexes without journaling them.
+
+        Args:
+            books (dict[str, Book]): The books to remove by their IDs, all of them kept in the library.
+        """
+        stored = self.books
+        for book_id in books:
+            stored.pop(book_id, None)
+        self._unindex_books(books)
+        self._mark_books_dirty(books)
+
+    def _discard_book(self, book_id: str) -> bool:
+        """
+        Removes a book from the library and its indexes without journaling it.
+
+        Args:
+            book_id (str): The ID of the book to remove.
+
+        Returns:
+            bool: True if the book was removed, False if there was no such book.
+        """
+        if book_id not in self.books:
+            return False
+        # If a book exists remove it from a library
+        self._unindex_book(self.books.pop(book_id))
+        self._mark_dirty(book_id)
+        return True
+
+    def _index_book(self, book: Book):
+        """
+        Adds a book that was just stored in the library to the indexes.
+
+        Args:
+            book (Book): The added book.
+        """
+        if self._search_index is not None:
+            self._search_index.add(book)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.add(book)
+        if self.search_cache is not None:
+            self.search_cache.invalidate(book)
+        if self._status_index is not None:
+            self._status_index.add(book.id, book.status)
+        if self._year_index is not None:
+            self._year_index.add(book.id, book.year_as_int())
+
+    def _unindex_book(self, book: Book):
         """
-        if book_id in self.books:
-            # If a book exists remove it from a library
-            del self.books[book_id]
+        Removes a book that was just removed from the library from the indexes.
+
+        Args:
+            book (Book): The removed book.
+        """
+        if self._search_index is not None:
+            self._search_index.remove(book)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.remove(book)
+        if self.search_cache is not None:
+            self.search_cache.invalidate(book)
+        if self._status_index is not None:
+            self._status_index.remove(book.id, book.status)
+        if self._year_index is not None:
+            self._year_index.remove(book.id)
+
+    def _index_books(self, books: dict[str, Book]):
+        """
+        Adds many books that were just stored in the library to the indexes, see _index_book.
+        The secondary indexes are updated in bulk and the search cache is invalidated once.
+
+        Args:
+            books (dict[str, Book]): The added books by ID.
+        """
+        if self._search_index is not None:
+            for book in books.values():
+                self._search_index.add(book)
+        if self._fuzzy_index is not None:
+            for book in books.values():
+                self._fuzzy_index.add(book)
+        if self.search_cache is not None:
+            self.search_cache.invalidate_many(list(books.values()))
+        if self._status_index is not None:
+            self._status_index.add_many([(book_id, book.status) for book_id, book in books.items()])
+        if self._year_index is not None:
+            self._year_index.add_many([(book_id, book.year_as_int()) for book_id, book in books.items()])
+
+    def _unindex_books(self, books: dict[str, Book]):
+        """
+        Removes many books that were just removed from the library from the indexes, see _unindex_book.
+
+        Args:
+            books (dict[str, Book]): The removed books by ID.
+        """
+        if self._search_index is not None:
+            for book in books.values():
+                self._search_index.remove(book)
+        if self._fuzzy_index is not None:
+            for book in books.values():
+                self._fuzzy_index.remove(book)
+        if self.search_cache is not None:
+            self.search_cache.invalidate_many(list(books.values()))
+        if self._status_index is not None:
+            self._status_index.remove_many([(book_id, book.status) for book_id, book in books.items()])
+        if self._year_index is not None:
+            self._year_index.remove_many(list(books))
 
     def get_book_by_id(self, book_id: str) -> Optional[Book]:
         """
@@ -143,6 +1173,63 @@ class Library:
         """
         return self.books.get(book_id)
 
+    def _search_candidates(self, prompt: str) -> Optional[list[str]]:
+        """
+        Returns the IDs of the books that may match the prompt, building the trigram index if needed.
+
+        Args:
+            prompt (str): The lowercased search query.
+
+        Returns:
+            list[str] or None: Candidate IDs in insertion order, or None if every book has to be checked.
+        """
+        if self._search_index is None:
+            # The index is only published once it is complete
+            search_index = SearchIndex()
+            for book in self.books.values():
+                search_index.add(book)
+            self._search_index = search_index
+        return self._search_index.candidates(prompt)
+
+    def enable_search_cache(self, capacity: int = 128):
+        """
+        Enables caching the results of search_book and search_ranked.
+        Adding or removing a book only evicts the cached results of the prompts matching that book.
+
+        Args:
+            capacity (int, optional): The maximum number of cached results.
+
+        Raises:
+            ValueError: If the capacity is not positive.
+        """
+        self.search_cache = SearchCache(capacity)
+
+    def disable_search_cache(self):
+        """
+        Disables caching search results and drops the cached ones.
+        """
+        self.search_cache = None
+
+    def _cached_search(self, key: tuple, search: Callable[[], list[Book]]) -> list[Book]:
+        """
+        Returns a search result from the search cache, running the search on a miss.
+
+        Args:
+            key (tuple): The lowercased prompt followed by any other search parameters.
+            search (Callable[[], list[Book]]): Runs the search.
+
+        Returns:
+            list[Book]: The found books.
+        """
+        if self.search_cache is None:
+            return search()
+        book_ids = self.search_cache.get(key)
+        if book_ids is None:
+            books = search()
+            self.search_cache.put(key, [book.id for book in books])
+            return books
+        return [self.books[book_id] for book_id in book_ids]
+
     def search_book(self, prompt: str) -> list[Book]:
         """
         Searches for books in the library that match the provided query.
@@ -156,10 +1243,32 @@ class Library:
         """
         # Converting prompt to all lower case
         prompt = prompt.lower()
+        return self._cached_search((prompt, None), lambda: self._find_books(prompt))
+
+    def _find_books(self, prompt: str) -> list[Book]:
+        """
+        Finds the books that match the prompt, see search_book.
+        Candidates are narrowed down with the trigram index before the substring check.
+        Storage engines override it to search their own way.
+
+        Args:
+            prompt (str): The lowercased search query.
+
+        Returns:
+            list[Book]: The matching books in insertion order.
+        """
         # Creating an empty list to store search results
         results = []
 
-        for book in self.books.values():
+        # Only the books sharing every trigram of the prompt can match it,
+        # prompts shorter than a trigram have to be checked against every book
+        candidate_ids = self._search_candidates(prompt)
+        if candidate_ids is None:
+            candidates = self.books.values()
+        else:
+            candidates = (self.books[book_id] for book_id in candidate_ids)
+
+        for book in candidates:
             if (prompt in book.title.lower() or
                     prompt in book.author.lower() or
                     prompt in str(book.year).lower()):
@@ -167,6 +1276,173 @@ class Library:
 
         return results
 
+    def search_fuzzy(self, prompt: str, limit: int = 10) -> list[Book]:
+        """
+        Searches for books whose title or author contains every word of the query, tolerating typos:
+        one in words of up to 5 characters and two in longer words.
+        Candidates come from a word index built on the first fuzzy search and kept current afterwards.
+
+        Args:
+            prompt (str): The search query (case insensitive).
+            limit (int, optional): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The closest matching books, best first, or an empty list if nothing matches.
+        """
+        if self._fuzzy_index is None:
+            fuzzy_index = FuzzyIndex()
+            for book in self.books.values():
+                fuzzy_index.add(book)
+            self._fuzzy_index = fuzzy_index
+        return [self.books[book_id] for book_id in self._fuzzy_index.search(prompt, limit)]
+
+    # Ranks of the match kinds and of the fields, a book scores MATCH_RANKS * field rank + match rank
+    # of its best matching field, so exact beats prefix beats substring, then title beats author beats year
+    EXACT, PREFIX, SUBSTRING = 3, 2, 1
+    TITLE, AUTHOR, YEAR = 2, 1, 0
+    MATCH_RANKS = 3
+    BEST_SCORE = EXACT * MATCH_RANKS + TITLE
+
+    @classmethod
+    def _match_rank(cls, prompt: str, value: str) -> int:
+        """
+        Ranks how a lowercased field value matches the prompt.
+
+        Args:
+            prompt (str): The lowercased search query.
+            value (str): The lowercased field value.
+
+        Returns:
+            int: EXACT, PREFIX, SUBSTRING, or 0 if the value doesn't contain the prompt.
+        """
+        if prompt not in value:
+            return 0
+        if value == prompt:
+            return cls.EXACT
+        if value.startswith(prompt):
+            return cls.PREFIX
+        return cls.SUBSTRING
+
+    @classmethod
+    def _score(cls, prompt: str, title: str, author: str, year: str) -> int:
+        """
+        Scores a book by its best matching field.
+
+        Args:
+            prompt (str): The lowercased search query.
+            title (str): The lowercased title of the book.
+            author (str): The lowercased author of the book.
+            year (str): The lowercased year of the book.
+
+        Returns:
+            int: The score of the book, 0 if it doesn't match the prompt.
+        """
+        best = 0
+        for value, field in ((title, cls.TITLE), (author, cls.AUTHOR), (year, cls.YEAR)):
+            rank = cls._match_rank(prompt, value)
+            if rank:
+                best = max(best, rank * cls.MATCH_RANKS + field)
+        return best
+
+    @classmethod
+    def _top_matches(cls, scored: Iterable[tuple[int, object]], limit: int) -> list:
+        """
+        Selects the best scored items. Scores take a few values only, so the items are kept in a bucket
+        per score instead of a heap: once the buckets hold limit items, the lowest kept score is a tier
+        boundary, and later items need a higher score to get in since ties keep insertion order.
+        The scan stops as soon as the best possible score fills the limit.
+
+        Args:
+            scored (Iterable[tuple[int, object]]): (score, item) pairs in insertion order, unmatched items score 0.
+            limit (int): The maximum number of items to return.
+
+        Returns:
+            list: The items ordered by score, items with the same score in insertion order.
+        """
+        if limit <= 0:
+            return []
+        best_score = cls.BEST_SCORE
+        tiers = [[] for _ in range(best_score + 1)]
+        # The lowest score of the kept items once there are limit of them
+        boundary = 0
+        kept = 0
+        for score, item in scored:
+            if score <= boundary:
+                continue
+            tiers[score].append(item)
+            kept += 1
+            if kept < limit:
+                continue
+            # Move the boundary up to the lowest tier still needed for the top limit items
+            remaining = limit
+            for boundary in range(best_score, 0, -1):
+                tier = tiers[boundary]
+                if len(tier) >= remaining:
+                    del tier[remaining:]
+                    break
+                remaining -= len(tier)
+            for tier in tiers[:boundary]:
+                tier.clear()
+            kept = limit
+            if boundary == best_score:
+                break
+        return [item for tier in reversed(tiers) for item in tier]
+
+    def search_ranked(self, prompt: str, limit: int = 10) -> list[Book]:
+        """
+        Searches for the best matches of the query.
+        Exact matches rank above prefix matches and prefix matches above substring matches,
+        matches in the title rank above matches in the author and those above matches in the year.
+        Only the top matches are kept, so the cost of ranking depends on the limit instead of the
+        number of matching books.
+
+        Args:
+            prompt (str): The search query (case insensitive).
+            limit (int, optional): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The best matching books, best first, or an empty list if nothing matches.
+        """
+        prompt = prompt.lower()
+        return self._cached_search((prompt, limit), lambda: self._find_ranked(prompt, limit))
+
+    def _find_ranked(self, prompt: str, limit: int) -> list[Book]:
+        """
+        Finds the best matches of the prompt, see search_ranked.
+        Storage engines override it to rank their own way.
+
+        Args:
+            prompt (str): The lowercased search query.
+            limit (int): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The best matching books, best first.
+        """
+        candidate_ids = self._search_candidates(prompt)
+        if candidate_ids is None:
+            candidates = self.books.values()
+        else:
+            candidates = (self.books[book_id] for book_id in candidate_ids)
+        return self._rank_books(prompt, candidates, limit)
+
+    @classmethod
+    def _rank_books(cls, prompt: str, books: Iterable[Book], limit: int) -> list[Book]:
+        """
+        Returns the books that match the prompt best.
+
+        Args:
+            prompt (str): The lowercased search query.
+            books (Iterable[Book]): The books to rank, in insertion order.
+            limit (int): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The best matching books, best first.
+        """
+        score = cls._score
+        return cls._top_matches(
+            ((score(prompt, book.title.lower(), book.author.lower(), str(book.year).lower()), book)
+             for book in books), limit)
+
     def change_book_status(self, id: str, status: str):
         """
         Changes the status of a book in the library to either 'available' or 'checked out'.
@@ -174,12 +1450,158 @@ class Library:
         Args:
             id (str): The ID of the book whose status is to be updated.
             status (str): The new status of the book ("в наличии" for available, "выдана" for checked out).
+
+        Raises:
+            OSError: If the journal couldn't record the change, the book keeps its status then.
+        """
+        # Getting a book by ID
+        book = self.get_book_by_id(id)
+        if book is None:
+            return
+        new_status = self.STATUSES.get(status.lower())
+        if new_status is None:
+            return
+        if self._update_status(book, new_status) and self._is_logging:
+            self._log_changes([Journal.record_status(id, new_status)],
+                              lambda: self._update_status(book, not new_status))
+
+    def change_books_status(self, changes: Iterable[tuple[str, str | bool]]) -> BulkResult:
+        """
+        Changes the statuses of many books at once.
+        Every distinct status value is parsed once per batch, and the journal and the change feed, if any,
+        get the whole batch at once.
+
+        Args:
+            changes (Iterable[tuple[str, str | bool]]): (book ID, new status) pairs, the status being
+                                                        "в наличии"/"выдана" or True/False.
+
+        Returns:
+            BulkResult: Every ID with the outcome "updated", "unchanged", "not found" or "invalid status".
+
+        Raises:
+            OSError: If the journal couldn't record the changes, the books keep their statuses then.
+        """
+        result = BulkResult()
+        # Status string -> True, False or None if it is invalid
+        parsed_statuses = {}
+        get_book = self.books.get
+        # The statuses the batch has set so far, and every status change in order
+        pending = {}
+        updates = []
+        for book_id, status in changes:
+            if isinstance(status, bool):
+                new_status = status
+            elif isinstance(status, str):
+                if status in parsed_statuses:
+                    new_status = parsed_statuses[status]
+                else:
+                    new_status = parsed_statuses[status] = self.STATUSES.get(status.lower())
+            else:
+                new_status = None
+            if new_status is None:
+                result.record(book_id, "invalid status")
+                continue
+            book = get_book(book_id)
+            if book is None:
+                result.record(book_id, "not found")
+            elif pending.get(book_id, book.status) == new_status:
+                result.record(book_id, "unchanged")
+            else:
+                pending[book_id] = new_status
+                updates.append((book, new_status))
+                result.record(book_id, "updated")
+        if updates:
+            # The statuses before the batch, to take it back if the journal can't record it
+            previous = {book.id: (book, book.status) for book, _ in updates}
+            self._set_statuses(updates)
+            self._mark_books_dirty(pending)
+            if self._is_logging:
+                self._log_changes([Journal.record_status(book.id, status) for book, status in updates],
+                                  lambda: self._set_statuses(list(previous.values())))
+        return result
+
+    def _update_status(self, book: Book, status: bool) -> bool:
+        """
+        Sets the status of a book kept in the library without journaling it.
+
+        Args:
+            book (Book): The book to update.
+            status (bool): The new status of the book.
+
+        Returns:
+            bool: True if the status changed, False if the book already had it.
+        """
+        if book.status == status:
+            return False
+        self._set_status(book, status)
+        self._mark_dirty(book.id)
+        return True
+
+    def _set_status(self, book: Book, status: bool):
+        """
+        Stores a new status of a book kept in the library.
+        Storage engines that don't keep the Book objects themselves override it to write the status back.
+
+        Args:
+            book (Book): The book to update.
+            status (bool): The new status of the book.
+        """
+        book.status = status
+        if self._status_index is not None:
+            self._status_index.set_status(book.id, status)
+
+    def _set_statuses(self, changes: list[tuple[Book, bool]]):
+        """
+        Stores many status changes of books kept in the library in order, see _set_status.
+
+        Args:
+            changes (list[tuple[Book, bool]]): (book, new status) pairs.
+        """
+        for book, status in changes:
+            book.status = status
+        if self._status_index is not None:
+            self._status_index.set_statuses([(book.id, status) for book, status in changes])
+
+    def available_books(self) -> list[Book]:
+        """
+        Returns the books that are available ("в наличии"), using the status index.
+
+        Returns:
+            list[Book]: The available books.
+        """
+        return [self.books[book_id] for book_id in self._status_index.ids(True)]
+
+    def checked_out_books(self) -> list[Book]:
+        """
+        Returns the books that are checked out ("выдана"), using the status index.
+
+        Returns:
+            list[Book]: The checked out books.
+        """
+        return [self.books[book_id] for book_id in self._status_index.ids(False)]
+
+    def count_by_status(self, status: bool) -> int:
+        """
+        Counts the books that are available or checked out.
+
+        Args:
+            status (bool): True to count available books, False to count checked out ones.
+
+        Returns:
+            int: The number of books with the given status.
+        """
+        return self._status_index.count(status)
+
+    def books_published_between(self, start: int, end: int) -> list[Book]:
+        """
+        Returns the books published in the given range of years, using the year index.
+        Books whose year is not a plain number are never included.
+
+        Args:
+            start (int): The first year of the range.
+            end (int): The last year of the range, inclusive.
+
+        Returns:
+            list[Book]: The matching books ordered by year, books of the same year in insertion order.
         """
-        if id in self.books:
-            # Getting a book by ID
-            book = self.get_book_by_id(id)
-            match status.lower():
-                case "в наличии":
-                    book.status = True
-                case "выдана":
-                    book.status = False
+        return [self.books[book_id] for book_id in self._year_index.ids_between(start, end)]
@@ -0,0 +1,298 @@
+import heapq
+import mmap
+from collections.abc import Mapping
+from typing import Iterator, Optional
+from class_book import Book
+from class_binary_snapshot import BinarySnapshot, SnapshotFormatError
+from class_fuzzy_index import FuzzyIndex
+from class_library import Library
+
+
+class MappedBooks(Mapping):
+    """
+    A read-only mapping of book IDs to books backed by a memory-mapped binary snapshot.
+    Lookups by ID use the snapshot's ID index, and every book is decoded only when it is accessed.
+    """
+
+    def __init__(self, buffer):
+        """
+        Initializes the mapping over a snapshot.
+
+        Args:
+            buffer: A bytes-like object holding the whole snapshot, usually an mmap.
+
+        Raises:
+            SnapshotFormatError: If the snapshot is malformed or has no ID index (version 1).
+        """
+        count, _, index_offset = BinarySnapshot.read_header(buffer)
+        if index_offset is None:
+            raise SnapshotFormatError("Snapshot has no ID index, convert it to the current version")
+        self._buffer = buffer
+        self._count = count
+        self._index = BinarySnapshot.read_index(buffer, index_offset, count)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of books in the snapshot.
+        """
+        return self._count
+
+    def _find(self, book_id) -> Optional[int]:
+        """
+        Finds the record of a book with a binary search over the ID index.
+
+        Args:
+            book_id: The ID of the book.
+
+        Returns:
+            int or None: The offset of the record, or None if there is no such book.
+        """
+        if not isinstance(book_id, str):
+            return None
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if BinarySnapshot.record_id(self._buffer, self._index[middle]) < book_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and BinarySnapshot.record_id(self._buffer, self._index[low]) == book_id:
+            return self._index[low]
+        return None
+
+    def __contains__(self, book_id) -> bool:
+        """
+        Checks whether a book with the given ID is in the snapshot.
+        """
+        return self._find(book_id) is not None
+
+    def __getitem__(self, book_id: str) -> Book:
+        """
+        Decodes the book with the given ID.
+        """
+        offset = self._find(book_id)
+        if offset is None:
+            raise KeyError(book_id)
+        return BinarySnapshot.decode_book(self._buffer, offset)
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterates over the IDs of the books in the order they were written.
+        """
+        for offset in BinarySnapshot.record_offsets(self._buffer):
+            yield BinarySnapshot.record_id(self._buffer, offset)
+
+    def values(self) -> Iterator[Book]:
+        """
+        Decodes the books in the order they were written, walking the records sequentially
+        instead of looking every ID up in the index.
+        """
+        for offset in BinarySnapshot.record_offsets(self._buffer):
+            yield BinarySnapshot.decode_book(self._buffer, offset)
+
+    def release(self):
+        """
+        Releases the view of the ID index, which keeps the buffer from being closed. The mapping is unusable afterwards.
+        """
+        if isinstance(self._index, memoryview):
+            self._index.release()
+
+
+class MappedLibrary(Library):
+    """
+    A read-only library served straight from a memory-mapped binary snapshot.
+    Opening it only reads the header and the ID index, the books are decoded on demand, and
+    the mapped pages are shared by the OS between all processes reading the same snapshot.
+    Any attempt to modify the library raises TypeError.
+    """
+
+    def __init__(self, filename: str):
+        """
+        Maps the snapshot into memory.
+
+        Args:
+            filename (str): Path to a binary snapshot written by Library.dump_to_binary.
+
+        Raises:
+            OSError: If the file can't be opened or mapped.
+            SnapshotFormatError: If the file is not a valid snapshot with an ID index.
+        """
+        super().__init__()
+        # Scanning answers the status and year queries, keeping the view free of per-book state
+        self._status_index = None
+        self._year_index = None
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.books = MappedBooks(self._map)
+        except Exception:
+            self._map.close()
+            raise
+
+    def __enter__(self):
+        """
+        Returns the view itself, so it can be closed with a with statement.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Unmaps the snapshot when leaving the with statement.
+        """
+        self.close()
+
+    def close(self):
+        """
+        Unmaps the snapshot. Books decoded before remain usable.
+        """
+        if isinstance(self.books, MappedBooks):
+            self.books.release()
+        self.books = {}
+        if self.search_cache is not None:
+            self.search_cache.clear()
+        self._map.close()
+
+    @classmethod
+    def load_from_binary(cls, filename: str):
+        """
+        Opens a read-only view of a binary snapshot.
+
+        Args:
+            filename (str): Path to the binary snapshot.
+
+        Returns:
+            MappedLibrary or None: The view, or None if the file can't be opened.
+        """
+        try:
+            return cls(filename)
+        except FileNotFoundError:
+            print(f"File {filename} does not exist.")
+        except SnapshotFormatError as e:
+            print(f"Invalid binary snapshot {filename}: {e}")
+        except (OSError, ValueError) as e:
+            print(f"Error mapping {filename}: {e}")
+        return None
+
+    @classmethod
+    def load_from_json(cls, filename: str, progress=None, workers=1):
+        """
+        Not supported, a read-only view can only be opened from a binary snapshot.
+        """
+        raise TypeError("MappedLibrary can only be opened from a binary snapshot")
+
+    @classmethod
+    def load(cls, filename: str, workers=1):
+        """
+        Opens a read-only view of a binary snapshot. The snapshot is mapped, not parsed, so workers are not used.
+        """
+        return cls.load_from_binary(filename)
+
+    def _read_only(self, *args, **kwargs):
+        """
+        Rejects any modification of the library.
+        """
+        raise TypeError("MappedLibrary is read-only")
+
+    add_book = remove_book = change_book_status = apply_journal_record = compact = _read_only
+    add_books = remove_books = change_books_status = _read_only
+
+    def _find_books(self, prompt: str) -> list[Book]:
+        """
+        Finds the books that match the prompt, see Library.search_book.
+        Scans the mapped records instead of building an in-memory index,
+        so the view keeps no per-book state.
+
+        Args:
+            prompt (str): The lowercased search query.
+
+        Returns:
+            list[Book]: The matching books in file order.
+        """
+        return [book for book in self.books.values()
+                if (prompt in book.title.lower() or
+                    prompt in book.author.lower() or
+                    prompt in book.year.lower())]
+
+    def _find_ranked(self, prompt: str, limit: int) -> list[Book]:
+        """
+        Finds the best matches of the prompt, see Library.search_ranked.
+        Scans the mapped records instead of building an in-memory index.
+
+        Args:
+            prompt (str): The lowercased search query.
+            limit (int): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The best matching books, best first.
+        """
+        return self._rank_books(prompt, self.books.values(), limit)
+
+    def search_fuzzy(self, prompt: str, limit: int = 10) -> list[Book]:
+        """
+        Searches for books whose title or author contains every word of the query, tolerating typos,
+        see Library.search_fuzzy. Scans the mapped records instead of building a FuzzyIndex,
+        keeping only the best matches so far and the distances of the words seen during the scan.
+
+        Args:
+            prompt (str): The search query (case insensitive).
+            limit (int, optional): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The closest matching books, best first, or an empty list if nothing matches.
+        """
+        query_words = FuzzyIndex.words(prompt)
+        if not query_words or limit <= 0:
+            return []
+        # (query word, book word) -> similarity, 0 if the book word is too far from the query word
+        similarities = {}
+
+        def similarity(query_word: str, word: str) -> float:
+            key = (query_word, word)
+            value = similarities.get(key)
+            if value is None:
+                max_distance = FuzzyIndex.max_distance(query_word)
+                distance = FuzzyIndex.edit_distance(query_word, word, max_distance)
+                value = similarities[key] = 1 - distance / (len(query_word) + 1) if distance <= max_distance else 0
+            return value
+
+        def scored() -> Iterator[tuple[float, int, Book]]:
+            for ordinal, book in enumerate(self.books.values()):
+                words = FuzzyIndex.words(book.title) | FuzzyIndex.words(book.author)
+                score = 0
+                for query_word in query_words:
+                    best = max((similarity(query_word, word) for word in words), default=0)
+                    if not best:
+                        break
+                    score += best
+                else:
+                    yield score, -ordinal, book
+
+        return [book for _, _, book in heapq.nlargest(limit, scored(), key=lambda item: item[:2])]
+
+    def available_books(self) -> list[Book]:
+        """
+        Returns the books that are available ("в наличии").
+        """
+        return [book for book in self.books.values() if book.status]
+
+    def checked_out_books(self) -> list[Book]:
+        """
+        Returns the books that are checked out ("выдана").
+        """
+        return [book for book in self.books.values() if not book.status]
+
+    def count_by_status(self, status: bool) -> int:
+        """
+        Counts the books that are available or checked out.
+        """
+        return sum(1 for book in self.books.values() if bool(book.status) == status)
+
+    def books_published_between(self, start: int, end: int) -> list[Book]:
+        """
+        Returns the books published in the given range of years, ordered by year.
+        """
+        books = [book for book in self.books.values()
+                 if book.year_as_int() is not None and start <= book.year_as_int() <= end]
+        books.sort(key=Book.year_as_int)
+        return books
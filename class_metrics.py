@@ -0,0 +1,360 @@
+import bisect
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Callable, Iterable, Optional
+
+# Profiling modes: cProfile or tracemalloc
+PROFILE_MODES = ("cpu", "memory")
+
+
+def profile(call: Callable[[], object], path: str, mode: str = "cpu"):
+    """
+    Runs a call under cProfile ("cpu") or tracemalloc ("memory") and writes the report to a file:
+    the functions with the highest cumulative time, or the peak of the allocated memory and
+    the lines that allocated the most.
+
+    Args:
+        call (Callable[[], object]): The call to profile.
+        path (str): Path of the report.
+        mode (str, optional): "cpu" or "memory".
+
+    Returns:
+        The result of the call.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+    report = io.StringIO()
+    if mode == "cpu":
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(call)
+        finally:
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(40)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(report.getvalue())
+
+    # A trace started by someone else is left running
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    try:
+        return call()
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics('lineno')
+        if started:
+            tracemalloc.stop()
+        report.write(f"Peak: {peak - before} bytes above the start, retained: {current - before} bytes\n")
+        for statistic in statistics[:40]:
+            report.write(f"{statistic}\n")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+
+
+class OperationStats:
+    """
+    Call statistics of a single operation: the number of calls and failures, a latency histogram
+    and the number of bytes the operation read from and wrote to files.
+    """
+
+    # Upper bounds of the latency histogram buckets in milliseconds, the last bucket has no bound
+    BUCKETS_MS = (0.01, 0.1, 1, 10, 100, 1000, 10000)
+
+    def __init__(self):
+        """
+        Initializes empty statistics.
+        """
+        self.calls = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(self.BUCKETS_MS) + 1)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def record(self, seconds: float, failed: bool, bytes_read: int, bytes_written: int):
+        """
+        Records a call.
+
+        Args:
+            seconds (float): The duration of the call.
+            failed (bool): Whether the call raised an exception or reported a failure.
+            bytes_read (int): The number of bytes read from files.
+            bytes_written (int): The number of bytes written to files.
+        """
+        self.calls += 1
+        self.failures += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[bisect.bisect_left(self.BUCKETS_MS, seconds * 1000)] += 1
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+
+    def to_dict(self) -> dict:
+        """
+        Converts the statistics into a dictionary format for serialization.
+
+        Returns:
+            dict: The counters, the mean and maximum latency and the histogram keyed by the bucket bounds.
+        """
+        bounds = [f"<={bound}ms" for bound in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'total_ms': self.total_seconds * 1000,
+            'mean_ms': self.total_seconds * 1000 / self.calls if self.calls else 0.0,
+            'max_ms': self.max_seconds * 1000,
+            'histogram': dict(zip(bounds, self.buckets)),
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+
+
+class Metrics:
+    """
+    Opt-in instrumentation of the Library operations and the Application handlers.
+
+    While disabled, nothing is instrumented and the operations run at full speed. enable() replaces
+    the operations of Library, its subclasses and Application with wrappers that record every call,
+    and disable() puts the original methods back. An operation is instrumented by a single instance
+    at a time, usually the process-wide metrics, so instances never wrap each other's wrappers.
+    Only the outermost operation is recorded: the operations it calls (a load adding the books,
+    a subclass method calling the base one) are part of its own call. The handlers are recorded
+    apart from the library operations they call. Operations may also be profiled: every call
+    of a profiled operation writes a cProfile or tracemalloc report to the profile directory.
+    """
+
+    # Operations of Library and its subclasses, the Application handlers are found by their prefix
+    LIBRARY_OPERATIONS = (
+        'add_book', 'add_books', 'remove_book', 'remove_books', 'get_book_by_id',
+        'change_book_status', 'change_books_status', 'search_book', 'search_ranked', 'search_fuzzy',
+        'available_books', 'checked_out_books', 'count_by_status', 'books_published_between',
+        'render', '__str__', 'load', 'load_from_json', 'load_from_binary', 'load_from_sqlite', 'open_journaled',
+        'dump_to_json', 'dump_to_binary', 'dump_to_sqlite', 'compact', 'import_records', 'export_records',
+        'changes_since', 'replication_snapshot',
+    )
+    HANDLER_PREFIX = 'handle_'
+    # Operations reading or writing the file given as their first argument, a read failing when it returns None
+    READING = frozenset(('load', 'load_from_json', 'load_from_binary', 'load_from_sqlite', 'open_journaled',
+                         'import_records'))
+    WRITING = frozenset(('dump_to_json', 'dump_to_binary', 'dump_to_sqlite', 'export_records'))
+
+    # (class, attribute name) -> the instance instrumenting it, shared by every instance
+    _owners = {}
+
+    def __init__(self):
+        """
+        Initializes disabled metrics.
+        """
+        self._stats = {}
+        self._lock = threading.Lock()
+        # Whether a handler or a library operation is running in the current thread, to skip the nested calls
+        self._local = threading.local()
+        # (class, attribute name) -> the original attribute, while enabled
+        self._originals = {}
+        # Operation name -> profiling mode, and the number of reports written
+        self._profiled = {}
+        self._profile_dir = '.'
+        self._reports = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the operations are instrumented.
+        """
+        return bool(self._originals)
+
+    @staticmethod
+    def _default_targets() -> list[tuple[type, list[str]]]:
+        """
+        Returns Library with its subclasses and Application, with the names of their operations.
+        """
+        # Imported here, the application itself imports the metrics
+        from class_library import Library
+        from class_application import Application
+        classes = [Library]
+        for cls in classes:
+            classes.extend(subclass for subclass in cls.__subclasses__() if subclass not in classes)
+        targets = [(cls, [name for name in Metrics.LIBRARY_OPERATIONS if name in vars(cls)]) for cls in classes]
+        targets.append((Application, [name for name in vars(Application) if name.startswith(Metrics.HANDLER_PREFIX)]))
+        return targets
+
+    def enable(self, profiled: Optional[dict[str, str]] = None, profile_dir: str = '.',
+               targets: Optional[Iterable[tuple[type, list[str]]]] = None):
+        """
+        Starts recording the operations.
+
+        Args:
+            profiled (Optional[dict[str, str]], optional): Operation name -> "cpu" or "memory",
+                                                          the operations to profile on every call.
+            profile_dir (str, optional): The directory of the profiling reports, created if needed.
+            targets (Optional[Iterable[tuple[type, list[str]]]], optional): The classes to instrument
+                with the names of their operations. Defaults to Library with its subclasses and Application.
+
+        Raises:
+            ValueError: If a profiling mode is unknown.
+            RuntimeError: If another instance instruments any of the operations.
+        """
+        profiled = dict(profiled or {})
+        for mode in profiled.values():
+            if mode not in PROFILE_MODES:
+                raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+        targets = [(cls, name) for cls, names in (self._default_targets() if targets is None else targets)
+                   for name in names]
+        for cls, name in targets:
+            owner = Metrics._owners.get((cls, name))
+            if owner is not None and owner is not self:
+                raise RuntimeError(f"{cls.__name__}.{name} is already instrumented by other metrics")
+        if profiled:
+            os.makedirs(profile_dir, exist_ok=True)
+        self.disable()
+        self._profiled = profiled
+        self._profile_dir = profile_dir
+        for cls, name in targets:
+            original = vars(cls)[name]
+            self._originals[(cls, name)] = original
+            Metrics._owners[(cls, name)] = self
+            if isinstance(original, classmethod):
+                setattr(cls, name, classmethod(self._wrap(name, original.__func__)))
+            else:
+                setattr(cls, name, self._wrap(name, original))
+
+    def disable(self):
+        """
+        Stops recording, restoring the original operations. The recorded statistics are kept.
+        """
+        for (cls, name), original in self._originals.items():
+            setattr(cls, name, original)
+            del Metrics._owners[(cls, name)]
+        self._originals = {}
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        """
+        Wraps an operation to record its calls.
+        """
+        handler = name.startswith(self.HANDLER_PREFIX)
+
+        @functools.wraps(method)
+        def recorded(*args, **kwargs):
+            running = self._local.__dict__.setdefault('running', set())
+            if handler in running:
+                return method(*args, **kwargs)
+            running.add(handler)
+            bytes_read = self._file_size(args) if name in self.READING else 0
+            # A save leaving the file as it was, like an unchanged library, wrote nothing
+            before = self._file_state(args) if name in self.WRITING else None
+            failed = True
+            start = time.perf_counter()
+            try:
+                mode = self._profiled.get(name)
+                if mode is None:
+                    result = method(*args, **kwargs)
+                else:
+                    result = profile(lambda: method(*args, **kwargs), self._report_path(name, mode), mode)
+                failed = result is False or (result is None and name in self.READING)
+                return result
+            finally:
+                seconds = time.perf_counter() - start
+                running.discard(handler)
+                bytes_written = 0
+                if name in self.WRITING and not failed:
+                    after = self._file_state(args)
+                    if after is not None and after != before:
+                        bytes_written = after[2]
+                self.record(name, seconds, failed, bytes_read if not failed else 0, bytes_written)
+        return recorded
+
+    @staticmethod
+    def _file_size(args: tuple) -> int:
+        """
+        Returns the size of the file given as the first argument of an operation, after self or cls.
+        """
+        try:
+            return os.path.getsize(args[1])
+        except (IndexError, TypeError, OSError):
+            return 0
+
+    @staticmethod
+    def _file_state(args: tuple) -> Optional[tuple[int, int, int]]:
+        """
+        Returns the inode, modification time and size of the file given as the first argument
+        of an operation, None if there is no such file.
+        """
+        try:
+            stat = os.stat(args[1])
+        except (IndexError, TypeError, ValueError, OSError):
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _report_path(self, name: str, mode: str) -> str:
+        """
+        Returns the path of the next profiling report of an operation.
+        """
+        with self._lock:
+            self._reports += 1
+            number = self._reports
+        return os.path.join(self._profile_dir, f"{name.strip('_')}-{number:04d}.{mode}.txt")
+
+    def record(self, name: str, seconds: float, failed: bool = False, bytes_read: int = 0, bytes_written: int = 0):
+        """
+        Records a call of an operation.
+
+        Args:
+            name (str): The name of the operation.
+            seconds (float): The duration of the call.
+            failed (bool, optional): Whether the call failed.
+            bytes_read (int, optional): The number of bytes read from files.
+            bytes_written (int, optional): The number of bytes written to files.
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = OperationStats()
+            stats.record(seconds, failed, bytes_read, bytes_written)
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Returns the statistics of every recorded operation, see OperationStats.to_dict.
+
+        Returns:
+            dict[str, dict]: Operation name -> its statistics, by name.
+        """
+        with self._lock:
+            return {name: self._stats[name].to_dict() for name in sorted(self._stats)}
+
+    def reset(self):
+        """
+        Forgets every recorded call.
+        """
+        with self._lock:
+            self._stats.clear()
+
+    def report(self) -> str:
+        """
+        Returns the statistics as a table, the operations taking the most time first.
+        """
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "Операции еще не вызывались"
+        lines = [f"{'Операция':<24} {'вызовы':>8} {'ошибки':>7} {'всего, мс':>11} {'среднее, мс':>12} "
+                 f"{'макс, мс':>10} {'прочитано':>11} {'записано':>11}"]
+        for name, stats in sorted(snapshot.items(), key=lambda item: -item[1]['total_ms']):
+            lines.append(f"{name:<24} {stats['calls']:>8} {stats['failures']:>7} {stats['total_ms']:>11.2f} "
+                         f"{stats['mean_ms']:>12.3f} {stats['max_ms']:>10.2f} "
+                         f"{stats['bytes_read']:>11} {stats['bytes_written']:>11}")
+        return '\n'.join(lines)
+
+
+# The metrics of the process, the operations are instrumented process-wide
+metrics = Metrics()
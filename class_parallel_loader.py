@@ -0,0 +1,314 @@
+import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, Optional
+from class_book import Book
+from class_json_stream import JsonArrayReader, NotAnArrayError
+
+WHITESPACE = b' \t\n\r'
+
+
+class ParallelJsonLoader:
+    """
+    Parses a JSON array of books in a pool of processes.
+
+    The file is split into byte ranges of CHUNK_SIZE bytes. Every worker maps the file, guesses
+    where the first element of its range starts (an object following a comma) and parses and
+    validates the elements starting in its range. The guess may be wrong if a string contains
+    something looking like an element, so the ranges are chained in file order: a range is only
+    accepted if it starts exactly where the previous one ended, otherwise it is parsed again
+    from the right position in the calling process. The result is always the same as a
+    sequential parse of the file.
+
+    Workers send back the fields of the validated books rather than the Book objects,
+    since plain tuples are several times cheaper to pickle.
+    """
+
+    # Number of bytes parsed by a single task
+    CHUNK_SIZE = 4 << 20
+    # Number of bytes read past the end of a range to finish its last element, doubled as needed
+    OVERLAP = 1 << 12
+    # Files with fewer ranges are parsed in the calling process: starting the pool, pickling the books
+    # and adding them in the calling process costs more than the workers save on them
+    MIN_RANGES = 4
+
+    def __init__(self, filename: str, workers: Optional[int] = None):
+        """
+        Initializes the loader.
+
+        Args:
+            filename (str): Path to the JSON file holding an array of books.
+            workers (Optional[int], optional): Number of worker processes. Defaults to the number of CPUs.
+        """
+        self.filename = filename
+        self.workers = workers or self.available_cpus()
+
+    @staticmethod
+    def available_cpus() -> int:
+        """
+        Returns the number of CPUs the process may run on, which may be fewer than the CPUs of the machine.
+        """
+        if hasattr(os, 'sched_getaffinity'):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count() or 1
+
+    @classmethod
+    def worker_count(cls, filename: str, workers: Optional[int] = None) -> int:
+        """
+        Returns the number of processes worth parsing a file with: 1 for files of fewer than MIN_RANGES ranges,
+        otherwise the requested number, at most one per range.
+
+        Args:
+            filename (str): Path to the JSON file.
+            workers (Optional[int], optional): The requested number of processes. Defaults to one per available CPU.
+
+        Returns:
+            int: The number of processes, 1 meaning the file is better parsed in the calling process.
+        """
+        ranges = -(-os.path.getsize(filename) // cls.CHUNK_SIZE)
+        if ranges < cls.MIN_RANGES:
+            return 1
+        return min(workers or cls.available_cpus(), ranges)
+
+    def __iter__(self) -> Iterator[tuple[list[Book], list[str], int]]:
+        """
+        Parses the file, yielding the books of every range in file order.
+
+        Yields:
+            tuple[list[Book], list[str], int]: The books of a range, the errors of its invalid
+            records and the number of records processed so far.
+
+        Raises:
+            NotAnArrayError: If the top level of the document is not an array.
+            json.JSONDecodeError: If the document is not valid JSON.
+        """
+        position = self._first_position()
+        if position is not None:
+            yield from self._parse_ranges(position)
+
+    def _first_position(self) -> Optional[int]:
+        """
+        Finds the first element of the array.
+
+        Returns:
+            int or None: The position of the first element, or None if the array is empty.
+        """
+        with open(self.filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise json.JSONDecodeError("Expecting value", '', 0)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                position = self._skip_whitespace(data, 0)
+                if position == len(data):
+                    raise json.JSONDecodeError("Expecting value", '', 0)
+                if data[position] != ord('['):
+                    raise NotAnArrayError("Expected a JSON array")
+                position = self._skip_whitespace(data, position + 1)
+                if position < len(data) and data[position] == ord(']'):
+                    self._check_end(data, position)
+                    return None
+                return position
+
+    def _parse_ranges(self, position: int) -> Iterator[tuple[list[Book], list[str], int]]:
+        """
+        Parses the array from its first element at the given position, see __iter__.
+        """
+        size = os.path.getsize(self.filename)
+        bounds = list(range(position, size, self.CHUNK_SIZE)) + [size]
+        ranges = list(zip(bounds, bounds[1:]))
+        processed = 0
+        closed = False
+
+        def chained(results: Iterator[Optional[tuple]]) -> Iterator[tuple[list[Book], list[str], int]]:
+            nonlocal position, processed, closed
+            for (start, end), result in zip(ranges, results):
+                if closed or position >= end:
+                    # The previous ranges already parsed every element starting in this one
+                    continue
+                if result is None or result[0] != position:
+                    result = self.parse_range(self.filename, position, end, True)
+                _, position, closed, records, errors = result
+                processed += len(records) + len(errors)
+                yield [Book(*fields) for fields in records], errors, processed
+
+        if len(ranges) == 1 or self.workers == 1:
+            # Every range is parsed from the end of the previous one, nothing has to be guessed
+            yield from chained(repeat(None))
+        else:
+            with ProcessPoolExecutor(min(self.workers, len(ranges))) as executor:
+                yield from chained(executor.map(self.parse_range, [self.filename] * len(ranges),
+                                                bounds[:-1], bounds[1:],
+                                                [start == position for start in bounds[:-1]]))
+
+        with open(self.filename, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                self._check_end(data, position)
+
+    @staticmethod
+    def _skip_whitespace(data, position: int) -> int:
+        """
+        Returns the position of the first byte after the whitespace starting at the given position.
+        """
+        while position < len(data) and data[position] in WHITESPACE:
+            position += 1
+        return position
+
+    @classmethod
+    def _check_end(cls, data, position: int):
+        """
+        Checks that the array ends at the given position and nothing but whitespace follows it.
+
+        Raises:
+            json.JSONDecodeError: If the array is not closed or is followed by other data.
+        """
+        if position >= len(data) or data[position] != ord(']'):
+            raise cls._error(data, position, "Expecting ',' delimiter")
+        if cls._skip_whitespace(data, position + 1) != len(data):
+            raise cls._error(data, position + 1, "Extra data")
+
+    @staticmethod
+    def _error(data, position: int, message: str) -> json.JSONDecodeError:
+        """
+        Builds a decode error pointing at a byte position of the file.
+        """
+        document = data[:position].decode('utf-8', 'replace')
+        return json.JSONDecodeError(message, document, len(document))
+
+    @staticmethod
+    def _char_boundary(data, position: int) -> int:
+        """
+        Moves a position back to the start of the UTF-8 character it falls into.
+        """
+        while 0 < position < len(data) and data[position] & 0xC0 == 0x80:
+            position -= 1
+        return position
+
+    @staticmethod
+    def _guess_first(data, start: int, end: int) -> Optional[int]:
+        """
+        Guesses the position of the first element starting in a range: an object following a comma.
+        """
+        position = data.find(b'{', start, end)
+        while position != -1:
+            before = position - 1
+            while before > 0 and data[before] in WHITESPACE:
+                before -= 1
+            if data[before] == ord(','):
+                return position
+            position = data.find(b'{', position + 1, end)
+        return None
+
+    @staticmethod
+    def _is_truncated(error: json.JSONDecodeError, text: str) -> bool:
+        """
+        Tells whether a decode error may come from an element that continues past the decoded text,
+        see JsonArrayReader._is_truncated.
+        """
+        return error.pos >= len(text) - JsonArrayReader.TRUNCATION_MARGIN or \
+            error.msg == "Unterminated string starting at"
+
+    @classmethod
+    def parse_range(cls, filename: str, start: int, end: int, exact: bool) -> tuple:
+        """
+        Parses and validates the elements of the array starting in a range of the file.
+        Runs in the worker processes, the invalid records are reported back as error messages.
+
+        Args:
+            filename (str): Path to the JSON file.
+            start (int): The first byte of the range.
+            end (int): The byte after the range.
+            exact (bool): Whether an element is known to start at the first byte,
+                          otherwise the start of the first element is guessed.
+
+        Returns:
+            tuple: The position of the first parsed element (None if nothing could be parsed),
+            the position of the element following the last one or of the end of the array,
+            whether the array ends there, the (title, author, year, status, id) fields
+            of the valid records and the errors of the invalid ones.
+
+        Raises:
+            json.JSONDecodeError: If exact is set and the range is not valid JSON.
+        """
+        with open(filename, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if not exact:
+                    start = cls._guess_first(data, start, end)
+                    if start is None:
+                        return None, None, False, [], []
+                try:
+                    return cls._parse_elements(data, start, end)
+                except json.JSONDecodeError:
+                    if not exact:
+                        return None, None, False, [], []
+                    raise
+
+    @classmethod
+    def _parse_elements(cls, data, start: int, end: int) -> tuple:
+        """
+        Parses the elements starting in a range, the first one at its first byte, see parse_range.
+        """
+        decoder = json.JSONDecoder()
+        size = len(data)
+        head_end = cls._char_boundary(data, end)
+        head = data[start:head_end].decode('utf-8')
+        # Elements starting before this position of the text belong to the range
+        limit = len(head)
+        tail_end = head_end
+        text = head
+
+        def extend() -> bool:
+            # Decodes more of the file after the range, keeping the positions in the text
+            nonlocal tail_end, text
+            if tail_end >= size:
+                return False
+            tail_end = cls._char_boundary(data, min(size, tail_end + max(cls.OVERLAP, 2 * (tail_end - head_end))))
+            if tail_end <= head_end:
+                tail_end = size
+            text = head + data[head_end:tail_end].decode('utf-8')
+            return True
+
+        records = []
+        errors = []
+        position = 0
+        while True:
+            try:
+                element, element_end = decoder.raw_decode(text, position)
+            except json.JSONDecodeError as e:
+                # Invalid JSON inside the text fails the range at once, without decoding the rest of the file
+                if cls._is_truncated(e, text) and extend():
+                    continue
+                raise cls._error(data, start + len(text[:e.pos].encode('utf-8')), e.msg)
+            # A number may continue past the decoded text, only trust the element once its delimiter is read
+            if element_end == len(text) and extend():
+                continue
+
+            separator = element_end
+            while separator < len(text) and text[separator] in ' \t\n\r':
+                separator += 1
+            if separator == len(text) and extend():
+                continue
+            if separator == len(text) or text[separator] not in ',]':
+                raise cls._error(data, start + len(text[:separator].encode('utf-8')), "Expecting ',' delimiter")
+
+            try:
+                book = Book.from_dict(element)
+                records.append((book.title, book.author, book.year, book.status, book.id))
+            except Exception as book_error:
+                errors.append(str(book_error))
+
+            closed = text[separator] == ']'
+            if closed:
+                following = separator
+                break
+            following = separator + 1
+            while True:
+                while following < len(text) and text[following] in ' \t\n\r':
+                    following += 1
+                if following < len(text) or not extend():
+                    break
+            position = following
+            if position >= limit:
+                break
+
+        return start, start + len(text[:following].encode('utf-8')), closed, records, errors
@@ -0,0 +1,118 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class ReadWriteLock:
+    """
+    A lock that lets many threads read at once while writers get exclusive access.
+    Waiting writers block new readers, so a steady stream of readers can't starve them.
+    Both sides are reentrant: a thread may read or write again while it holds the lock, and the
+    writing thread may also read. Upgrading a read to a write is not possible and raises RuntimeError.
+    """
+
+    def __init__(self):
+        """
+        Initializes an unlocked lock.
+        """
+        self._condition = threading.Condition(threading.Lock())
+        # Number of threads holding the read lock, the writing thread and how many times it holds the lock
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        # How many times the current thread holds the read lock
+        self._local = threading.local()
+
+    def acquire_read(self):
+        """
+        Acquires the lock for reading, waiting while a writer holds or waits for it.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0 and self._writer != threading.get_ident():
+            with self._condition:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+            self._local.counted = True
+        elif depth == 0:
+            # The writing thread reads under its write lock
+            self._local.counted = False
+        self._local.depth = depth + 1
+
+    def release_read(self):
+        """
+        Releases the lock acquired with acquire_read.
+
+        Raises:
+            RuntimeError: If the current thread doesn't hold the read lock.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            raise RuntimeError("Releasing a read lock that is not held")
+        self._local.depth = depth - 1
+        if depth == 1 and self._local.counted:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Acquires the lock for writing, waiting until no other thread reads or writes.
+
+        Raises:
+            RuntimeError: If the current thread holds the read lock but not the write lock.
+        """
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if getattr(self._local, 'depth', 0):
+                raise RuntimeError("Can't upgrade a read lock to a write lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        """
+        Releases the lock acquired with acquire_write.
+
+        Raises:
+            RuntimeError: If the current thread doesn't hold the write lock.
+        """
+        with self._condition:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("Releasing a write lock that is not held")
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """
+        Holds the lock for reading within a with statement.
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """
+        Holds the lock for writing within a with statement.
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
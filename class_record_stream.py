@@ -0,0 +1,221 @@
+import csv
+import json
+import os
+from typing import Iterable, Iterator, TextIO
+from class_book import Book
+from class_compression import Compression
+
+
+class RecordError(ValueError):
+    """
+    Raised when a record of a CSV or JSON Lines file doesn't describe a valid book.
+    """
+
+
+class RecordStream:
+    """
+    Streaming readers and writers of books in CSV and JSON Lines files.
+    Readers parse and validate one record at a time and writers write one book at a time,
+    so files of any size are processed in bounded memory.
+
+    Both formats have the fields of Book.to_dict. The title, author and year are required; a missing
+    ID is generated and a missing status means "в наличии". In CSV the first row holds the field names
+    and the status is written as true/false, but "в наличии"/"выдана", yes/no and 1/0 are accepted too.
+    """
+
+    FIELDS = ('id', 'title', 'author', 'year', 'status')
+    # File extension -> format
+    FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+    STATUSES = {'true': True, '1': True, 'yes': True, 'в наличии': True,
+                'false': False, '0': False, 'no': False, 'выдана': False}
+    # Number of rows joined into a single write
+    WRITE_CHUNK_SIZE = 1000
+
+    @classmethod
+    def detect_format(cls, path: str) -> str:
+        """
+        Detects the format of a file from its extension, the one before the extension of a compression
+        (e.g. "books.csv.gz" is a CSV file).
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            str: "csv" or "jsonl".
+
+        Raises:
+            ValueError: If the extension is not one of FORMATS.
+        """
+        extension = os.path.splitext(Compression.strip_extension(path))[1].lower()
+        if extension not in cls.FORMATS:
+            raise ValueError(f"Unknown file format {extension!r}, expected one of {', '.join(cls.FORMATS)}")
+        return cls.FORMATS[extension]
+
+    @classmethod
+    def book_from_record(cls, record: dict) -> Book:
+        """
+        Validates a record and builds its book.
+
+        Args:
+            record (dict): The fields of the book.
+
+        Returns:
+            Book: The new book.
+
+        Raises:
+            RecordError: If a required field is missing or a field has an invalid value.
+        """
+        for field in ('title', 'author'):
+            if not isinstance(record.get(field), str) or not record[field].strip():
+                raise RecordError(f"Missing or invalid field {field!r}")
+        year = record.get('year')
+        if isinstance(year, bool) or not isinstance(year, (str, int)) or not str(year).strip():
+            raise RecordError("Missing or invalid field 'year'")
+
+        status = record.get('status')
+        if status is None or status == '':
+            status = True
+        elif isinstance(status, str):
+            status = cls.STATUSES.get(status.strip().lower())
+            if status is None:
+                raise RecordError(f"Invalid status {record['status']!r}")
+        elif not isinstance(status, bool):
+            raise RecordError(f"Invalid status {status!r}")
+
+        book_id = record.get('id') or None
+        if book_id is not None and not isinstance(book_id, str):
+            raise RecordError("Invalid field 'id'")
+        return Book(record['title'], record['author'], year.strip() if isinstance(year, str) else year,
+                    status, book_id)
+
+    @classmethod
+    def read_csv(cls, f: TextIO) -> Iterator[tuple[int, Book | RecordError]]:
+        """
+        Reads books from a CSV file whose first row holds the field names.
+
+        Args:
+            f (TextIO): The file, opened with newline=''.
+
+        Yields:
+            tuple[int, Book | RecordError]: The line number of every record and its book,
+            or the error that made the record invalid.
+        """
+        # A plain reader returns the blank lines DictReader would skip, so the line of every record is known
+        reader = csv.reader(f)
+        fieldnames = []
+        while not fieldnames:
+            try:
+                fieldnames = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                yield reader.line_num, RecordError(str(e))
+                return
+        missing = [field for field in ('title', 'author', 'year') if field not in fieldnames]
+        if missing:
+            yield max(reader.line_num, 1), RecordError(f"Missing columns {', '.join(missing)}")
+            return
+        while True:
+            # The record starts on the line after the previous row, it may span several lines
+            start = reader.line_num + 1
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield start, RecordError(str(e))
+                continue
+            if not row:
+                continue
+            try:
+                if len(row) > len(fieldnames):
+                    raise RecordError("Too many values")
+                record = dict(zip(fieldnames, row))
+                yield start, cls.book_from_record(record)
+            except RecordError as e:
+                yield start, e
+
+    @classmethod
+    def read_jsonl(cls, f: TextIO) -> Iterator[tuple[int, Book | RecordError]]:
+        """
+        Reads books from a JSON Lines file, one JSON object per line. Empty lines are skipped.
+
+        Args:
+            f (TextIO): The file.
+
+        Yields:
+            tuple[int, Book | RecordError]: The line number of every record and its book,
+            or the error that made the record invalid.
+        """
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise RecordError(f"Invalid JSON: {e}")
+                if not isinstance(record, dict):
+                    raise RecordError("Record must be a JSON object")
+                yield line_number, cls.book_from_record(record)
+            except RecordError as e:
+                yield line_number, e
+
+    @classmethod
+    def read(cls, f: TextIO, file_format: str) -> Iterator[tuple[int, Book | RecordError]]:
+        """
+        Reads books from a file in the given format, see read_csv and read_jsonl.
+        """
+        return cls.read_csv(f) if file_format == 'csv' else cls.read_jsonl(f)
+
+    @classmethod
+    def write_csv(cls, f: TextIO, books: Iterable[Book]) -> int:
+        """
+        Writes books to a CSV file, the field names first.
+
+        Args:
+            f (TextIO): The file, opened with newline=''.
+            books (Iterable[Book]): The books to write.
+
+        Returns:
+            int: The number of written books.
+        """
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(cls.FIELDS)
+        count = 0
+        for book in books:
+            writer.writerow((book.id, book.title, book.author, book.year, 'true' if book.status else 'false'))
+            count += 1
+        return count
+
+    @classmethod
+    def write_jsonl(cls, f: TextIO, books: Iterable[Book]) -> int:
+        """
+        Writes books to a JSON Lines file, one Book.to_dict object per line.
+
+        Args:
+            f (TextIO): The file.
+            books (Iterable[Book]): The books to write.
+
+        Returns:
+            int: The number of written books.
+        """
+        count = 0
+        chunk = []
+        for book in books:
+            chunk.append(json.dumps(book.to_dict(), ensure_ascii=False))
+            if len(chunk) >= cls.WRITE_CHUNK_SIZE:
+                f.write('\n'.join(chunk) + '\n')
+                count += len(chunk)
+                chunk.clear()
+        if chunk:
+            f.write('\n'.join(chunk) + '\n')
+            count += len(chunk)
+        return count
+
+    @classmethod
+    def write(cls, f: TextIO, books: Iterable[Book], file_format: str) -> int:
+        """
+        Writes books to a file in the given format, see write_csv and write_jsonl.
+        """
+        return cls.write_csv(f, books) if file_format == 'csv' else cls.write_jsonl(f, books)
@@ -0,0 +1,202 @@
+import json
+import socket
+import threading
+from typing import Optional
+from class_book import Book
+from class_library import Library
+
+
+class RemoteError(Exception):
+    """
+    Raised when a library server answers a request with an error.
+    """
+
+
+class RemoteLibrary:
+    """
+    A client of the change feed of a library served by LibraryServer, the primary followed by a remote Replica.
+    Requests go over a single connection, opened on the first request and reopened after a failure.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None,
+                 timeout: Optional[float] = 30.0):
+        """
+        Initializes the client, the connection is opened on the first request.
+
+        Args:
+            host (str, optional): The host of the server.
+            port (int, optional): The TCP port of the server.
+            unix_path (Optional[str], optional): Path of the Unix socket of the server to connect to instead of TCP.
+            timeout (Optional[float], optional): Seconds to wait for the server, None to wait forever.
+        """
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Closes the connection if it is open.
+        """
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = self._file = None
+
+    def _connect(self):
+        """
+        Opens the connection to the server.
+        """
+        if self.unix_path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(self.unix_path)
+        else:
+            self._socket = socket.create_connection((self.host, self.port), self.timeout)
+        self._file = self._socket.makefile('rwb')
+
+    def _request(self, command: str, **parameters):
+        """
+        Sends a request to the server and returns the result of the response.
+
+        Raises:
+            OSError: If the server can't be reached or closes the connection.
+            RemoteError: If the server answers with an error.
+        """
+        if self._socket is None:
+            self._connect()
+        try:
+            self._file.write(json.dumps({"command": command, **parameters}).encode('utf-8') + b'\n')
+            self._file.flush()
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("Connection closed by the server")
+            response = json.loads(line)
+        except (OSError, ValueError):
+            # The connection can't be trusted to be in sync with the server anymore
+            self.close()
+            raise
+        if not response.get("ok"):
+            raise RemoteError(response.get("error"))
+        return response["result"]
+
+    def changes_since(self, feed_id: str, sequence: int, limit: Optional[int] = None) -> Optional[dict]:
+        """
+        Returns the changes a replica hasn't applied yet, see Library.changes_since.
+        """
+        parameters = {"feed": feed_id, "since": sequence}
+        if limit is not None:
+            parameters["limit"] = limit
+        result = self._request("changes", **parameters)
+        return None if result["changes"] is None else result
+
+    def replication_snapshot(self) -> dict:
+        """
+        Returns every book with the position of the change feed, see Library.replication_snapshot.
+        """
+        return self._request("snapshot")
+
+
+class Replica:
+    """
+    A read-only copy of a primary library kept in sync through the change feed of the primary.
+
+    A sync only transfers and applies the changes made since the previous one, so it costs as much as
+    the number of changes instead of the size of the library. The whole library is only transferred
+    when the replica starts, when the primary started a new feed (it was restarted or reloaded its database),
+    or when the replica fell further behind than the feed of the primary retains.
+
+    The primary is a Library with a change feed in the same process, or a RemoteLibrary served by LibraryServer.
+    A snapshot replaces the library of the replica with a new one, so readers should get it from the replica
+    every time instead of keeping it.
+    """
+
+    # Number of changes requested at once
+    BATCH_SIZE = 1000
+
+    def __init__(self, primary: Library | RemoteLibrary, library_class: type = Library):
+        """
+        Initializes an empty replica, the first sync transfers the whole library.
+
+        Args:
+            primary (Library | RemoteLibrary): The library to follow.
+            library_class (type, optional): The class of the library of the replica, e.g. ConcurrentLibrary
+                                            to serve it to several threads. Defaults to Library.
+        """
+        self.primary = primary
+        self.library_class = library_class
+        self.library = library_class()
+        # The position of the replica: the feed it follows and the sequence number of the last change applied
+        self.feed_id = None
+        self.sequence = 0
+        # Number of times the whole library was transferred
+        self.snapshots = 0
+
+    def sync(self) -> Optional[int]:
+        """
+        Applies the changes made to the primary since the last sync, falling back to a snapshot
+        of the whole library if the changes aren't available anymore.
+
+        Returns:
+            int or None: The number of changes applied, not counting the books of a snapshot,
+            or None if the primary couldn't be reached (the replica keeps its state and position then).
+        """
+        applied = 0
+        snapshot_taken = False
+        try:
+            while True:
+                batch = None
+                if self.feed_id is not None:
+                    batch = self.primary.changes_since(self.feed_id, self.sequence, self.BATCH_SIZE)
+                if batch is None:
+                    if snapshot_taken:
+                        # The primary changes faster than a snapshot is applied, catch up on the next sync
+                        break
+                    self._load_snapshot(self.primary.replication_snapshot())
+                    snapshot_taken = True
+                    continue
+                for sequence, record in batch['changes']:
+                    self.library.apply_journal_record(record)
+                    self.sequence = sequence
+                    applied += 1
+                if not batch['changes'] or self.sequence >= batch['sequence']:
+                    break
+        except (OSError, RemoteError, ValueError, KeyError) as e:
+            print(f"Error syncing replica: {e}")
+            return None
+        return applied
+
+    def _load_snapshot(self, snapshot: dict):
+        """
+        Replaces the library of the replica with a snapshot of the primary.
+
+        Args:
+            snapshot (dict): The snapshot, see Library.replication_snapshot.
+        """
+        library = self.library_class()
+        library.add_books(Book.from_dict(book) for book in snapshot['books'])
+        self.library = library
+        self.feed_id = snapshot['feed']
+        self.sequence = snapshot['sequence']
+        self.snapshots += 1
+
+    def follow(self, interval: float = 1.0, stop: Optional[threading.Event] = None):
+        """
+        Syncs the replica every interval seconds until stopped, e.g. in a thread of its own.
+
+        Args:
+            interval (float, optional): Seconds between two syncs.
+            stop (Optional[threading.Event], optional): Set to stop following. Defaults to following forever.
+        """
+        stop = threading.Event() if stop is None else stop
+        while not stop.is_set():
+            self.sync()
+            stop.wait(interval)
@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+from class_search_index import SearchIndex
+
+
+class SearchCache:
+    """
+    A bounded least-recently-used cache of search results.
+    Results are cached as lists of book IDs under a key whose first item is the lowercased prompt.
+    A substring search result only depends on the books whose title, author or year contain the
+    prompt, so adding or removing a book only evicts the cached prompts matching that book.
+    The cache can be shared between threads, every operation holds an internal lock.
+    """
+
+    # Batches larger than this evict every cached result instead of matching the prompts against every book
+    BULK_CLEAR_SIZE = 1000
+
+    def __init__(self, capacity: int = 128):
+        """
+        Initializes an empty cache.
+
+        Args:
+            capacity (int, optional): The maximum number of cached results.
+
+        Raises:
+            ValueError: If the capacity is not positive.
+        """
+        if capacity <= 0:
+            raise ValueError("Search cache capacity must be positive")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        # Key -> list of book IDs, from the least to the most recently used
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of cached results.
+        """
+        return len(self._results)
+
+    def __str__(self) -> str:
+        """
+        Returns the size of the cache and its hit and miss counters.
+        """
+        return f"Кэш поиска: {len(self)}/{self.capacity}, попаданий: {self.hits}, промахов: {self.misses}"
+
+    def get(self, key: tuple[str, Hashable]) -> Optional[list[str]]:
+        """
+        Returns a cached result and marks it as the most recently used.
+
+        Args:
+            key (tuple[str, Hashable]): The lowercased prompt followed by any other search parameters.
+
+        Returns:
+            list[str] or None: The cached IDs, or None if the result is not cached.
+        """
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: tuple[str, Hashable], book_ids: list[str]):
+        """
+        Caches a result, evicting the least recently used one if the cache is full.
+
+        Args:
+            key (tuple[str, Hashable]): The lowercased prompt followed by any other search parameters.
+            book_ids (list[str]): The IDs of the found books.
+        """
+        with self._lock:
+            self._results[key] = book_ids
+            self._results.move_to_end(key)
+            if len(self._results) > self.capacity:
+                self._results.popitem(last=False)
+
+    def invalidate(self, book):
+        """
+        Evicts the cached results of the prompts matching a book that was added or removed.
+        Status changes don't affect search results, so they don't need to be reported.
+
+        Args:
+            book (Book): The added or removed book.
+        """
+        fields = SearchIndex.searchable_fields(book)
+        with self._lock:
+            stale = [key for key in self._results if any(key[0] in field for field in fields)]
+            for key in stale:
+                del self._results[key]
+
+    def invalidate_many(self, books: list):
+        """
+        Evicts the cached results of the prompts matching any of many added or removed books,
+        matching every cached prompt against the batch once. Large batches evict every result.
+
+        Args:
+            books (list[Book]): The added or removed books.
+        """
+        if not books:
+            return
+        if len(books) > self.BULK_CLEAR_SIZE:
+            self.clear()
+            return
+        # Prompts never contain the separator, so a prompt only matches inside a single field
+        text = '\0'.join(field for book in books for field in SearchIndex.searchable_fields(book))
+        with self._lock:
+            stale = [key for key in self._results if key[0] in text]
+            for key in stale:
+                del self._results[key]
+
+    def clear(self):
+        """
+        Evicts every cached result. The hit and miss counters are kept.
+        """
+        with self._lock:
+            self._results.clear()
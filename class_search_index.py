@@ -0,0 +1,136 @@
+from collections import defaultdict
+from typing import Optional
+
+
+class SearchIndex:
+    """
+    An inverted trigram index over the searchable fields of books (title, author and year).
+    Maps every lowercased three-character substring to the IDs of the books containing it,
+    so that a substring query only has to check the books sharing all of its trigrams.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        # Trigram -> set of book IDs whose title, author or year contains it
+        self._postings = defaultdict(set)
+        # Book ID -> insertion ordinal, used to return candidates in insertion order
+        self._order = {}
+        self._counter = 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of indexed books.
+        """
+        return len(self._order)
+
+    @staticmethod
+    def searchable_fields(book) -> tuple[str, str, str]:
+        """
+        Returns the lowercased fields of a book that take part in substring search.
+
+        Args:
+            book (Book): The book to get the fields of.
+
+        Returns:
+            tuple[str, str, str]: Lowercased title, author and year.
+        """
+        return book.title.lower(), book.author.lower(), str(book.year).lower()
+
+    @classmethod
+    def _grams(cls, text: str) -> set[str]:
+        """
+        Splits a string into the set of its trigrams.
+
+        Args:
+            text (str): The lowercased string to split.
+
+        Returns:
+            set[str]: All substrings of length GRAM_SIZE of the string.
+        """
+        size = cls.GRAM_SIZE
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def _book_grams(self, book) -> set[str]:
+        """
+        Returns the trigrams a book is indexed under.
+        They are recomputed on removal instead of being stored, which would cost a set per book.
+        """
+        # Splitting the joined fields takes a single pass. The extra trigrams spanning two fields
+        # only add candidates, which are verified by the caller anyway
+        return self._grams('\0'.join(self.searchable_fields(book)))
+
+    def add(self, book):
+        """
+        Indexes a book under the trigrams of its title, author and year.
+        The book's searchable fields must not change while it is indexed.
+
+        Args:
+            book (Book): The book to index.
+        """
+        book_id = book.id
+        postings = self._postings
+        for gram in self._book_grams(book):
+            postings[gram].add(book_id)
+        self._order[book_id] = self._counter
+        self._counter += 1
+
+    def remove(self, book):
+        """
+        Removes a book from the index. Books that are not indexed are ignored.
+
+        Args:
+            book (Book): The book to remove.
+        """
+        book_id = book.id
+        if self._order.pop(book_id, None) is None:
+            return
+        for gram in self._book_grams(book):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(book_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def clear(self):
+        """
+        Removes all books from the index.
+        """
+        self._postings.clear()
+        self._order.clear()
+
+    def candidates(self, prompt: str) -> Optional[list[str]]:
+        """
+        Returns the IDs of the books that may contain the query as a substring of one of their fields.
+        The result is a superset of the real matches and has to be verified by the caller.
+
+        Args:
+            prompt (str): The lowercased search query.
+
+        Returns:
+            list[str] or None: Candidate IDs in insertion order, or None if the query is shorter than a
+            trigram and the index can't narrow the search down.
+        """
+        grams = self._grams(prompt)
+        if not grams:
+            return None
+
+        # Intersecting the smallest postings first keeps the intermediate sets small
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                return []
+
+        return sorted(result, key=self._order.__getitem__)
@@ -0,0 +1,222 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class StatusIndex:
+    """
+    An index of book IDs by availability status.
+    Keeps an insertion-ordered set of IDs for available and for checked out books.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        # Dictionaries are used as ordered sets, the values are unused
+        self._ids = {True: {}, False: {}}
+
+    def add(self, book_id: str, status: bool):
+        """
+        Indexes a book under its status.
+
+        Args:
+            book_id (str): The ID of the book.
+            status (bool): The status of the book.
+        """
+        self._ids[bool(status)][book_id] = None
+
+    def remove(self, book_id: str, status: bool):
+        """
+        Removes a book from the index.
+
+        Args:
+            book_id (str): The ID of the book.
+            status (bool): The status the book was indexed under.
+        """
+        self._ids[bool(status)].pop(book_id, None)
+
+    def set_status(self, book_id: str, status: bool):
+        """
+        Moves a book to the given status.
+
+        Args:
+            book_id (str): The ID of the book.
+            status (bool): The new status of the book.
+        """
+        status = bool(status)
+        self._ids[not status].pop(book_id, None)
+        self._ids[status][book_id] = None
+
+    def add_many(self, books: list[tuple[str, bool]]):
+        """
+        Indexes many books under their statuses.
+
+        Args:
+            books (list[tuple[str, bool]]): (book ID, status) pairs.
+        """
+        available, checked_out = self._ids[True], self._ids[False]
+        for book_id, status in books:
+            (available if status else checked_out)[book_id] = None
+
+    def remove_many(self, books: list[tuple[str, bool]]):
+        """
+        Removes many books from the index.
+
+        Args:
+            books (list[tuple[str, bool]]): (book ID, status the book was indexed under) pairs.
+        """
+        available, checked_out = self._ids[True], self._ids[False]
+        for book_id, status in books:
+            (available if status else checked_out).pop(book_id, None)
+
+    def set_statuses(self, books: list[tuple[str, bool]]):
+        """
+        Moves many books to the given statuses, in the order of the pairs.
+
+        Args:
+            books (list[tuple[str, bool]]): (book ID, new status) pairs.
+        """
+        available, checked_out = self._ids[True], self._ids[False]
+        for book_id, status in books:
+            if status:
+                checked_out.pop(book_id, None)
+                available[book_id] = None
+            else:
+                available.pop(book_id, None)
+                checked_out[book_id] = None
+
+    def ids(self, status: bool) -> list[str]:
+        """
+        Returns the IDs of the books with the given status.
+
+        Args:
+            status (bool): True for available books, False for checked out ones.
+
+        Returns:
+            list[str]: The IDs in the order the books got the status.
+        """
+        return list(self._ids[bool(status)])
+
+    def count(self, status: bool) -> int:
+        """
+        Returns the number of books with the given status.
+        """
+        return len(self._ids[bool(status)])
+
+
+class YearIndex:
+    """
+    An index of book IDs by publication year, answering range queries with a binary search
+    over the sorted distinct years. Books whose year is not a plain number are not indexed.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        # Sorted distinct years, and the insertion-ordered IDs of the books of every year
+        self._years = []
+        self._buckets = {}
+        self._book_years = {}
+
+    def __len__(self) -> int:
+        """
+        Returns the number of indexed books.
+        """
+        return len(self._book_years)
+
+    def add(self, book_id: str, year: int | None):
+        """
+        Indexes a book under its publication year.
+
+        Args:
+            book_id (str): The ID of the book.
+            year (int | None): The year the book was published, books without a numeric year are skipped.
+        """
+        if year is None:
+            return
+        bucket = self._buckets.get(year)
+        if bucket is None:
+            bucket = self._buckets[year] = {}
+            insort(self._years, year)
+        bucket[book_id] = None
+        self._book_years[book_id] = year
+
+    def remove(self, book_id: str):
+        """
+        Removes a book from the index. Books that are not indexed are ignored.
+
+        Args:
+            book_id (str): The ID of the book.
+        """
+        year = self._book_years.pop(book_id, None)
+        if year is None:
+            return
+        bucket = self._buckets[year]
+        del bucket[book_id]
+        if not bucket:
+            del self._buckets[year]
+            del self._years[bisect_left(self._years, year)]
+
+    def add_many(self, books: list[tuple[str, int | None]]):
+        """
+        Indexes many books under their publication years, sorting the distinct years once.
+
+        Args:
+            books (list[tuple[str, int | None]]): (book ID, year) pairs, books without a numeric year are skipped.
+        """
+        buckets = self._buckets
+        book_years = self._book_years
+        new_years = []
+        for book_id, year in books:
+            if year is None:
+                continue
+            bucket = buckets.get(year)
+            if bucket is None:
+                bucket = buckets[year] = {}
+                new_years.append(year)
+            bucket[book_id] = None
+            book_years[book_id] = year
+        if new_years:
+            self._years.extend(new_years)
+            self._years.sort()
+
+    def remove_many(self, book_ids: list[str]):
+        """
+        Removes many books from the index, dropping the emptied years in one pass.
+        Books that are not indexed are ignored.
+
+        Args:
+            book_ids (list[str]): The IDs of the books.
+        """
+        buckets = self._buckets
+        book_years = self._book_years
+        emptied = False
+        for book_id in book_ids:
+            year = book_years.pop(book_id, None)
+            if year is None:
+                continue
+            bucket = buckets[year]
+            del bucket[book_id]
+            if not bucket:
+                del buckets[year]
+                emptied = True
+        if emptied:
+            self._years = [year for year in self._years if year in buckets]
+
+    def ids_between(self, start: int, end: int) -> list[str]:
+        """
+        Returns the IDs of the books published in the given range of years, in O(log N + k).
+
+        Args:
+            start (int): The first year of the range.
+            end (int): The last year of the range, inclusive.
+
+        Returns:
+            list[str]: The IDs ordered by year, books of the same year in insertion order.
+        """
+        low = bisect_left(self._years, start)
+        high = bisect_right(self._years, end)
+        ids = []
+        for year in self._years[low:high]:
+            ids.extend(self._buckets[year])
+        return ids
@@ -0,0 +1,398 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from class_book import Book
+from class_binary_snapshot import BinarySnapshot
+from class_compression import Compression
+from class_concurrent_library import ConcurrentLibrary
+from class_sqlite_library import SqliteLibrary
+from class_metrics import metrics
+
+
+class RequestError(Exception):
+    """
+    Raised when a client request can't be served, the message is sent back to the client.
+    """
+
+
+class LibraryServer:
+    """
+    An asyncio server giving network clients the operations of the console application over
+    a line-delimited JSON protocol.
+
+    Every request is a JSON object on its own line with a "command" and its parameters, and an
+    optional "request_id" that is echoed back. Every response is a JSON object on its own line:
+    {"ok": true, "result": ...} or {"ok": false, "error": "..."}. The commands are:
+
+    - list: {"sort_by": "title"|"author"|"year", "offset": int, "limit": int} -> books and their total number
+    - load: {"path": str} -> replaces the books of the library with a JSON database, a binary snapshot
+      or an SQLite database
+    - save: {"path": str, "level": int} -> saves to a binary snapshot or an SQLite database if the path has their
+      extension, JSON otherwise, compressed with the given or default level if the path ends with .gz, .bz2 or .xz
+    - add: {"title": str, "author": str, "year": str|int} -> the ID of the new book,
+      or {"books": [{"title", "author", "year"}, ...]} -> a per-book summary
+    - remove: {"id": str} -> whether the book was removed
+    - status: {"id": str, "status": "в наличии"|"выдана"}
+    - search: {"query": str, "limit": int} -> the best matches, falling back to the typo-tolerant search
+    - metrics: {} -> the statistics of the library operations, if the server runs with metrics enabled
+    - changes: {"feed": str, "since": int, "limit": int} -> the changes a replica hasn't applied yet,
+      or {"changes": null} if it has to start over from a snapshot, see Library.changes_since
+    - snapshot: {} -> every book with the position of the change feed, see Library.replication_snapshot
+
+    The library is a ConcurrentLibrary shared by every client, recording its changes in a change feed
+    followed by replicas (see class_replica.Replica). Loading a database starts a new feed. The paths of load and
+    save are relative to the data directory of the server, and paths leading out of it are rejected. Library calls run in worker threads so
+    the event loop never waits for a lock, and slow commands (load, save, bulk add) have their own
+    workers, so they never hold up the quick ones.
+    """
+
+    # Maximum size of a request line in bytes
+    MAX_REQUEST_SIZE = 1 << 20
+    # Number of connections the OS queues before they are accepted
+    BACKLOG = 1024
+    # Number of books returned by list and search when the request doesn't give a limit
+    DEFAULT_LIMIT = 100
+    # Worker threads for quick and for slow commands
+    WORKERS = 8
+    SLOW_WORKERS = 2
+    # Number of search results kept in the library's search cache
+    SEARCH_CACHE_SIZE = 256
+    # Number of changes retained by the change feed of the library
+    CHANGE_FEED_SIZE = 10000
+    # Number of changes returned by changes when the request doesn't give a limit
+    DEFAULT_CHANGES_LIMIT = 1000
+
+    def __init__(self, library: Optional[ConcurrentLibrary] = None, data_dir: Optional[str] = None):
+        """
+        Initializes the server over a shared library.
+
+        Args:
+            library (Optional[ConcurrentLibrary], optional): The library to serve. Defaults to an empty one.
+            data_dir (Optional[str], optional): The only directory load and save may access.
+                                                Defaults to the current directory.
+        """
+        self.library = ConcurrentLibrary() if library is None else library
+        self.data_dir = os.path.realpath(os.getcwd() if data_dir is None else data_dir)
+        if self.library.search_cache is None:
+            self.library.enable_search_cache(self.SEARCH_CACHE_SIZE)
+        if self.library.change_feed is None:
+            self.library.enable_change_feed(self.CHANGE_FEED_SIZE)
+        self._executor = ThreadPoolExecutor(self.WORKERS, thread_name_prefix="library")
+        self._slow_executor = ThreadPoolExecutor(self.SLOW_WORKERS, thread_name_prefix="library-slow")
+        self._server = None
+        self._commands = {
+            "list": (self._list, False),
+            "load": (self._load, True),
+            "save": (self._save, True),
+            "add": (self._add, False),
+            "remove": (self._remove, False),
+            "status": (self._status, False),
+            "search": (self._search, False),
+            "metrics": (self._metrics, False),
+            "changes": (self._changes, False),
+            "snapshot": (self._snapshot, True),
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None):
+        """
+        Starts listening on a TCP port, or on a Unix socket if its path is given.
+
+        Args:
+            host (str, optional): The interface to listen on.
+            port (int, optional): The TCP port, 0 picks a free one.
+            unix_path (Optional[str], optional): Path of the Unix socket to listen on instead of TCP.
+        """
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._serve_client, unix_path,
+                                                           limit=self.MAX_REQUEST_SIZE, backlog=self.BACKLOG)
+        else:
+            self._server = await asyncio.start_server(self._serve_client, host, port,
+                                                      limit=self.MAX_REQUEST_SIZE, backlog=self.BACKLOG)
+
+    @property
+    def addresses(self) -> list:
+        """
+        The addresses the server listens on.
+        """
+        return [sock.getsockname() for sock in self._server.sockets] if self._server else []
+
+    async def serve_forever(self):
+        """
+        Serves clients until the server is closed or the task is cancelled.
+        """
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops accepting clients and shuts the worker threads down.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+        self._slow_executor.shutdown(wait=False)
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers the requests of a client one line at a time until it disconnects.
+        """
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line is longer than MAX_REQUEST_SIZE, the stream can't be resynchronized
+                    writer.write(self._encode({"ok": False, "error": "Request is too long"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self._encode(await self.handle_request(line)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _encode(response: dict) -> bytes:
+        """
+        Encodes a response as a line of JSON.
+        """
+        return json.dumps(response, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    async def handle_request(self, line: bytes | str) -> dict:
+        """
+        Parses a request line and runs its command.
+
+        Args:
+            line (bytes | str): The request, a JSON object.
+
+        Returns:
+            dict: The response.
+        """
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                raise RequestError(f"Invalid JSON: {e}")
+            if not isinstance(request, dict):
+                raise RequestError("Request must be a JSON object")
+            request_id = request.get("request_id")
+            command = self._commands.get(request.get("command"))
+            if command is None:
+                raise RequestError(f"Unknown command {request.get('command')!r}, "
+                                   f"expected one of {', '.join(self._commands)}")
+            handler, slow = command
+            if request.get("command") == "add" and "books" in request:
+                slow = True
+            executor = self._slow_executor if slow else self._executor
+            result = await asyncio.get_running_loop().run_in_executor(executor, handler, request)
+            response = {"ok": True, "result": result}
+        except RequestError as e:
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            response = {"ok": False, "error": f"Unexpected error: {e}"}
+        if request_id is not None:
+            response["request_id"] = request_id
+        return response
+
+    @staticmethod
+    def _param(request: dict, name: str, kind: type | tuple, default=None, required: bool = False):
+        """
+        Returns a parameter of a request, checking its type.
+
+        Raises:
+            RequestError: If a required parameter is missing or a parameter has a wrong type.
+        """
+        if name not in request:
+            if required:
+                raise RequestError(f"Missing parameter {name!r}")
+            return default
+        value = request[name]
+        if not isinstance(value, kind) or isinstance(value, bool) and kind is int:
+            raise RequestError(f"Invalid parameter {name!r}")
+        return value
+
+    def _limit(self, request: dict) -> int:
+        """
+        Returns the limit of a list or search request.
+        """
+        limit = self._param(request, "limit", int, self.DEFAULT_LIMIT)
+        if limit < 0:
+            raise RequestError("Invalid parameter 'limit'")
+        return limit
+
+    def _list(self, request: dict) -> dict:
+        """
+        Returns a page of the books of the library.
+        """
+        offset = self._param(request, "offset", int, 0)
+        if offset < 0:
+            raise RequestError("Invalid parameter 'offset'")
+        try:
+            books = self.library.books_page(self._param(request, "sort_by", str), offset, self._limit(request))
+        except ValueError as e:
+            raise RequestError(str(e))
+        return {"books": [book.to_dict() for book in books], "total": len(self.library.books)}
+
+    def _path(self, request: dict) -> str:
+        """
+        Returns the path of a load or save request resolved within the data directory.
+        Symbolic links are resolved first, so none of them leads out of the directory.
+
+        Raises:
+            RequestError: If the path is missing or lies outside the data directory.
+        """
+        path = self._param(request, "path", str, required=True)
+        resolved = os.path.realpath(os.path.join(self.data_dir, path))
+        if os.path.commonpath([resolved, self.data_dir]) != self.data_dir:
+            raise RequestError(f"Path {path} is outside the data directory")
+        return resolved
+
+    def _load(self, request: dict) -> dict:
+        """
+        Replaces the books of the library with the content of a database file.
+        The file is read without any lock, then the books are swapped in place, see ConcurrentLibrary.replace_contents.
+        """
+        path = self._path(request)
+        if not os.path.exists(path):
+            raise RequestError(f"File {request['path']} does not exist")
+        library = type(self.library).load(path)
+        if library is None:
+            raise RequestError(f"Can't load {request['path']}")
+        self.library.replace_contents(library)
+        return {"books": len(library.books)}
+
+    def _save(self, request: dict) -> dict:
+        """
+        Saves the library in the format and compression chosen by the file extensions.
+        """
+        path = self._path(request)
+        level = self._param(request, "level", int)
+        if Compression.strip_extension(path).endswith(BinarySnapshot.EXTENSION):
+            saved = self.library.dump_to_binary(path, level)
+        elif path.endswith(SqliteLibrary.EXTENSION):
+            saved = self.library.dump_to_sqlite(path)
+        else:
+            saved = self.library.dump_to_json(path, compression_level=level)
+        if not saved:
+            raise RequestError(f"Can't save the library to {request['path']}")
+        return {"path": path}
+
+    def _new_book(self, fields: dict) -> Book:
+        """
+        Builds a new book from the fields given by a client.
+        """
+        if not isinstance(fields, dict):
+            raise RequestError("Every book must be a JSON object")
+        return Book(self._param(fields, "title", str, required=True),
+                    self._param(fields, "author", str, required=True),
+                    self._param(fields, "year", (str, int), required=True))
+
+    def _add(self, request: dict) -> dict:
+        """
+        Adds a book, or every book of the "books" list at once.
+        """
+        if "books" in request:
+            books = [self._new_book(fields) for fields in self._param(request, "books", list)]
+            return self.library.add_books(books).to_dict()
+        book = self._new_book(request)
+        self.library.add_book(book)
+        return {"id": book.id}
+
+    def _remove(self, request: dict) -> dict:
+        """
+        Removes a book by its ID.
+        """
+        book_id = self._param(request, "id", str, required=True)
+        result = self.library.remove_books([book_id])
+        return {"removed": result.count("removed") == 1}
+
+    def _status(self, request: dict) -> dict:
+        """
+        Changes the status of a book.
+        """
+        book_id = self._param(request, "id", str, required=True)
+        status = self._param(request, "status", str, required=True)
+        outcome = self.library.change_books_status([(book_id, status)]).items[0][1]
+        if outcome == "not found":
+            raise RequestError(f"Book {book_id} not found")
+        if outcome == "invalid status":
+            raise RequestError("Unknown status, expected в наличии or выдана")
+        return {"changed": outcome == "updated"}
+
+    def _search(self, request: dict) -> dict:
+        """
+        Returns the best matches of a query, or the closest ones allowing typos if nothing matches.
+        """
+        query = self._param(request, "query", str, required=True)
+        limit = self._limit(request)
+        books = self.library.search_ranked(query, limit)
+        fuzzy = not books
+        if fuzzy:
+            books = self.library.search_fuzzy(query, limit)
+        return {"books": [book.to_dict() for book in books], "fuzzy": fuzzy}
+
+    def _metrics(self, request: dict) -> dict:
+        """
+        Returns the statistics of the library operations, see Metrics.snapshot.
+        """
+        return {"enabled": metrics.enabled, "operations": metrics.snapshot()}
+
+    def _changes(self, request: dict) -> dict:
+        """
+        Returns the changes following a position of the change feed, see Library.changes_since.
+        """
+        feed_id = self._param(request, "feed", str, required=True)
+        since = self._param(request, "since", int, required=True)
+        limit = self._param(request, "limit", int, self.DEFAULT_CHANGES_LIMIT)
+        if limit <= 0:
+            raise RequestError("Invalid parameter 'limit'")
+        changes = self.library.changes_since(feed_id, since, limit)
+        return {"changes": None} if changes is None else changes
+
+    def _snapshot(self, request: dict) -> dict:
+        """
+        Returns every book with the position of the change feed, see Library.replication_snapshot.
+        """
+        return self.library.replication_snapshot()
+
+
+def serve(library: Optional[ConcurrentLibrary] = None, host: str = "127.0.0.1", port: int = 8765,
+          unix_path: Optional[str] = None, on_start: Optional[Callable[[LibraryServer], None]] = None,
+          data_dir: Optional[str] = None):
+    """
+    Runs a LibraryServer until it is interrupted.
+
+    Args:
+        library (Optional[ConcurrentLibrary], optional): The library to serve. Defaults to an empty one.
+        host (str, optional): The interface to listen on.
+        port (int, optional): The TCP port.
+        unix_path (Optional[str], optional): Path of the Unix socket to listen on instead of TCP.
+        on_start (Optional[Callable[[LibraryServer], None]], optional): Called once the server listens.
+        data_dir (Optional[str], optional): The only directory load and save may access.
+                                            Defaults to the current directory.
+    """
+    async def run():
+        server = LibraryServer(library, data_dir)
+        await server.start(host, port, unix_path)
+        if on_start is not None:
+            on_start(server)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
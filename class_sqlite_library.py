@@ -0,0 +1,800 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from class_book import Book
+from class_binary_snapshot import BinarySnapshot
+from class_bulk_result import BulkResult
+from class_compression import Compression
+from class_fuzzy_index import FuzzyIndex
+from class_json_stream import JsonArrayReader, NotAnArrayError
+from class_library import Library
+
+
+class SqliteBooks(MutableMapping):
+    """
+    A store of books in an SQLite database that can be used in place of the Library.books dictionary.
+    Every book is a row of the books table, keyed by a unique ID and kept in insertion order by its position.
+    Statuses, numeric years and the casefolded titles and authors are indexed for the status, year and
+    sorted listing queries, and a trigram full-text table over the title, author and year narrows down
+    the searches. Book objects are built when a caller asks for one, and changes made to such a Book
+    are not written back (use the Library methods instead).
+
+    Without a transaction every change is committed on its own, inside transaction() the changes
+    are committed together.
+    """
+
+    # The first bytes of every SQLite database file
+    MAGIC = b'SQLite format 3\x00'
+    COLUMNS = "id, title, author, year, status"
+    TABLE_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS books (
+            position INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            year TEXT NOT NULL,
+            year_number INTEGER,
+            status INTEGER NOT NULL,
+            title_key TEXT NOT NULL,
+            author_key TEXT NOT NULL
+        );
+    """
+    INDEX_SCHEMA = """
+        CREATE INDEX IF NOT EXISTS books_status ON books (status);
+        CREATE INDEX IF NOT EXISTS books_year ON books (year_number);
+        CREATE INDEX IF NOT EXISTS books_title ON books (title_key);
+        CREATE INDEX IF NOT EXISTS books_author ON books (author_key);
+    """
+    INSERT = ("INSERT INTO books (id, title, author, year, year_number, status, title_key, author_key) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+    # Kept current by triggers, so the rows are only written once by the store
+    FULL_TEXT_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_text USING fts5(
+            title, author, year, content='books', content_rowid='position', tokenize='trigram');
+        CREATE TRIGGER IF NOT EXISTS books_text_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_text (rowid, title, author, year) VALUES (new.position, new.title, new.author, new.year);
+        END;
+        CREATE TRIGGER IF NOT EXISTS books_text_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_text (books_text, rowid, title, author, year)
+            VALUES ('delete', old.position, old.title, old.author, old.year);
+        END;
+        CREATE TRIGGER IF NOT EXISTS books_text_update AFTER UPDATE OF title, author, year ON books BEGIN
+            INSERT INTO books_text (books_text, rowid, title, author, year)
+            VALUES ('delete', old.position, old.title, old.author, old.year);
+            INSERT INTO books_text (rowid, title, author, year) VALUES (new.position, new.title, new.author, new.year);
+        END;
+    """
+    # Trigrams can only narrow down prompts of at least this many characters
+    TRIGRAM = 3
+    # ORDER BY clauses of the sort orders of Library._sort_key, books with equal keys in insertion order
+    ORDERS = {
+        None: "position",
+        "title": "title_key, position",
+        "author": "author_key, position",
+        "year": "year_number IS NULL, year_number, year, position",
+    }
+
+    def __init__(self, filename: str = ':memory:'):
+        """
+        Opens a database, creating the file and the tables if needed.
+        The full-text table is only used if SQLite has the FTS5 trigram tokenizer,
+        otherwise the searches scan the table.
+
+        Args:
+            filename (str, optional): Path to the database file. Defaults to a database in memory.
+
+        Raises:
+            sqlite3.Error: If the file is not an SQLite database or can't be opened.
+        """
+        # The connection is used by one thread at a time, like a Library, but not always the same one
+        self._connection = sqlite3.connect(filename, isolation_level=None, check_same_thread=False)
+        try:
+            # Exactly the lowercasing of Library.search_book, SQLite's lower() only folds ASCII
+            self._connection.create_function('python_lower', 1, lambda value: str(value).lower(), deterministic=True)
+            self._configure(self._connection, filename)
+            self._connection.executescript(self.TABLE_SCHEMA + self.INDEX_SCHEMA)
+            self.full_text = self._create_full_text()
+        except BaseException:
+            self._connection.close()
+            raise
+
+    @staticmethod
+    def _configure(connection: sqlite3.Connection, filename: str):
+        """
+        Sets up a connection to a database file for many small transactions.
+        """
+        if filename != ':memory:':
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+
+    @classmethod
+    def build(cls, filename: str, books: Iterable[Book], chunk_size: int = 10000):
+        """
+        Writes books to a new database much faster than storing them one at a time: the rows are inserted
+        in chunks within a single transaction, and the indexes and the full-text table are built once
+        all the rows are in. Books with an ID that is already taken get a new one like in Library.add_book.
+
+        Args:
+            filename (str): Path to the new database, an empty or missing file.
+            books (Iterable[Book]): The books to write, in insertion order.
+            chunk_size (int, optional): The number of rows inserted at once.
+
+        Raises:
+            sqlite3.Error: If the database can't be written.
+        """
+        connection = sqlite3.connect(filename, isolation_level=None)
+        try:
+            cls._configure(connection, filename)
+            connection.executescript(cls.TABLE_SCHEMA)
+            connection.execute("BEGIN")
+            seen = set()
+            books = iter(books)
+            while chunk := list(islice(books, chunk_size)):
+                for book in chunk:
+                    if book.id in seen:
+                        book.id = book._generate_id()
+                    seen.add(book.id)
+                connection.executemany(cls.INSERT, [cls._row(book.id, book) for book in chunk])
+            connection.commit()
+        finally:
+            connection.close()
+        # Opening the database creates the indexes and indexes the rows for full-text search
+        cls(filename).close()
+
+    @classmethod
+    def is_database(cls, path: str) -> bool:
+        """
+        Checks whether a file is an SQLite database by its header.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            bool: True if the file starts with the SQLite magic bytes.
+        """
+        with open(path, 'rb') as f:
+            return f.read(len(cls.MAGIC)) == cls.MAGIC
+
+    def _create_full_text(self) -> bool:
+        """
+        Creates the full-text table and its triggers if SQLite supports them, indexing the existing rows
+        of a database created without them.
+
+        Returns:
+            bool: True if the full-text table can be used.
+        """
+        existed = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'books_text'").fetchone() is not None
+        try:
+            self._connection.executescript(self.FULL_TEXT_SCHEMA)
+        except sqlite3.OperationalError:
+            # No FTS5 or no trigram tokenizer (before SQLite 3.34)
+            return False
+        if not existed:
+            self._connection.execute("INSERT INTO books_text (books_text) VALUES ('rebuild')")
+        return True
+
+    def close(self):
+        """
+        Closes the database. Books built before remain usable.
+        """
+        self._connection.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs a block in a transaction, committed at the end of the block and rolled back if it raises.
+        A nested block joins the transaction that is already open.
+        """
+        if self._connection.in_transaction:
+            yield
+            return
+        self._connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._connection.rollback()
+            raise
+        self._connection.commit()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of books in the store.
+        """
+        return self._connection.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+    def __contains__(self, book_id) -> bool:
+        """
+        Checks whether a book with the given ID is in the store.
+        """
+        return self._connection.execute("SELECT 1 FROM books WHERE id = ?", (book_id,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterates over the IDs of the books in insertion order.
+        """
+        for book_id, in self._connection.execute("SELECT id FROM books ORDER BY position"):
+            yield book_id
+
+    def __getitem__(self, book_id: str) -> Book:
+        """
+        Builds the book with the given ID from its row.
+        """
+        row = self._connection.execute(f"SELECT {self.COLUMNS} FROM books WHERE id = ?", (book_id,)).fetchone()
+        if row is None:
+            raise KeyError(book_id)
+        return self._materialize(row)
+
+    def __setitem__(self, book_id: str, book: Book):
+        """
+        Stores a book, overwriting the row of the book with the same ID if there is one.
+        An overwritten book keeps its position.
+        """
+        self._connection.execute(
+            f"{self.INSERT} ON CONFLICT (id) DO UPDATE SET title = excluded.title, author = excluded.author, "
+            "year = excluded.year, year_number = excluded.year_number, status = excluded.status, "
+            "title_key = excluded.title_key, author_key = excluded.author_key",
+            self._row(book_id, book))
+
+    def __delitem__(self, book_id: str):
+        """
+        Removes the book with the given ID.
+        """
+        if not self._connection.execute("DELETE FROM books WHERE id = ?", (book_id,)).rowcount:
+            raise KeyError(book_id)
+
+    def values(self) -> Iterator[Book]:
+        """
+        Builds the books in insertion order with a single query instead of looking every ID up.
+        """
+        return self._select("ORDER BY position")
+
+    @staticmethod
+    def _row(book_id: str, book: Book) -> tuple:
+        """
+        Returns the values of the INSERT statement of a book.
+        """
+        title, author = str(book.title), str(book.author)
+        year = book.year_as_int()
+        if year is not None and not -(1 << 63) <= year < 1 << 63:
+            # Doesn't fit an SQLite integer, kept like a year that is not a plain number
+            year = None
+        return (book_id, title, author, book.year, year, 1 if book.status else 0, title.casefold(), author.casefold())
+
+    @staticmethod
+    def _materialize(row: tuple) -> Book:
+        """
+        Builds a Book object from a row selected with COLUMNS.
+        """
+        book_id, title, author, year, status = row
+        return Book(title=title, author=author, year=year, status=status == 1, book_id=book_id)
+
+    def _select(self, clauses: str, parameters: tuple | dict = ()) -> Iterator[Book]:
+        """
+        Builds the books of the rows selected by the given clauses, one row at a time.
+
+        Args:
+            clauses (str): The WHERE, ORDER BY and LIMIT clauses of the query.
+            parameters (tuple | dict, optional): The positional or named parameters of the clauses.
+
+        Yields:
+            Book: The selected books.
+        """
+        materialize = self._materialize
+        for row in self._connection.execute(f"SELECT {self.COLUMNS} FROM books {clauses}", parameters):
+            yield materialize(row)
+
+    def set_status(self, book_id: str, status: bool):
+        """
+        Updates the status of a book.
+
+        Args:
+            book_id (str): The ID of the book.
+            status (bool): The new status of the book.
+        """
+        self._connection.execute("UPDATE books SET status = ? WHERE id = ?", (1 if status else 0, book_id))
+
+    def set_statuses(self, books: list[tuple[str, bool]]):
+        """
+        Updates the statuses of many books with a single statement.
+
+        Args:
+            books (list[tuple[str, bool]]): (book ID, new status) pairs.
+        """
+        self._connection.executemany("UPDATE books SET status = ? WHERE id = ?",
+                                     [(1 if status else 0, book_id) for book_id, status in books])
+
+    def count_status(self, status: bool) -> int:
+        """
+        Counts the books with the given status over the status index.
+
+        Args:
+            status (bool): True to count available books, False to count checked out ones.
+
+        Returns:
+            int: The number of books.
+        """
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM books WHERE status = ?", (1 if status else 0,)).fetchone()[0]
+
+    def books_with_status(self, status: bool) -> list[Book]:
+        """
+        Returns the books with the given status, in insertion order.
+
+        Args:
+            status (bool): True for available books, False for checked out ones.
+
+        Returns:
+            list[Book]: The matching books.
+        """
+        return list(self._select("WHERE status = ? ORDER BY position", (1 if status else 0,)))
+
+    def books_published_between(self, start: int, end: int) -> list[Book]:
+        """
+        Returns the books published in the given range of years, found with the year index and
+        ordered by year, books of the same year in insertion order.
+        Books whose year is not a plain number are never included.
+
+        Args:
+            start (int): The first year of the range.
+            end (int): The last year of the range, inclusive.
+
+        Returns:
+            list[Book]: The matching books.
+        """
+        return list(self._select("WHERE year_number BETWEEN ? AND ? ORDER BY year_number, position", (start, end)))
+
+    def search(self, prompt: str) -> Iterator[Book]:
+        """
+        Finds the books whose title, author or year contains the prompt, in insertion order.
+        The full-text table narrows down prompts of at least TRIGRAM characters, and the candidates
+        are checked with the same substring test as Library.search_book.
+
+        Args:
+            prompt (str): The lowercased search query.
+
+        Yields:
+            Book: The matching books.
+        """
+        condition = ("(instr(python_lower(title), :prompt) OR instr(python_lower(author), :prompt) "
+                     "OR instr(python_lower(year), :prompt))")
+        parameters = {'prompt': prompt}
+        if self.full_text and len(prompt) >= self.TRIGRAM:
+            # A quoted phrase of the trigram tokenizer matches any value containing it
+            parameters['phrase'] = '"' + prompt.replace('"', '""') + '"'
+            condition = f"position IN (SELECT rowid FROM books_text WHERE books_text MATCH :phrase) AND {condition}"
+        return self._select(f"WHERE {condition} ORDER BY position", parameters)
+
+    def words(self) -> Iterator[str]:
+        """
+        Yields the words of the titles and authors of every book, see FuzzyIndex.words.
+        Only the two columns are read, no Book is built.
+        """
+        for title, author in self._connection.execute("SELECT title, author FROM books"):
+            yield from FuzzyIndex.words(title)
+            yield from FuzzyIndex.words(author)
+
+    def containing_words(self, word_groups: list[list[str]]) -> Iterator[Book]:
+        """
+        Finds the books whose title or author contains a word of every group, in insertion order.
+        Words are matched as substrings, so the result is a superset of the books having them as whole words.
+        The full-text table narrows down the groups whose words all have at least TRIGRAM characters.
+
+        Args:
+            word_groups (list[list[str]]): Groups of lowercased words.
+
+        Yields:
+            Book: The matching books.
+        """
+        conditions = []
+        parameters = []
+        phrases = []
+        for words in word_groups:
+            conditions.append("(" + " OR ".join(
+                "instr(python_lower(title), ?) OR instr(python_lower(author), ?)" for _ in words) + ")")
+            parameters.extend(word for word in words for _ in range(2))
+            if self.full_text and all(len(word) >= self.TRIGRAM for word in words):
+                phrases.append("(" + " OR ".join('"' + word.replace('"', '""') + '"' for word in words) + ")")
+        if phrases:
+            conditions.insert(0, "position IN (SELECT rowid FROM books_text WHERE books_text MATCH ?)")
+            parameters.insert(0, " AND ".join(phrases))
+        return self._select(f"WHERE {' AND '.join(conditions)} ORDER BY position", tuple(parameters))
+
+    def page(self, sort_by: Optional[str], offset: int, limit: Optional[int]) -> Iterator[Book]:
+        """
+        Selects the books of a page of the listing, sorted over the indexes of the sort keys.
+
+        Args:
+            sort_by (Optional[str]): "title", "author" or "year", insertion order if None.
+            offset (int): The number of books to skip.
+            limit (Optional[int]): The maximum number of books to select, all the rest if None.
+
+        Yields:
+            Book: The books of the page, in the order they are listed.
+        """
+        return self._select(f"ORDER BY {self.ORDERS[sort_by]} LIMIT ? OFFSET ?",
+                            (-1 if limit is None else limit, offset))
+
+
+class SqliteLibrary(Library):
+    """
+    A library kept in an SQLite database instead of memory. Serves the same API as Library: every
+    change is written to the database at once, bulk operations are committed as a single transaction,
+    and the status, year and search queries are answered by the indexes of the database (see SqliteBooks).
+
+    Since the database always holds the current state, it never has to be saved, while dump_to_json and
+    dump_to_binary still export the library. A library created without a file lives in memory.
+    """
+
+    EXTENSION = '.sqlite'
+
+    def __init__(self, filename: str = ':memory:'):
+        """
+        Opens the library kept in a database, creating the database if needed.
+
+        Args:
+            filename (str, optional): Path to the database file. Defaults to a database in memory.
+
+        Raises:
+            sqlite3.Error: If the file is not an SQLite database or can't be opened.
+        """
+        super().__init__()
+        # The database answers status and year queries itself
+        self._status_index = None
+        self._year_index = None
+        # The distinct words of the titles and authors, built on the first fuzzy search, see search_fuzzy
+        self._vocabulary = None
+        self.filename = filename
+        self.books = SqliteBooks(filename)
+
+    def __enter__(self):
+        """
+        Returns the library itself, so it can be closed with a with statement.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Closes the database when leaving the with statement.
+        """
+        self.close()
+
+    def close(self):
+        """
+        Closes the database. Books built before remain usable.
+        """
+        if self.search_cache is not None:
+            self.search_cache.clear()
+        self.books.close()
+
+    @classmethod
+    def load_from_sqlite(cls, filename: str):
+        """
+        Opens the library kept in an existing SQLite database, without reading the books into memory.
+
+        Args:
+            filename (str): Path to the database.
+
+        Returns:
+            SqliteLibrary or None: The library, or None if the file can't be opened.
+        """
+        try:
+            if not os.path.exists(filename):
+                print(f"File {filename} does not exist.")
+                return None
+            # An empty file is not a database yet, opening it would create one
+            if not SqliteBooks.is_database(filename):
+                print(f"Invalid SQLite database {filename}.")
+                return None
+            return cls(filename)
+        except PermissionError:
+            print(f"Permission denied when trying to read {filename}.")
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error opening SQLite database {filename}: {e}")
+        return None
+
+    @classmethod
+    def create(cls, filename: str, books: Iterable[Book]):
+        """
+        Writes books to a new SQLite database with SqliteBooks.build. The database is built in a temporary
+        file in the same directory that replaces the target once it is complete, like Library._write_atomically.
+        Books with an ID that is already taken get a new one like in add_book.
+
+        Args:
+            filename (str): Path to the database to write.
+            books (Iterable[Book]): The books to write, consumed in chunks of IMPORT_CHUNK_SIZE.
+
+        Raises:
+            OSError: If the file can't be written.
+            sqlite3.Error: If the database can't be written.
+        """
+        absolute_path = os.path.abspath(filename)
+        directory = os.path.dirname(absolute_path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(absolute_path)}.", suffix='.tmp')
+        os.close(descriptor)
+        try:
+            SqliteBooks.build(temp_path, books, cls.IMPORT_CHUNK_SIZE)
+            os.chmod(temp_path, cls._file_mode(absolute_path))
+            os.replace(temp_path, absolute_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @classmethod
+    def migrate(cls, source: str, target: str) -> bool:
+        """
+        Moves a JSON database or a binary snapshot, either of which may be compressed, into a new SQLite database.
+        A JSON database is parsed one book at a time, so it is never held in memory as a whole;
+        books that can't be parsed are reported and skipped.
+
+        Args:
+            source (str): Path to the JSON database or binary snapshot.
+            target (str): Path to the SQLite database to write.
+
+        Returns:
+            bool: True if the database was migrated, False otherwise.
+        """
+        try:
+            if BinarySnapshot.is_binary(source):
+                with Compression.open(source) as f:
+                    data = f.read()
+                cls.create(target, BinarySnapshot.read(data))
+            else:
+                with Compression.open(source, text=True) as f:
+                    cls.create(target, BinarySnapshot._parse_rows(JsonArrayReader(f)))
+            return True
+        except NotAnArrayError:
+            print(f"Invalid JSON format in {source}. Expected a list of books.")
+        except OSError as e:
+            print(f"OS error occurred while migrating {source}: {e}")
+        except Compression.ERRORS as e:
+            print(f"Invalid compressed data in {source}: {e}")
+        except sqlite3.Error as e:
+            print(f"Error writing SQLite database {target}: {e}")
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Error migrating {source}: {e}")
+        return False
+
+    def _is_own_database(self, path_to_database: str) -> bool:
+        """
+        Checks whether a path is the database file of the library.
+        """
+        return self.filename != ':memory:' and os.path.abspath(path_to_database) == os.path.abspath(self.filename)
+
+    def _mark_dirty(self, book_id: str):
+        """
+        Records a change of a book. The change is already in the database, so only the exported files
+        become outdated.
+        """
+        super()._mark_dirty(book_id)
+        if self.filename != ':memory:':
+            self._dirty_ids.clear()
+
+    def _mark_books_dirty(self, book_ids: Iterable[str]):
+        """
+        Records a change of many books at once, see _mark_dirty.
+        """
+        super()._mark_books_dirty(book_ids)
+        if self.filename != ':memory:':
+            self._dirty_ids.clear()
+
+    def _is_saved_as(self, path_to_database: str, file_format: str, options: Optional[tuple] = None) -> bool:
+        """
+        Checks whether a file holds the current state of the library, see Library._is_saved_as.
+        The database of the library always does, although every change modifies the file.
+        """
+        if file_format == 'sqlite' and self._is_own_database(path_to_database):
+            return True
+        return super()._is_saved_as(path_to_database, file_format, options)
+
+    def _write_atomically(self, path_to_database: str, write, binary: bool = False,
+                          compression_level: Optional[int] = None):
+        """
+        Writes a file like Library._write_atomically, refusing to replace the open database.
+
+        Raises:
+            OSError: If the file is the database of the library.
+        """
+        if self._is_own_database(path_to_database):
+            raise OSError(f"{path_to_database} is the open SQLite database of the library")
+        super()._write_atomically(path_to_database, write, binary, compression_level)
+
+    @contextmanager
+    def _batch(self):
+        """
+        Runs a bulk operation in a single transaction. If the operation fails, the database is rolled back
+        and the in-memory search state, which may already have seen some of the changes, is dropped.
+        """
+        try:
+            with self.books.transaction():
+                yield
+        except BaseException:
+            self._fuzzy_index = None
+            if self.search_cache is not None:
+                self.search_cache.clear()
+            raise
+
+    def add_books(self, books: Iterable[Book]) -> BulkResult:
+        """
+        Adds many books to the library in a single transaction, see Library.add_books.
+        """
+        with self._batch():
+            return super().add_books(books)
+
+    def remove_books(self, book_ids: Iterable[str]) -> BulkResult:
+        """
+        Removes many books from the library in a single transaction, see Library.remove_books.
+        """
+        with self._batch():
+            return super().remove_books(book_ids)
+
+    def change_books_status(self, changes: Iterable[tuple[str, str | bool]]) -> BulkResult:
+        """
+        Changes the statuses of many books in a single transaction, see Library.change_books_status.
+        """
+        with self._batch():
+            return super().change_books_status(changes)
+
+    def _set_status(self, book: Book, status: bool):
+        """
+        Writes a new status of a book to the database.
+        """
+        super()._set_status(book, status)
+        self.books.set_status(book.id, status)
+
+    def _set_statuses(self, changes: list[tuple[Book, bool]]):
+        """
+        Writes many status changes to the database with a single statement.
+        """
+        super()._set_statuses(changes)
+        self.books.set_statuses([(book.id, status) for book, status in changes])
+
+    def _page(self, sort_by: Optional[str], offset: int, limit: Optional[int]) -> Iterable[Book]:
+        """
+        Selects the books of a page of the listing with a query over the indexes of the sort keys,
+        so only the books of the page are read, see Library.iter_lines.
+
+        Raises:
+            ValueError: If the sort order is unknown.
+        """
+        if sort_by not in SqliteBooks.ORDERS:
+            # Reports the unknown sort order
+            self._sort_key(sort_by)
+        return self.books.page(sort_by, offset, limit)
+
+    def _find_books(self, prompt: str) -> list[Book]:
+        """
+        Finds the books that match the prompt with the full-text table of the database, see Library.search_book.
+
+        Args:
+            prompt (str): The lowercased search query.
+
+        Returns:
+            list[Book]: The matching books in insertion order.
+        """
+        return list(self.books.search(prompt))
+
+    def search_fuzzy(self, prompt: str, limit: int = 10) -> list[Book]:
+        """
+        Searches for books tolerating typos, see Library.search_fuzzy, without indexing every book in memory.
+        Only the distinct words of the titles and authors are kept, to find the words close to every word
+        of the query. The books containing them are selected through the full-text table and ranked by
+        a word index of just these books, so the result is the same as with the index of every book.
+
+        Args:
+            prompt (str): The search query (case insensitive).
+            limit (int, optional): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The closest matching books, best first, or an empty list if nothing matches.
+        """
+        query_words = FuzzyIndex.words(prompt)
+        if not query_words or limit <= 0:
+            return []
+        if self._vocabulary is None:
+            vocabulary = FuzzyIndex()
+            vocabulary.add_words(self.books.words())
+            self._vocabulary = vocabulary
+        word_groups = []
+        for word in query_words:
+            similar = self._vocabulary.similar_words(word)
+            if not similar:
+                return []
+            word_groups.append(sorted(similar))
+        candidates = FuzzyIndex()
+        found = {}
+        for book in self.books.containing_words(word_groups):
+            candidates.add(book)
+            found[book.id] = book
+        return [found[book_id] for book_id in candidates.search(prompt, limit)]
+
+    def _index_book(self, book: Book):
+        """
+        Adds a stored book to the in-memory search state, including the vocabulary of search_fuzzy.
+        """
+        super()._index_book(book)
+        if self._vocabulary is not None:
+            self._vocabulary.add_words(FuzzyIndex.words(book.title) | FuzzyIndex.words(book.author))
+
+    def _index_books(self, books: dict[str, Book]):
+        """
+        Adds stored books to the in-memory search state, including the vocabulary of search_fuzzy.
+        Words of removed books stay in the vocabulary, they only make a search check a few more words.
+        """
+        super()._index_books(books)
+        if self._vocabulary is not None:
+            for book in books.values():
+                self._vocabulary.add_words(FuzzyIndex.words(book.title) | FuzzyIndex.words(book.author))
+
+    def _find_ranked(self, prompt: str, limit: int) -> list[Book]:
+        """
+        Finds the best matches of the prompt among the books found by the full-text table,
+        see Library.search_ranked. The matches are read as they are ranked, and reading stops
+        once the best possible matches fill the limit.
+
+        Args:
+            prompt (str): The lowercased search query.
+            limit (int): The maximum number of books to return.
+
+        Returns:
+            list[Book]: The best matching books, best first.
+        """
+        return self._rank_books(prompt, self.books.search(prompt), limit)
+
+    def available_books(self) -> list[Book]:
+        """
+        Returns the books that are available ("в наличии"), using the status index of the database.
+
+        Returns:
+            list[Book]: The available books in insertion order.
+        """
+        return self.books.books_with_status(True)
+
+    def checked_out_books(self) -> list[Book]:
+        """
+        Returns the books that are checked out ("выдана"), using the status index of the database.
+
+        Returns:
+            list[Book]: The checked out books in insertion order.
+        """
+        return self.books.books_with_status(False)
+
+    def count_by_status(self, status: bool) -> int:
+        """
+        Counts the books that are available or checked out over the status index of the database.
+
+        Args:
+            status (bool): True to count available books, False to count checked out ones.
+
+        Returns:
+            int: The number of books with the given status.
+        """
+        return self.books.count_status(status)
+
+    def books_published_between(self, start: int, end: int) -> list[Book]:
+        """
+        Returns the books published in the given range of years, using the year index of the database.
+
+        Args:
+            start (int): The first year of the range.
+            end (int): The last year of the range, inclusive.
+
+        Returns:
+            list[Book]: The matching books ordered by year, books of the same year in insertion order.
+        """
+        return self.books.books_published_between(start, end)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(f"Usage: python {os.path.basename(sys.argv[0])} SOURCE TARGET\n"
+              f"Moves a JSON database or a binary snapshot into a new SQLite database.")
+        sys.exit(2)
+    sys.exit(0 if SqliteLibrary.migrate(sys.argv[1], sys.argv[2]) else 1)
@@ -1,5 +1,116 @@
+import argparse
+import os
+import sys
 from class_application import Application
+from class_batch import BatchRunner
+from class_concurrent_library import ConcurrentLibrary
+from class_library import Library
+from class_metrics import PROFILE_MODES, metrics
+from class_server import LibraryServer, serve
+from class_sqlite_library import SqliteBooks, SqliteLibrary
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Library management system")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve the library over the network instead of the interactive console")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to listen on (default: %(default)s)")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--data-dir", metavar="DIR",
+                        help="the only directory clients of the server may load from and save to "
+                             "(default: the current directory)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the JSON-lines commands of FILE (- for stdin) instead of the interactive console")
+    parser.add_argument("--database", metavar="PATH",
+                        help="database to load before serving or running a batch, a batch saves its changes to it")
+    parser.add_argument("--save-to", metavar="PATH", help="save the result of a batch to PATH instead of --database")
+    parser.add_argument("--compression-level", type=int, metavar="N",
+                        help="level of a batch result saved compressed (.gz, .bz2 or .xz), default of the format")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="processes parsing a large JSON database in parallel (default: one per available CPU)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record call counts, latencies and file traffic of the library operations")
+    parser.add_argument("--profile", metavar="OPERATION[:MODE]", action="append", default=[],
+                        help="profile every call of OPERATION (e.g. search_book:cpu or load:memory), implies --metrics")
+    parser.add_argument("--profile-dir", metavar="DIR", default="profiles",
+                        help="directory of the profiling reports (default: %(default)s)")
+    args = parser.parse_args()
+    args.profiled = {}
+    for option in args.profile:
+        operation, _, mode = option.partition(":")
+        if (mode or "cpu") not in PROFILE_MODES:
+            parser.error(f"unknown profiling mode {mode!r} of {operation}, expected one of {', '.join(PROFILE_MODES)}")
+        args.profiled[operation] = mode or "cpu"
+    return args
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """
+    Runs a batch of commands against the database and saves the result once at the end.
+
+    Returns:
+        int: The exit status, 1 if the database couldn't be loaded or saved or the batch couldn't be read.
+    """
+    library = Library()
+    if args.database is not None and os.path.exists(args.database):
+        # An SQLite database is changed in place, the other formats are read into memory
+        library_class = SqliteLibrary if SqliteBooks.is_database(args.database) else Library
+        library = library_class.load(args.database, workers=args.workers)
+        if library is None:
+            return 1
+
+    runner = BatchRunner(library)
+    if args.batch == "-":
+        runner.run(sys.stdin)
+    else:
+        try:
+            with open(args.batch, 'r', encoding='utf-8') as f:
+                runner.run(f)
+        except OSError as e:
+            print(f"Не удалось прочитать файл команд {args.batch}: {e}", file=sys.stderr)
+            return 1
+    print(runner.report(), file=sys.stderr)
+    if metrics.enabled:
+        print(metrics.report(), file=sys.stderr)
+
+    target = args.save_to or args.database
+    if target is not None:
+        # An unchanged database is not rewritten
+        if not runner.save(target, args.compression_level):
+            return 1
+        print(f"Библиотека сохранена в {os.path.abspath(target)}", file=sys.stderr)
+    return 0
+
+
+def main():
+    """
+    Starts the interactive console, runs a batch if --batch is given, or the network server if --serve is given.
+    """
+    args = parse_arguments()
+    if args.metrics or args.profiled:
+        metrics.enable(args.profiled, args.profile_dir)
+    if args.batch is not None:
+        sys.exit(run_batch(args))
+    if not args.serve:
+        app = Application()
+        app.main_cycle()
+        return
+
+    library = None
+    if args.database is not None:
+        library = ConcurrentLibrary.load(args.database, workers=args.workers)
+        if library is None:
+            return
+
+    def on_start(server: LibraryServer):
+        print(f"Сервер библиотеки запущен: {', '.join(map(str, server.addresses))}")
+
+    serve(library, args.host, args.port, args.unix, on_start, args.data_dir)
+
 
 if __name__ == "__main__":
-    app = Application()
-    app.main_cycle()
+    main()
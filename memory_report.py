@@ -0,0 +1,91 @@
+import argparse
+import json
+import random
+import tracemalloc
+import uuid
+from class_book import Book
+
+
+class LegacyBook:
+    """
+    The previous layout of Book: attributes in a per-instance __dict__,
+    the year as a string and the ID as a 36-character string.
+    """
+
+    def __init__(self, title: str, author: str, year: str | int, status: bool, book_id: str):
+        self.title = title
+        self.author = author
+        self.year = str(year)
+        self.status = status
+        self.id = book_id
+
+
+def sample_json(count: int) -> str:
+    """
+    Generates a serialized catalogue with a realistic amount of repetition in authors and years.
+
+    Args:
+        count (int): The number of books to generate.
+
+    Returns:
+        str: A JSON array of book dictionaries, as written by Library.dump_to_json.
+    """
+    rng = random.Random(0)
+    authors = [f"Автор {i}" for i in range(max(1, count // 20))]
+    return json.dumps([
+        {'id': str(uuid.uuid4()), 'title': f"Книга номер {i}", 'author': rng.choice(authors),
+         'year': str(rng.randint(1800, 2024)), 'status': rng.random() < 0.8}
+        for i in range(count)
+    ])
+
+
+def measure(book_class, text: str, keyed: bool) -> float:
+    """
+    Measures the memory retained per book after loading the serialized catalogue.
+
+    Args:
+        book_class: The class the books are built with.
+        text (str): The serialized catalogue.
+        keyed (bool): Whether the books are kept in a dict keyed by ID, like Library.books,
+                      or in a list.
+
+    Returns:
+        float: Retained bytes per book, including the strings it references.
+    """
+    tracemalloc.start()
+    records = json.loads(text)
+    books = [book_class(record['title'], record['author'], record['year'], record['status'], record['id'])
+             for record in records]
+    del records
+    if keyed:
+        # The dict slots are counted, as the ID keys are part of what the books cost in a library
+        books = {book.id: book for book in books}
+        retained = tracemalloc.get_traced_memory()[0]
+    else:
+        # The list itself is not part of a book
+        retained = tracemalloc.get_traced_memory()[0] - len(books) * 8
+    tracemalloc.stop()
+    return retained / len(books)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports the memory retained per Book instance.")
+    parser.add_argument("--count", type=int, default=100_000, help="number of books to build")
+    args = parser.parse_args()
+    text = sample_json(args.count)
+
+    print(f"Books measured: {args.count}")
+    for keyed, label in ((False, "standalone books"), (True, "books keyed by ID like Library.books")):
+        legacy = measure(LegacyBook, text, keyed)
+        compact = measure(Book, text, keyed)
+        Book.compact_ids = True
+        packed = measure(Book, text, keyed)
+        Book.compact_ids = False
+        print(f"\n{label}:")
+        print(f"  legacy book (__dict__)        {legacy:7.1f} bytes")
+        print(f"  compact book (__slots__)      {compact:7.1f} bytes, saves {legacy - compact:6.1f}")
+        print(f"  compact book with packed IDs  {packed:7.1f} bytes, saves {legacy - packed:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,18 @@ def test_handle_print_library_empty(capsys):
     assert "Библиотека пуста" in captured.out
 
 
+def test_handle_print_library_pages(monkeypatch, capsys):
+    app = Application()
+    for number in range(5):
+        app.library.add_book(Book(f"Book {number}", "Author", 2000 - number, book_id=f"id{number}"))
+    monkeypatch.setattr(Application, "PAGE_SIZE", 2)
+    inputs = iter(["год", "", "q"])
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    app.handle_print_library()
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split(';')[0] for line in lines] == ["ID: id4", "ID: id3", "ID: id2", "ID: id1"]
+
+
 def test_handle_add_book(monkeypatch, capsys):
     inputs = iter(["New Book", "Author C", "2023"])
     app = Application()
@@ -125,6 +137,18 @@ def test_handle_search(app_with_library, monkeypatch, capsys):
     assert "Author A" in captured.out
 
 
+def test_handle_search_falls_back_to_fuzzy(app_with_library, monkeypatch, capsys):
+    inputs = iter(["Autor A"])
+    app = app_with_library
+
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    app.handle_search()
+
+    captured = capsys.readouterr()
+    assert "возможно вы искали" in captured.out
+    assert "Book 1" in captured.out
+
+
 def test_handle_search_no_results(app_with_library, monkeypatch, capsys):
     inputs = iter(["Nonexistent"])
     app = app_with_library
@@ -180,3 +204,18 @@ def test_handle_save_to_file(tmp_path, monkeypatch, capsys):
     captured = capsys.readouterr()
     assert f"Библиотека сохранена в {file_path}" in captured.out
     assert file_path.exists()
+
+
+def test_handle_save_to_binary_file(tmp_path, monkeypatch, capsys):
+    file_path = tmp_path / "library.lmsb"
+    inputs = iter([str(file_path), str(file_path)])
+    app = Application()
+    app.library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    app.handle_save_to_file()
+    app.handle_load_from_file()
+
+    captured = capsys.readouterr()
+    assert f"Файл библиотеки {file_path} загружен" in captured.out
+    assert app.library.get_book_by_id("id1").title == "Book 1"
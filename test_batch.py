@@ -0,0 +1,89 @@
+import io
+import json
+import subprocess
+import sys
+from class_batch import BatchRunner
+from class_book import Book
+from class_library import Library
+
+
+def commands(*requests):
+    return [json.dumps(request, ensure_ascii=False) + '\n' for request in requests]
+
+
+def test_run_groups_consecutive_writes(monkeypatch):
+    library = Library()
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    calls = []
+    for name in ("add_books", "remove_books", "change_books_status"):
+        method = getattr(library, name)
+        monkeypatch.setattr(library, name, lambda items, method=method, name=name: (
+            calls.append((name, len(items))), method(items))[1])
+
+    output = io.StringIO()
+    runner = BatchRunner(library, output)
+    runner.run(commands(
+        {"command": "add", "title": "Book 2", "author": "Author B", "year": 2002},
+        {"command": "add", "title": "Book 3", "author": "Author C", "year": "2003"},
+        {"command": "status", "id": "id1", "status": "выдана"},
+        {"command": "status", "id": "missing", "status": "выдана"},
+        {"command": "search", "query": "book 3"},
+        {"command": "remove", "id": "id1"},
+    ) + ["\n", "# comment\n"])
+
+    assert calls == [("add_books", 2), ("change_books_status", 2), ("remove_books", 1)]
+    assert runner.counts == {"added": 2, "updated": 1, "not found": 1, "removed": 1}
+    assert runner.commands == 6 and runner.searches == 1 and runner.errors == 0
+    # The search sees the books added above it
+    assert [book["title"] for book in json.loads(output.getvalue())["books"]] == ["Book 3"]
+    assert len(library.books) == 2
+
+
+def test_batches_are_bounded(monkeypatch):
+    monkeypatch.setattr(BatchRunner, "BATCH_SIZE", 2)
+    library = Library()
+    sizes = []
+    add_books = library.add_books
+    monkeypatch.setattr(library, "add_books", lambda books: (sizes.append(len(books)), add_books(books))[1])
+    BatchRunner(library).run(commands(*[{"command": "add", "title": f"Book {number}", "author": "Author",
+                                         "year": 2000} for number in range(5)]))
+    assert sizes == [2, 2, 1]
+
+
+def test_invalid_lines_are_skipped(capsys):
+    runner = BatchRunner(Library())
+    runner.run(["not json\n", '["add"]\n', '{"command": "drop"}\n', '{"command": "add", "title": "Book"}\n',
+                '{"command": "search", "query": "x", "limit": -1}\n'])
+    assert runner.errors == 5
+    errors = capsys.readouterr().err.splitlines()
+    assert errors[0].startswith("Skipping line 1:")
+    assert errors[3] == "Skipping line 4: Missing or invalid parameter 'author'"
+    assert "ошибок: 5" in runner.report()
+
+
+def test_main_batch_saves_once(tmp_path):
+    database = tmp_path / "library.json"
+    script = tmp_path / "commands.jsonl"
+    script.write_text(''.join(commands({"command": "add", "title": "Book 1", "author": "Author", "year": 2001},
+                                       {"command": "search", "query": "book"})), encoding='utf-8')
+    result = subprocess.run([sys.executable, "main.py", "--batch", str(script), "--database", str(database)],
+                            capture_output=True, text=True, encoding='utf-8')
+    assert result.returncode == 0
+    assert json.loads(result.stdout)["books"][0]["title"] == "Book 1"
+    assert "Обработано команд: 2" in result.stderr
+    assert [book["title"] for book in json.loads(database.read_text(encoding='utf-8'))] == ["Book 1"]
+
+    result = subprocess.run([sys.executable, "main.py", "--batch", "-", "--database", str(database)],
+                            input=''.join(commands({"command": "remove", "id": "missing"})),
+                            capture_output=True, text=True, encoding='utf-8')
+    assert result.returncode == 0
+    assert "not found: 1" in result.stderr
+
+
+def test_main_batch_reports_missing_file(tmp_path):
+    database = tmp_path / "library.json"
+    result = subprocess.run([sys.executable, "main.py", "--batch", str(tmp_path / "missing.jsonl"),
+                             "--database", str(database)], capture_output=True, text=True, encoding='utf-8')
+    assert result.returncode == 1
+    assert "Не удалось прочитать файл команд" in result.stderr and "Traceback" not in result.stderr
+    assert not database.exists()
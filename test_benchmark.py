@@ -0,0 +1,41 @@
+import copy
+import re
+from benchmark import compare, generate_catalogue, run
+
+
+def test_catalogue_is_reproducible_and_mixes_scripts():
+    first = [book.to_dict() for book in generate_catalogue(500, seed=1)]
+    assert first == [book.to_dict() for book in generate_catalogue(500, seed=1)]
+    assert first != [book.to_dict() for book in generate_catalogue(500, seed=2)]
+    assert len({book['id'] for book in first}) == 500
+    titles = ' '.join(book['title'] for book in first)
+    assert re.search('[а-яё]', titles) and re.search('[a-z]', titles)
+
+
+def test_run_reports_every_operation():
+    report = run([200], repeat=1, query_count=5, memory=True)
+    assert report['meta']['sizes'] == [200]
+    operations = {result['operation'] for result in report['results']}
+    assert operations == {"add_book", "add_books", "search_book", "search_book_first", "dump_to_json",
+                          "load_from_json", "__str__", "remove_book", "remove_books"}
+    for result in report['results']:
+        assert result['size'] == 200
+        assert set(result['latency_ms']) == {'min', 'mean', 'max', 'p50', 'p90', 'p99'}
+        assert result['latency_ms']['min'] <= result['latency_ms']['p50'] <= result['latency_ms']['max']
+    add_book = next(result for result in report['results'] if result['operation'] == "add_book")
+    assert add_book['calls'] == 200 and add_book['peak_memory_bytes'] > 0
+
+
+def test_compare_flags_regressions():
+    baseline = {'results': [
+        {'operation': "search_book", 'size': 1000, 'latency_ms': {'p50': 1.0}, 'peak_memory_bytes': 100},
+        {'operation': "__str__", 'size': 1000, 'latency_ms': {'p50': 2.0}, 'peak_memory_bytes': 100},
+        {'operation': "add_book", 'size': 1000, 'latency_ms': {'p50': 2.0}, 'peak_memory_bytes': 100},
+    ]}
+    current = copy.deepcopy(baseline)
+    current['results'][0]['latency_ms']['p50'] = 1.5
+    current['results'][1]['peak_memory_bytes'] = 150
+    current['results'][2]['latency_ms']['p50'] = 1.0
+    comparisons = compare(baseline, current, threshold=0.2)
+    assert [comparison['regression'] for comparison in comparisons] == [True, True, False]
+    assert comparisons[2]['latency_change'] == -0.5
@@ -0,0 +1,94 @@
+import io
+import json
+import pytest
+from class_book import Book
+from class_binary_snapshot import BinarySnapshot, SnapshotFormatError
+from class_library import Library
+
+
+@pytest.fixture
+def sample_library():
+    library = Library()
+    library.add_book(Book("Последний кольценосец", "Кирилл Еськов", 1999, book_id="id1"))
+    library.add_book(Book("1984", "Джордж Оруэлл", "1949", status=False, book_id="id2"))
+    library.add_book(Book("Gesta Francorum", "неизвестный автор", "XII век", book_id="id3"))
+    return library
+
+
+def test_round_trip(sample_library, tmp_path):
+    file_path = tmp_path / "library.lmsb"
+    assert sample_library.dump_to_binary(file_path)
+    assert BinarySnapshot.is_binary(file_path)
+    library = Library.load_from_binary(file_path)
+    assert [book.to_dict() for book in library.books.values()] == \
+        [book.to_dict() for book in sample_library.books.values()]
+    assert library.search_book("оруэлл")[0].id == "id2"
+
+
+def test_empty_library(tmp_path):
+    file_path = tmp_path / "library.lmsb"
+    Library().dump_to_binary(file_path)
+    assert len(Library.load_from_binary(file_path).books) == 0
+
+
+def test_load_detects_format(sample_library, tmp_path):
+    json_path = tmp_path / "library.json"
+    binary_path = tmp_path / "library.lmsb"
+    sample_library.dump_to_json(json_path)
+    sample_library.dump_to_binary(binary_path)
+    assert not BinarySnapshot.is_binary(json_path)
+    assert list(Library.load(json_path).books) == list(Library.load(binary_path).books) == ["id1", "id2", "id3"]
+
+
+def test_truncated_snapshot(sample_library, tmp_path, capsys):
+    file_path = tmp_path / "library.lmsb"
+    sample_library.dump_to_binary(file_path)
+    file_path.write_bytes(file_path.read_bytes()[:-5])
+    assert Library.load_from_binary(file_path) is None
+    assert "Invalid binary snapshot" in capsys.readouterr().out
+
+
+def test_unsupported_version():
+    header = BinarySnapshot._header.pack(BinarySnapshot.MAGIC, BinarySnapshot.VERSION + 1, 0, 0)
+    with pytest.raises(SnapshotFormatError):
+        list(BinarySnapshot.read(header))
+
+
+def test_write_json_matches_dump_to_json(sample_library, tmp_path):
+    file_path = tmp_path / "library.json"
+    sample_library.dump_to_json(file_path)
+    stream = io.StringIO()
+    BinarySnapshot.write_json(stream, (book.to_dict() for book in sample_library.books.values()))
+    assert stream.getvalue() == file_path.read_text()
+    stream = io.StringIO()
+    BinarySnapshot.write_json(stream, [])
+    assert json.loads(stream.getvalue()) == []
+
+
+def test_convert(sample_library, tmp_path):
+    json_path = tmp_path / "library.json"
+    binary_path = tmp_path / "library.lmsb"
+    converted_path = tmp_path / "converted.json"
+    sample_library.dump_to_json(json_path)
+    assert BinarySnapshot.convert(json_path, binary_path)
+    assert BinarySnapshot.is_binary(binary_path)
+    assert BinarySnapshot.convert(binary_path, converted_path)
+    assert converted_path.read_text() == json_path.read_text()
+
+
+def test_convert_keeps_the_target_on_failure(sample_library, tmp_path, capsys):
+    json_path = tmp_path / "library.json"
+    binary_path = tmp_path / "library.lmsb"
+    sample_library.dump_to_json(json_path)
+    content = json_path.read_text()
+    assert not BinarySnapshot.convert(json_path, json_path)
+    assert not BinarySnapshot.convert(json_path, tmp_path / "." / "library.json")
+    assert "into itself" in capsys.readouterr().out
+    assert json_path.read_text() == content
+
+    assert BinarySnapshot.convert(json_path, binary_path)
+    snapshot = binary_path.read_bytes()
+    json_path.write_text('[{"id": "id1", "title": "Book", "author": "Author", "year": "2001", "status": true}, ')
+    assert not BinarySnapshot.convert(json_path, binary_path)
+    assert binary_path.read_bytes() == snapshot
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["library.json", "library.lmsb"]
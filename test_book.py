@@ -1,4 +1,5 @@
 from uuid import UUID
+import class_book
 from class_book import Book
 
 
@@ -66,3 +67,51 @@ def test_str_representation():
 def test_str_representation_checked_out():
     book = Book("Str Book 2", "Str Author 2", 2020, status=False, book_id="str-id-2")
     assert str(book) == "ID: str-id-2; Название: Str Book 2, Автор: Str Author 2, Год: 2020 -> выдана"
+
+
+def test_book_has_no_instance_dict():
+    book = Book("Slots Book", "Author", 2023)
+    assert not hasattr(book, "__dict__")
+
+
+def test_year_stored_as_int():
+    book = Book("Year Book", "Author", "1999")
+    assert book._year == 1999
+    assert book.year == "1999"
+
+
+def test_non_numeric_year_kept_as_string():
+    for year in ("0123", "XIX век", " 1999", ""):
+        book = Book("Year Book", "Author", year)
+        assert book.year == year
+        assert book.to_dict()['year'] == year
+
+
+def test_year_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr("class_book._year_cache", {})
+    monkeypatch.setattr("class_book._YEAR_CACHE_SIZE", 10)
+    books = [Book("Book", "Author", year) for year in [*range(3000, 3020), *map(str, range(3000, 3020))]]
+    assert len(class_book._year_cache) == 10
+    assert [book.year for book in books] == [str(year) for year in range(3000, 3020)] * 2
+    assert all(type(book._year) is int for book in books)
+    # Years cached before the cache filled up are still shared
+    assert Book("Book", "Author", "3000")._year is books[0]._year
+
+
+def test_author_interned():
+    book1 = Book("Book 1", ''.join(["Лев ", "Толстой"]), 1869)
+    book2 = Book("Book 2", ''.join(["Лев Тол", "стой"]), 1877)
+    assert book1.author is book2.author
+
+
+def test_compact_ids(monkeypatch):
+    monkeypatch.setattr(Book, "compact_ids", True)
+    book_id = "de305d54-75b4-431b-adb2-eb6b9e546014"
+    book = Book("Packed Book", "Author", 2001, book_id=book_id)
+    assert book._id == UUID(book_id).int
+    assert book.id == book_id
+    assert book.to_dict()['id'] == book_id
+    # IDs that are not canonical UUIDs are kept as they are
+    assert Book("Book", "Author", 2001, book_id="DE305D54-75B4-431B-ADB2-EB6B9E546014")._id == \
+        "DE305D54-75B4-431B-ADB2-EB6B9E546014"
+    assert Book("Book", "Author", 2001, book_id="custom-id").id == "custom-id"
@@ -0,0 +1,122 @@
+import pytest
+from benchmark import generate_catalogue
+from class_book import Book
+from class_bulk_result import BulkResult
+from class_columnar_library import ColumnarLibrary
+from class_journal import Journal
+from class_library import Library
+
+
+def test_bulk_result():
+    result = BulkResult()
+    result.record("id1", "removed")
+    result.record("id2", "not found")
+    result.record("id3", "removed")
+    assert len(result) == 3
+    assert result.count("removed") == 2
+    assert result.count("updated") == 0
+    assert result.ids("removed") == ["id1", "id3"]
+    assert str(result) == "removed: 2, not found: 1"
+    result.record_many(["id4", "id5"], "removed")
+    assert result.count("removed") == 4 and result.ids("removed")[-2:] == ["id4", "id5"]
+    result = BulkResult()
+    result.record("id1", "removed")
+    result.record("id2", "not found")
+    result.record("id3", "removed")
+    assert result.to_dict() == {
+        'counts': {"removed": 2, "not found": 1},
+        'items': [{'id': "id1", 'outcome': "removed"}, {'id': "id2", 'outcome': "not found"},
+                  {'id': "id3", 'outcome': "removed"}],
+    }
+
+
+def test_bulk_operations_are_journaled(tmp_path):
+    snapshot = tmp_path / "library.json"
+    library = Library.open_journaled(str(snapshot))
+    library.add_books([Book("Book 1", "Author A", 2001, book_id="id1"),
+                       Book("Book 2", "Author B", 2002, book_id="id2")])
+    # Unchanged statuses and missing books are not journaled
+    library.change_books_status([("id1", "выдана"), ("id2", "в наличии"), ("invalid_id", "выдана")])
+    library.remove_books(["id2", "invalid_id"])
+    library.journal.close()
+
+    assert [record['op'] for record in Journal(library.journal.path).replay()] == ['add', 'add', 'status', 'remove']
+    restored = Library.open_journaled(str(snapshot))
+    assert list(restored.books) == ["id1"]
+    assert restored.get_book_by_id("id1").status is False
+
+
+def test_bulk_operations_on_columnar_library():
+    library = ColumnarLibrary()
+    library.add_books([Book("Book 1", "Author A", 2001, book_id="id1"),
+                       Book("Book 2", "Author B", 2002, book_id="id2")])
+    assert library.change_books_status([("id2", "выдана")]).count("updated") == 1
+    assert [book.id for book in library.checked_out_books()] == ["id2"]
+    assert library.remove_books(["id1"]).ids("removed") == ["id1"]
+    assert library.count_by_status(True) == 0
+    assert library.search_book("Book 2")[0].id == "id2"
+
+
+def _index_state(library: Library) -> tuple:
+    # The regenerated ID of the duplicate differs between libraries
+    def ids(books):
+        return [book_id if book_id.startswith("id") else "regenerated" for book_id in books]
+    return (ids(library.books), ids(book.id for book in library.available_books()),
+            ids(book.id for book in library.checked_out_books()),
+            ids(book.id for book in library.books_published_between(0, 3000)))
+
+
+def test_bulk_operations_match_single_operations():
+    books = [Book(f"Book {number}", f"Author {number % 3}", 1990 + number % 4, book_id=f"id{number}")
+             for number in range(10)]
+    books.append(Book("Duplicate", "Author", 2000, book_id="id3"))
+    changes = [("id1", "выдана"), ("id2", "выдана"), ("id1", "в наличии"), ("id1", "выдана"),
+               ("id4", "в наличии"), ("missing", "выдана"), ("id5", "потеряна")]
+    removals = ["id6", "missing", "id6", "id0"]
+
+    single, bulk = Library(), Library()
+    for book in books:
+        single.add_book(Book.from_dict(book.to_dict()))
+    added = bulk.add_books(Book.from_dict(book.to_dict()) for book in books)
+    assert added.count("added") == 11 and len(set(added.ids("added"))) == 11
+    assert _index_state(bulk) == _index_state(single)
+
+    statuses = bulk.change_books_status(changes)
+    for book_id, status in changes:
+        if single.get_book_by_id(book_id) is not None and status in Library.STATUSES:
+            single.change_book_status(book_id, status)
+    assert [outcome for _, outcome in statuses.items] == [
+        "updated", "updated", "updated", "updated", "unchanged", "not found", "invalid status"]
+    removed = bulk.remove_books(removals)
+    single.remove_book("id6")
+    single.remove_book("id0")
+    assert [outcome for _, outcome in removed.items] == ["removed", "not found", "not found", "removed"]
+    assert _index_state(bulk) == _index_state(single)
+
+
+def test_add_books_keeps_library_on_failing_iterable():
+    library = Library()
+
+    def books():
+        yield Book("Book 1", "Author A", 2001, book_id="id1")
+        raise RuntimeError("broken source")
+
+    with pytest.raises(RuntimeError):
+        library.add_books(books())
+    assert len(library.books) == 0 and library.count_by_status(True) == 0
+
+
+def test_bulk_operations_invalidate_search_cache_once():
+    library = Library()
+    library.enable_search_cache()
+    library.add_books(generate_catalogue(50))
+    library.search_book("война")
+    library.search_book("zzz")
+    library.add_books([Book("Война и мир", "Лев Толстой", 1869, book_id="id1"),
+                       Book("Война миров", "Герберт Уэллс", 1897, book_id="id2")])
+    # Only the cached prompt matching the batch is evicted
+    assert library.search_cache.get(("zzz", None)) == [] and library.search_cache.get(("война", None)) is None
+    assert [book.id for book in library.search_book("война")][-2:] == ["id1", "id2"]
+    library.remove_books(["id1", "id2"])
+    assert library.search_cache.get(("война", None)) is None
+
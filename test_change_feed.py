@@ -0,0 +1,93 @@
+import pytest
+from class_book import Book
+from class_change_feed import ChangeFeed
+from class_concurrent_library import ConcurrentLibrary
+from class_library import Library
+from class_sqlite_library import SqliteLibrary
+
+
+def test_feed_retains_the_latest_changes():
+    feed = ChangeFeed(capacity=3)
+    assert feed.since(0) == []
+    feed.extend([{'op': 'remove', 'id': f"id{i}"} for i in range(5)])
+    assert feed.sequence == 5 and feed.oldest_sequence == 2
+    assert feed.since(2) == [(3, {'op': 'remove', 'id': "id2"}), (4, {'op': 'remove', 'id': "id3"}),
+                             (5, {'op': 'remove', 'id': "id4"})]
+    assert feed.since(3, limit=1) == [(4, {'op': 'remove', 'id': "id3"})]
+    assert feed.since(5) == []
+    # Changes that were dropped, and a position ahead of the feed
+    assert feed.since(1) is None
+    assert feed.since(6) is None
+    with pytest.raises(ValueError):
+        ChangeFeed(capacity=0)
+
+
+def test_feed_wraps_around():
+    feed = ChangeFeed(capacity=5)
+    applied = []
+    for size in [2, 1, 4, 3, 7, 0, 2]:
+        records = [{'op': 'remove', 'id': f"id{len(applied) + i}"} for i in range(size)]
+        feed.extend(records)
+        applied.extend(records)
+        for sequence in range(feed.oldest_sequence, feed.sequence + 1):
+            for limit in [None, 1, 2, 10]:
+                expected = list(enumerate(applied, start=1))[sequence:]
+                assert feed.since(sequence, limit) == (expected if limit is None else expected[:limit])
+
+
+@pytest.mark.parametrize("library_class", [Library, ConcurrentLibrary, SqliteLibrary])
+def test_library_records_every_change(library_class):
+    library = library_class()
+    library.add_book(Book("Book 0", "Author", 2000, book_id="id0"))
+    feed = library.enable_change_feed()
+    library.add_book(Book("Book 1", "Author", 2001, book_id="id1"))
+    library.add_books([Book("Book 2", "Author", 2002, book_id="id2"), Book("Book 3", "Author", 2003, book_id="id1")])
+    library.change_book_status("id1", "выдана")
+    library.change_books_status([("id2", "выдана"), ("id2", "выдана"), ("missing", "выдана")])
+    library.remove_book("id0")
+    library.remove_books(["id2", "missing"])
+
+    regenerated_id = [book_id for book_id in library.books if book_id != "id1"][0]
+    changes = library.changes_since(feed.id, 0)
+    assert changes['feed'] == feed.id and changes['sequence'] == 7
+    assert [record for _, record in changes['changes']] == [
+        {'op': 'add', 'book': {'id': "id1", 'title': "Book 1", 'author': "Author", 'year': "2001", 'status': True}},
+        {'op': 'add', 'book': {'id': "id2", 'title': "Book 2", 'author': "Author", 'year': "2002", 'status': True}},
+        {'op': 'add', 'book': {'id': regenerated_id, 'title': "Book 3", 'author': "Author", 'year': "2003",
+                               'status': True}},
+        {'op': 'status', 'id': "id1", 'status': False},
+        {'op': 'status', 'id': "id2", 'status': False},
+        {'op': 'remove', 'id': "id0"},
+        {'op': 'remove', 'id': "id2"},
+    ]
+    assert library.changes_since(feed.id, 5, limit=1)['changes'] == [(6, {'op': 'remove', 'id': "id0"})]
+    # Another feed, e.g. of the library before a restart
+    assert library.changes_since("another feed", 0) is None
+
+
+def test_snapshot_is_current_at_the_feed_position():
+    library = Library()
+    library.add_book(Book("Book 1", "Author", 2001, book_id="id1"))
+    feed = library.enable_change_feed()
+    library.change_book_status("id1", "выдана")
+    assert library.replication_snapshot() == {'feed': feed.id, 'sequence': 1, 'books': [
+        {'id': "id1", 'title': "Book 1", 'author': "Author", 'year': "2001", 'status': False}]}
+
+
+def test_library_without_feed():
+    library = Library()
+    library.add_book(Book("Book 1", "Author", 2001, book_id="id1"))
+    assert library.change_feed is None
+    with pytest.raises(ValueError):
+        library.changes_since("feed", 0)
+    with pytest.raises(ValueError):
+        library.replication_snapshot()
+
+
+def test_feed_and_journal_record_the_same_changes(tmp_path):
+    library = Library.open_journaled(str(tmp_path / "library.json"))
+    feed = library.enable_change_feed()
+    library.add_books([Book("Book 1", "Author", 2001, book_id="id1"), Book("Book 2", "Author", 2002, book_id="id2")])
+    library.remove_book("id1")
+    library.journal.close()
+    assert list(library.journal.replay()) == [record for _, record in feed.since(0)]
@@ -0,0 +1,113 @@
+import json
+import random
+import pytest
+from class_book import Book
+from class_columnar_library import BookColumns, ColumnarLibrary
+from class_library import Library
+
+
+@pytest.fixture
+def columnar_library():
+    library = ColumnarLibrary()
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    library.add_book(Book("Book 2", "Author B", 1950, status=False, book_id="id2"))
+    library.add_book(Book("Book 3", "Author A", "XIX век", book_id="id3"))
+    return library
+
+
+def test_books_are_materialized(columnar_library):
+    book = columnar_library.get_book_by_id("id3")
+    assert isinstance(book, Book)
+    assert book.to_dict() == {'id': "id3", 'title': "Book 3", 'author': "Author A", 'year': "XIX век", 'status': True}
+    assert columnar_library.get_book_by_id("invalid_id") is None
+    assert list(columnar_library.books) == ["id1", "id2", "id3"]
+
+
+def test_str(columnar_library):
+    assert str(columnar_library).splitlines()[1] == \
+        "ID: id2; Название: Book 2, Автор: Author B, Год: 1950 -> выдана"
+    assert str(ColumnarLibrary()) == "Библиотека пуста"
+
+
+def test_change_status_is_stored(columnar_library):
+    columnar_library.change_book_status("id1", "выдана")
+    assert columnar_library.get_book_by_id("id1").status is False
+    assert columnar_library.count_by_status(True) == 1
+    assert columnar_library.count_by_status(False) == 2
+
+
+def test_remove_book(columnar_library):
+    columnar_library.remove_book("id2")
+    assert "id2" not in columnar_library.books
+    assert len(columnar_library.books) == 2
+    assert columnar_library.count_by_status(False) == 0
+    assert columnar_library.books_published_between(1900, 2000) == []
+
+
+def test_duplicate_id(columnar_library):
+    book = Book("Book 4", "Author D", 2004, book_id="id1")
+    columnar_library.add_book(book)
+    assert book.id != "id1"
+    assert columnar_library.get_book_by_id("id1").title == "Book 1"
+
+
+def test_books_published_between(columnar_library):
+    assert [book.id for book in columnar_library.books_published_between(1900, 2001)] == ["id2", "id1"]
+
+
+def test_year_out_of_column_range():
+    library = ColumnarLibrary()
+    library.add_book(Book("Book", "Author", 10 ** 30, book_id="id1"))
+    assert library.get_book_by_id("id1").year == str(10 ** 30)
+
+
+def test_compaction_keeps_order(monkeypatch):
+    monkeypatch.setattr(BookColumns, "COMPACT_MIN_ROWS", 2)
+    columns = BookColumns()
+    for i in range(10):
+        columns[f"id{i}"] = Book(f"Book {i}", "Author", 2000 + i, book_id=f"id{i}")
+    for i in range(0, 10, 2):
+        del columns[f"id{i}"]
+    del columns["id9"]
+    assert list(columns) == ["id1", "id3", "id5", "id7"]
+    assert len(columns._ids) == 4
+    assert columns["id7"].year == "2007"
+
+
+def test_load_from_json(tmp_path):
+    file_path = tmp_path / "library.json"
+    file_path.write_text(json.dumps([
+        {"id": "id1", "title": "Book 1", "author": "Author A", "year": "2001", "status": True},
+        {"id": "id2", "title": "Book 2", "author": "Author B", "year": "2002", "status": False},
+    ]))
+    library = ColumnarLibrary.load_from_json(file_path)
+    assert isinstance(library, ColumnarLibrary)
+    assert library.get_book_by_id("id2").status is False
+
+
+def test_matches_library():
+    rng = random.Random(7)
+    words = ["война", "мир", "Толстой", "Пушкин", "1984", "Orwell", "Gesta", "век"]
+    library = Library()
+    columnar = ColumnarLibrary()
+    for i in range(300):
+        book = dict(title=' '.join(rng.sample(words, 2)), author=rng.choice(words),
+                    year=rng.choice([rng.randint(1800, 2024), "XIX век"]), status=rng.random() < 0.5,
+                    book_id=f"id{i}")
+        library.add_book(Book(**book))
+        columnar.add_book(Book(**book))
+    for i in range(0, 300, 4):
+        library.remove_book(f"id{i}")
+        columnar.remove_book(f"id{i}")
+
+    for prompt in ["", "в", "ой", "мир", "19", "ВЕК", "orwell gesta", "nothing"]:
+        assert [book.to_dict() for book in columnar.search_book(prompt)] == \
+            [book.to_dict() for book in library.search_book(prompt)]
+        assert [book.id for book in columnar.search_ranked(prompt, 5)] == \
+            [book.id for book in library.search_ranked(prompt, 5)]
+    assert columnar.count_by_status(False) == sum(not book.status for book in library.books.values())
+    assert [book.id for book in columnar.books_published_between(1900, 1950)] == \
+        [book.id for book in library.books_published_between(1900, 1950)]
+    assert [book.id for book in columnar.checked_out_books()] == \
+        [book.id for book in library.books.values() if not book.status]
+    assert str(columnar) == str(library)
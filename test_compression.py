@@ -0,0 +1,99 @@
+import gzip
+import lzma
+import pytest
+from class_binary_snapshot import BinarySnapshot
+from class_book import Book
+from class_compression import Compression
+from class_library import Library
+
+
+@pytest.fixture
+def library():
+    library = Library()
+    library.add_books(Book(f"Война и мир, том {i}", f"Лев Толстой {i % 3}", 1860 + i, i % 2 == 0, f"id{i}")
+                      for i in range(200))
+    return library
+
+
+def books_of(library):
+    return [book.to_dict() for book in library.books.values()]
+
+
+def test_detection():
+    assert Compression.from_extension("library.json.gz") == "gzip"
+    assert Compression.from_extension("library.lmsb.XZ") == "lzma"
+    assert Compression.from_extension("library.json") is None
+    assert Compression.strip_extension("books.csv.bz2") == "books.csv"
+    assert Compression.strip_extension("books.csv") == "books.csv"
+
+
+@pytest.mark.parametrize("extension", [".gz", ".bz2", ".xz"])
+def test_json_round_trip(library, tmp_path, extension):
+    path = tmp_path / f"library.json{extension}"
+    assert library.dump_to_json(str(path))
+    assert Compression.detect(str(path)) == Compression.from_extension(str(path))
+    # Parallel loading falls back to parsing the compressed stream in this process
+    assert books_of(Library.load(str(path), workers=2)) == books_of(library)
+
+
+@pytest.mark.parametrize("extension", [".gz", ".bz2", ".xz"])
+def test_binary_round_trip(library, tmp_path, extension):
+    path = tmp_path / f"library.lmsb{extension}"
+    assert library.dump_to_binary(str(path))
+    assert BinarySnapshot.is_binary(str(path))
+    assert books_of(Library.load(str(path))) == books_of(library)
+
+
+def test_format_is_detected_from_magic_bytes(library, tmp_path):
+    path = tmp_path / "library.json"
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('[{"id": "id1", "title": "Book", "author": "Author", "year": "2001", "status": true}]')
+    assert [book.id for book in Library.load(str(path)).books.values()] == ["id1"]
+
+    path = tmp_path / "library.dat"
+    with open(path, 'wb') as raw, lzma.open(raw, 'wb') as f:
+        BinarySnapshot.write(f, list(library.books.values()))
+    assert books_of(Library.load(str(path))) == books_of(library)
+
+
+def test_compression_level(library, tmp_path, capsys):
+    fast, small = tmp_path / "fast.json.gz", tmp_path / "small.json.gz"
+    assert library.dump_to_json(str(fast), compression_level=0)
+    assert library.dump_to_json(str(small), compression_level=9)
+    assert small.stat().st_size < fast.stat().st_size
+
+    assert not library.dump_to_json(str(tmp_path / "bad.json.bz2"), compression_level=0)
+    assert "must be between 1 and 9" in capsys.readouterr().out
+    # Nothing is written, not even a temporary file
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["fast.json.gz", "small.json.gz"]
+
+
+def test_same_library_compresses_to_the_same_bytes(library, tmp_path):
+    first, second = tmp_path / "first.json.gz", tmp_path / "second.json.gz"
+    assert library.dump_to_json(str(first)) and library.dump_to_json(str(second))
+    assert first.read_bytes() == second.read_bytes()
+
+
+@pytest.mark.parametrize("name", ["books.csv.gz", "books.jsonl.xz"])
+def test_records_round_trip(library, tmp_path, name):
+    path = tmp_path / name
+    assert library.export_records(str(path))
+    imported = Library()
+    assert imported.import_records(str(path)) == (200, 0)
+    assert books_of(imported) == books_of(library)
+
+
+def test_convert_compressed_files(library, tmp_path):
+    source = tmp_path / "library.json.bz2"
+    assert library.dump_to_json(str(source))
+    assert BinarySnapshot.convert(str(source), str(tmp_path / "library.lmsb.gz"))
+    assert BinarySnapshot.convert(str(tmp_path / "library.lmsb.gz"), str(tmp_path / "copy.json.xz"))
+    assert books_of(Library.load(str(tmp_path / "copy.json.xz"))) == books_of(library)
+
+
+def test_corrupted_file(library, tmp_path, capsys):
+    path = tmp_path / "library.json.gz"
+    assert library.dump_to_json(str(path))
+    path.write_bytes(path.read_bytes()[:100])
+    assert Library.load(str(path)) is None
+    assert "Unexpected error loading library" in capsys.readouterr().out
@@ -0,0 +1,138 @@
+import json
+import threading
+import pytest
+from class_book import Book
+from class_concurrent_library import ConcurrentLibrary
+from class_read_write_lock import ReadWriteLock
+
+
+@pytest.fixture
+def library():
+    library = ConcurrentLibrary()
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    library.add_book(Book("Book 2", "Author B", 2002, status=False, book_id="id2"))
+    return library
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(2, timeout=5)
+
+    def read():
+        with lock.read():
+            # Both readers have to hold the lock at the same time to pass the barrier
+            inside.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not inside.broken
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_write()
+    reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append("read"), lock.release_read()))
+    reader.start()
+    reader.join(0.1)
+    events.append("write done")
+    lock.release_write()
+    reader.join()
+    assert events == ["write done", "read"]
+
+
+def test_lock_is_reentrant():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write(), lock.read():
+            pass
+    with lock.read(), lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+    with pytest.raises(RuntimeError):
+        lock.release_read()
+
+
+def test_library_api(library):
+    assert [book.id for book in library.search_book("book")] == ["id1", "id2"]
+    assert library.get_book_by_id("id2").author == "Author B"
+    library.change_book_status("id2", "в наличии")
+    assert library.count_by_status(True) == 2
+    library.remove_book("id1")
+    assert str(library) == "ID: id2; Название: Book 2, Автор: Author B, Год: 2002 -> в наличии"
+    assert library.search_fuzzy("bok 2")[0].id == "id2"
+
+
+def test_concurrent_readers_and_writers(tmp_path):
+    library = ConcurrentLibrary()
+    errors = []
+
+    def write(worker):
+        try:
+            for number in range(200):
+                library.add_book(Book(f"Book {worker}-{number}", "Author", 2000, book_id=f"id{worker}-{number}"))
+                if number % 3 == 0:
+                    library.remove_book(f"id{worker}-{number}")
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(100):
+                library.search_book("book")
+                library.search_ranked("book 1")
+                str(library)
+        except Exception as e:
+            errors.append(e)
+
+    def save():
+        try:
+            for number in range(10):
+                assert library.dump_to_json(tmp_path / f"library{number % 2}.json")
+        except Exception as e:
+            errors.append(e)
+
+    threads = ([threading.Thread(target=write, args=(worker,)) for worker in range(3)] +
+               [threading.Thread(target=read) for _ in range(3)] + [threading.Thread(target=save)])
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(library.books) == 3 * 133
+    assert len(library.search_book("book")) == 3 * 133
+    assert library.dump_to_json(tmp_path / "library.json")
+    assert len(json.loads((tmp_path / "library.json").read_text())) == 3 * 133
+
+
+def test_dump_snapshot_is_consistent(library, tmp_path, monkeypatch):
+    file_path = tmp_path / "library.json"
+    original_write = ConcurrentLibrary._write_json
+
+    def write_with_concurrent_change(self, *args):
+        # A change made while the file is written doesn't end up in it, and the file is not marked current
+        library.change_book_status("id1", "выдана")
+        return original_write(self, *args)
+
+    monkeypatch.setattr(ConcurrentLibrary, "_write_json", write_with_concurrent_change)
+    assert library.dump_to_json(file_path)
+    assert [book['status'] for book in json.loads(file_path.read_text())] == [True, False]
+    assert library.is_dirty
+    monkeypatch.setattr(ConcurrentLibrary, "_write_json", original_write)
+    assert library.dump_to_json(file_path)
+    assert not library.is_dirty
+
+
+def test_binary_snapshot_and_compact(library, tmp_path):
+    assert library.dump_to_binary(tmp_path / "library.lmsb")
+    assert str(ConcurrentLibrary.load(tmp_path / "library.lmsb")) == str(library)
+
+    journaled = ConcurrentLibrary.open_journaled(str(tmp_path / "journaled.json"))
+    journaled.add_books([Book("Book 3", "Author C", 2003, book_id="id3")])
+    assert journaled.compact()
+    assert not journaled.is_dirty
+    assert [book.id for book in ConcurrentLibrary.open_journaled(str(tmp_path / "journaled.json")).books.values()] == ["id3"]
@@ -0,0 +1,58 @@
+import pytest
+from class_book import Book
+from class_fuzzy_index import FuzzyIndex
+from class_library import Library
+
+
+@pytest.fixture
+def library():
+    library = Library()
+    library.add_book(Book("Мастер и Маргарита", "Михаил Булгаков", 1967, book_id="id1"))
+    library.add_book(Book("Собачье сердце", "Михаил Булгаков", 1987, book_id="id2"))
+    library.add_book(Book("Преступление и наказание", "Фёдор Достоевский", 1866, book_id="id3"))
+    return library
+
+
+@pytest.mark.parametrize("first, second, distance", [
+    ("мастер", "мастер", 0),
+    ("мастре", "мастер", 1),
+    ("мастер", "мастера", 1),
+    ("мастер", "мостар", 2),
+    ("kitten", "sitting", 3),
+])
+def test_edit_distance(first, second, distance):
+    assert FuzzyIndex.edit_distance(first, second, 3) == distance
+
+
+def test_edit_distance_is_bounded():
+    assert FuzzyIndex.edit_distance("kitten", "sitting", 1) == 2
+    assert FuzzyIndex.edit_distance("a", "abcd", 2) == 3
+
+
+def test_search_fuzzy(library):
+    assert library.search_book("булгков") == []
+    assert [book.id for book in library.search_fuzzy("булгков")] == ["id1", "id2"]
+    assert [book.id for book in library.search_fuzzy("Маргрита булгаков")] == ["id1"]
+    assert [book.id for book in library.search_fuzzy("достоевскй преступленеи")] == ["id3"]
+    assert library.search_fuzzy("толстой") == []
+    assert library.search_fuzzy("") == []
+
+
+def test_search_fuzzy_ranks_closer_matches_first():
+    library = Library()
+    library.add_book(Book("Стекло", "Автор", 2000, book_id="id1"))
+    library.add_book(Book("Сетка", "Автор", 2000, book_id="id2"))
+    assert [book.id for book in library.search_fuzzy("сетко")] == ["id2"]
+    assert [book.id for book in library.search_fuzzy("стекол")] == ["id1"]
+    assert [book.id for book in library.search_fuzzy("сетка", limit=1)] == ["id2"]
+
+
+def test_index_follows_library_changes(library):
+    assert library.search_fuzzy("сердце")
+    library.remove_book("id2")
+    library.add_book(Book("Белая гвардия", "Михаил Булгаков", 1925, book_id="id4"))
+    assert library.search_fuzzy("сердце") == []
+    assert [book.id for book in library.search_fuzzy("гвардя")] == ["id4"]
+    # Words no book uses any more are forgotten
+    assert "сердце" not in library._fuzzy_index.similar_words("сердце")
+    assert len(library._fuzzy_index) == 3
@@ -0,0 +1,119 @@
+import json
+import pytest
+from class_book import Book
+from class_journal import Journal
+from class_library import Library
+
+
+def test_append_and_replay(tmp_path):
+    journal = Journal(tmp_path / "library.journal")
+    journal.append(Journal.record_remove("id1"))
+    journal.append(Journal.record_status("id2", False))
+    journal.close()
+    assert list(journal.replay()) == [
+        {'op': 'remove', 'id': "id1"},
+        {'op': 'status', 'id': "id2", 'status': False},
+    ]
+
+
+def test_replay_missing_file(tmp_path):
+    journal = Journal(tmp_path / "missing.journal")
+    assert list(journal.replay()) == []
+
+
+def test_replay_skips_torn_record(tmp_path, capsys):
+    path = tmp_path / "library.journal"
+    path.write_text('{"op":"remove","id":"id1"}\n{"op":"rem', encoding='utf-8')
+    records = list(Journal(path).replay())
+    assert records == [{'op': 'remove', 'id': "id1"}]
+    assert "Skipping corrupted journal record" in capsys.readouterr().out
+
+
+def test_mutations_are_journaled(tmp_path):
+    snapshot = tmp_path / "library.json"
+    library = Library.open_journaled(str(snapshot))
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    library.add_book(Book("Book 2", "Author B", 2002, book_id="id2"))
+    library.change_book_status("id1", "выдана")
+    library.remove_book("id2")
+    # Unknown IDs and statuses are not journaled
+    library.remove_book("invalid_id")
+    library.change_book_status("id1", "unknown")
+    library.journal.close()
+
+    lines = (tmp_path / "library.json.journal").read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['op'] for line in lines] == ['add', 'add', 'status', 'remove']
+    assert not snapshot.exists()
+
+
+def test_unjournaled_mutations_are_taken_back(tmp_path, capsys):
+    snapshot = tmp_path / "library.json"
+    library = Library.open_journaled(str(snapshot))
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    library.add_book(Book("Book 2", "Author B", 2002, book_id="id2"))
+    feed = library.enable_change_feed()
+    library.journal.close()
+    library.journal.path = str(tmp_path / "missing" / "library.json.journal")
+
+    def state():
+        return ([book.to_dict() for book in library.books.values()], library.count_by_status(True),
+                [book.id for book in library.search_book("book")], library.books_published_between(2000, 2010))
+
+    before = state()
+    mutations = [
+        lambda: library.add_book(Book("Book 3", "Author C", 2003, book_id="id3")),
+        lambda: library.add_books([Book("Book 4", "Author D", 2004), Book("Book 5", "Author E", 2005)]),
+        lambda: library.remove_book("id1"),
+        lambda: library.remove_books(["id1", "id2"]),
+        lambda: library.change_book_status("id1", "выдана"),
+        lambda: library.change_books_status([("id1", False), ("id2", False), ("id1", True)]),
+    ]
+    for mutation in mutations:
+        with pytest.raises(OSError):
+            mutation()
+        assert state() == before
+    assert feed.sequence == 0
+    assert "OS error occurred while writing journal" in capsys.readouterr().out
+
+    library.journal.path = str(tmp_path / "library.json.journal")
+    library.remove_book("id2")
+    library.journal.close()
+    assert list(Library.open_journaled(str(snapshot)).books) == ["id1"]
+
+
+def test_replay_on_top_of_snapshot(tmp_path):
+    snapshot = tmp_path / "library.json"
+    library = Library()
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    library.dump_to_json(snapshot)
+
+    library = Library.open_journaled(str(snapshot))
+    library.add_book(Book("Book 2", "Author B", 2002, book_id="id2"))
+    library.change_book_status("id1", "выдана")
+    library.journal.close()
+
+    restored = Library.open_journaled(str(snapshot))
+    assert list(restored.books) == ["id1", "id2"]
+    assert restored.get_book_by_id("id1").status is False
+    assert restored.search_book("Author B")[0].id == "id2"
+
+
+def test_compact(tmp_path):
+    snapshot = tmp_path / "library.json"
+    library = Library.open_journaled(str(snapshot))
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    assert library.compact()
+    assert (tmp_path / "library.json.journal").read_text() == ""
+    with open(snapshot) as f:
+        assert json.load(f)[0]['id'] == "id1"
+
+    # Replaying a journal already folded into the snapshot doesn't duplicate books
+    library.journal.append(Journal.record_add(library.get_book_by_id("id1")))
+    library.journal.close()
+    restored = Library.open_journaled(str(snapshot))
+    assert list(restored.books) == ["id1"]
+
+
+def test_compact_not_journaled(capsys):
+    assert not Library().compact()
+    assert "not opened in journaled mode" in capsys.readouterr().out
@@ -0,0 +1,75 @@
+import io
+import json
+import pytest
+from class_json_stream import JsonArrayReader, NotAnArrayError
+from class_library import Library
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 4096])
+def test_reads_elements_across_chunks(chunk_size):
+    data = [{"title": "Война и мир", "year": "1869"}, 12345, "a, b]", [1, [2]], None, 1.5e10, {}]
+    text = json.dumps(data, indent=4, ensure_ascii=False)
+    assert list(JsonArrayReader(io.StringIO(text), chunk_size=chunk_size)) == data
+
+
+def test_empty_array():
+    assert list(JsonArrayReader(io.StringIO("  [ ]  "))) == []
+
+
+def test_not_an_array():
+    with pytest.raises(NotAnArrayError):
+        list(JsonArrayReader(io.StringIO('{"id": "id1"}')))
+
+
+@pytest.mark.parametrize("text", ["", "[1, 2", "[1 2]", "[1,]", "[1] 2"])
+def test_invalid_json(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(JsonArrayReader(io.StringIO(text), chunk_size=2))
+
+
+def test_literals_and_escapes_across_chunks():
+    text = '[true, false, null, -Infinity, "\\ud83d\\ude00 \\"quoted\\"", "' + 'x' * 100 + '"]'
+    assert list(JsonArrayReader(io.StringIO(text), chunk_size=1)) == \
+        [True, False, None, float('-inf'), "\U0001F600 \"quoted\"", 'x' * 100]
+
+
+def test_syntax_error_is_reported_without_reading_the_rest():
+    class CountingStream(io.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            self.reads += 1
+            return super().read(size)
+
+    stream = CountingStream('[{"id": "id1", "title" "Book"}, ' + ', '.join(['{"id": "id2"}'] * 100000) + ']')
+    with pytest.raises(json.JSONDecodeError, match="Expecting ':' delimiter"):
+        list(JsonArrayReader(stream, chunk_size=64))
+    assert stream.reads == 1
+
+
+def test_load_skips_bad_records_and_reports_progress(tmp_path, capsys):
+    file_path = tmp_path / "library.json"
+    file_path.write_text(json.dumps([
+        {"id": "id1", "title": "Book 1", "author": "Author A", "year": "2001", "status": True},
+        {"id": "id2", "title": "Book 2"},
+        {"id": "id3", "title": "Book 3", "author": "Author C", "year": "2003", "status": False},
+    ]))
+    progress = []
+    library = Library.load_from_json(file_path, progress=progress.append)
+    assert list(library.books) == ["id1", "id3"]
+    assert progress == [1, 2, 3]
+    assert "Error parsing book" in capsys.readouterr().out
+
+
+def test_load_not_a_list(tmp_path, capsys):
+    file_path = tmp_path / "library.json"
+    file_path.write_text('{"id": "id1"}')
+    assert Library.load_from_json(file_path) is None
+    assert "Expected a list of books" in capsys.readouterr().out
+
+
+def test_load_invalid_json(tmp_path, capsys):
+    file_path = tmp_path / "library.json"
+    file_path.write_text('[{"id": "id1"')
+    assert Library.load_from_json(file_path) is None
+    assert "Invalid JSON" in capsys.readouterr().out
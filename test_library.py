@@ -1,7 +1,10 @@
+import gzip
 import pytest
 import os
 import json
+import random
 from class_book import Book
+import class_library
 from class_library import Library
 
 
@@ -119,3 +122,249 @@ def test_load_from_json(tmp_path, sample_books):
 def test_load_from_json_file_not_found():
     library = Library.load_from_json("nonexistent.json")
     assert library is None
+
+
+def test_dump_to_json_compact(library_with_books, tmp_path):
+    pretty_path = tmp_path / "pretty.json"
+    compact_path = tmp_path / "compact.json"
+    library_with_books.dump_to_json(pretty_path)
+    library_with_books.dump_to_json(compact_path, compact=True)
+    assert "\n" not in compact_path.read_text()
+    assert os.path.getsize(compact_path) < os.path.getsize(pretty_path)
+    with open(compact_path) as f:
+        assert json.load(f) == [book.to_dict() for book in library_with_books.books.values()]
+
+
+def test_dirty_tracking(library_with_books, tmp_path):
+    library = library_with_books
+    assert library.changed_book_ids == {"id1", "id2", "id3"}
+    library.dump_to_json(tmp_path / "library.json")
+    assert not library.is_dirty
+    library.change_book_status("id1", "в наличии")
+    assert not library.is_dirty
+    library.change_book_status("id1", "выдана")
+    library.remove_book("id2")
+    assert library.changed_book_ids == {"id1", "id2"}
+
+
+def test_dump_to_json_skips_unchanged_file(library_with_books, tmp_path):
+    file_path = tmp_path / "library.json"
+    library_with_books.dump_to_json(file_path)
+    # Every write replaces the file, so a skipped one keeps its inode
+    inode = os.stat(file_path).st_ino
+    assert library_with_books.dump_to_json(file_path)
+    assert os.stat(file_path).st_ino == inode
+
+    library_with_books.change_book_status("id1", "выдана")
+    assert library_with_books.dump_to_json(file_path)
+    assert os.stat(file_path).st_ino != inode
+
+
+def test_dump_to_json_rewrites_file_with_other_options_or_changed_outside(library_with_books, tmp_path):
+    file_path = tmp_path / "library.json.gz"
+    library_with_books.dump_to_json(file_path)
+    assert library_with_books.dump_to_json(file_path, compact=True)
+    assert "\n" not in gzip.decompress(file_path.read_bytes()).decode()
+    inode = os.stat(file_path).st_ino
+    assert library_with_books.dump_to_json(file_path, compact=True, compression_level=1)
+    assert os.stat(file_path).st_ino != inode
+
+    content = file_path.read_bytes()
+    file_path.write_bytes(gzip.compress(b"[]"))
+    assert library_with_books.dump_to_json(file_path, compact=True, compression_level=1)
+    assert file_path.read_bytes() == content
+
+    # Replaced by another file with the same content, size and modification time
+    replacement = tmp_path / "replacement.json.gz"
+    replacement.write_bytes(content)
+    stat = os.stat(file_path)
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, file_path)
+    inode = os.stat(file_path).st_ino
+    assert library_with_books.dump_to_json(file_path, compact=True, compression_level=1)
+    assert os.stat(file_path).st_ino != inode
+
+
+def test_loaded_library_is_clean(tmp_path, sample_books):
+    file_path = tmp_path / "library.json"
+    with open(file_path, "w") as f:
+        json.dump([book.to_dict() for book in sample_books], f)
+    library = Library.load_from_json(file_path)
+    assert not library.is_dirty
+    # A different file is still written
+    assert library.dump_to_json(tmp_path / "copy.json")
+    assert (tmp_path / "copy.json").exists()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_lossy_load_is_not_skipped_on_save(tmp_path, workers, capsys):
+    file_path = tmp_path / "library.json"
+    records = [
+        {"id": "id1", "title": "Book 1", "author": "Author", "year": "2001", "status": True},
+        {"id": "id1", "title": "Book 2", "author": "Author", "year": "2002", "status": True},
+        {"id": "id3", "title": "Book 3"},
+    ]
+    file_path.write_text(json.dumps(records))
+    library = Library.load_from_json(file_path, workers=workers)
+    assert "Error parsing book" in capsys.readouterr().out
+    assert library.is_dirty
+    assert library.dump_to_json(file_path)
+    saved = json.loads(file_path.read_text())
+    assert [book["title"] for book in saved] == ["Book 1", "Book 2"]
+    assert saved[1]["id"] != "id1"
+
+    reloaded = Library.load_from_json(file_path, workers=workers)
+    assert not reloaded.is_dirty
+
+
+def test_saved_file_permissions(library_with_books, tmp_path, monkeypatch):
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert class_library.NEW_FILE_MODE == 0o666 & ~umask
+
+    monkeypatch.setattr(class_library, "NEW_FILE_MODE", 0o640)
+    file_path = tmp_path / "library.json"
+    assert library_with_books.dump_to_json(file_path)
+    assert os.stat(file_path).st_mode & 0o777 == 0o640
+    # A replaced file keeps its permissions
+    os.chmod(file_path, 0o600)
+    assert library_with_books.dump_to_json(file_path, compact=True)
+    assert os.stat(file_path).st_mode & 0o777 == 0o600
+
+
+def test_dump_to_json_is_atomic(library_with_books, tmp_path, monkeypatch):
+    file_path = tmp_path / "library.json"
+    library_with_books.dump_to_json(file_path)
+    original = file_path.read_text()
+    library_with_books.remove_book("id1")
+
+    def failing_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", failing_dump)
+    assert not library_with_books.dump_to_json(file_path)
+    assert file_path.read_text() == original
+    assert os.listdir(tmp_path) == ["library.json"]
+
+
+def test_add_books(sample_books):
+    library = Library()
+    library.add_book(Book("Existing", "Author", 2000, book_id="id1"))
+    result = library.add_books(sample_books)
+    assert len(result) == 3
+    assert result.count("added") == 3
+    assert len(library.books) == 4
+    # The duplicate ID is regenerated like in add_book
+    assert result.ids("added")[0] != "id1"
+    assert result.ids("added")[1:] == ["id2", "id3"]
+    assert library.search_book("Book 3")[0].id == "id3"
+
+
+def test_remove_books(library_with_books):
+    result = library_with_books.remove_books(["id1", "invalid_id", "id3"])
+    assert result.items == [("id1", "removed"), ("invalid_id", "not found"), ("id3", "removed")]
+    assert list(library_with_books.books) == ["id2"]
+    assert library_with_books.books_published_between(2000, 2010)[0].id == "id2"
+
+
+def test_change_books_status(library_with_books):
+    result = library_with_books.change_books_status([
+        ("id1", "выдана"), ("id2", "В наличии"), ("id3", False), ("invalid_id", "выдана"), ("id2", "unknown")])
+    assert result.items == [("id1", "updated"), ("id2", "unchanged"), ("id3", "updated"),
+                            ("invalid_id", "not found"), ("id2", "invalid status")]
+    assert str(result) == "updated: 2, unchanged: 1, not found: 1, invalid status: 1"
+    assert [book.id for book in library_with_books.checked_out_books()] == ["id1", "id3"]
+    assert library_with_books.count_by_status(True) == 1
+
+
+def test_change_books_status_rejects_non_boolean_statuses(library_with_books):
+    result = library_with_books.change_books_status([("id1", 0), ("id2", 1), ("id3", ["выдана"]), ("id1", None)])
+    assert result.items == [("id1", "invalid status"), ("id2", "invalid status"), ("id3", "invalid status"),
+                            ("id1", "invalid status")]
+    assert library_with_books.count_by_status(True) == 3
+
+
+def test_iter_lines_pagination(library_with_books):
+    lines = list(library_with_books.iter_lines(offset=1, limit=1))
+    assert lines == ["ID: id2; Название: Book 2, Автор: Author B, Год: 2002 -> в наличии"]
+    assert len(list(library_with_books.iter_lines(offset=1))) == 2
+    assert list(library_with_books.iter_lines(offset=5)) == []
+
+
+def test_iter_lines_sorted():
+    library = Library()
+    library.add_book(Book("b", "Author C", "XIX век", book_id="id1"))
+    library.add_book(Book("C", "author A", 2001, book_id="id2"))
+    library.add_book(Book("a", "Author B", 1999, book_id="id3"))
+
+    def ids(**kwargs):
+        return [line.split(';')[0] for line in library.iter_lines(**kwargs)]
+
+    assert ids(sort_by="title") == ["ID: id3", "ID: id1", "ID: id2"]
+    assert ids(sort_by="author") == ["ID: id2", "ID: id3", "ID: id1"]
+    assert ids(sort_by="year") == ["ID: id3", "ID: id2", "ID: id1"]
+    assert ids(sort_by="year", offset=1, limit=1) == ["ID: id2"]
+    with pytest.raises(ValueError):
+        list(library.iter_lines(sort_by="status"))
+
+
+def test_render_writes_in_chunks(library_with_books, monkeypatch):
+    class Stream:
+        def __init__(self):
+            self.writes = []
+
+        def write(self, text):
+            self.writes.append(text)
+
+    monkeypatch.setattr(Library, "RENDER_CHUNK_SIZE", 2)
+    stream = Stream()
+    assert library_with_books.render(stream) == 3
+    assert len(stream.writes) == 2
+    assert ''.join(stream.writes) == str(library_with_books) + '\n'
+    assert library_with_books.render(stream, offset=3) == 0
+
+
+@pytest.fixture
+def ranked_library():
+    library = Library()
+    library.add_book(Book("История 1984 года", "Автор", 2000, book_id="substring_title"))
+    library.add_book(Book("Сборник", "1984", 2001, book_id="exact_author"))
+    library.add_book(Book("Другая книга", "Автор", 1984, book_id="exact_year"))
+    library.add_book(Book("1984 и другие", "Автор", 2002, book_id="prefix_title"))
+    library.add_book(Book("1984", "Джордж Оруэлл", 1949, book_id="exact_title"))
+    library.add_book(Book("Ничего общего", "Автор", 2003, book_id="no_match"))
+    return library
+
+
+def test_search_ranked(ranked_library):
+    assert [book.id for book in ranked_library.search_ranked("1984")] == \
+        ["exact_title", "exact_author", "exact_year", "prefix_title", "substring_title"]
+    assert [book.id for book in ranked_library.search_ranked("1984", limit=2)] == ["exact_title", "exact_author"]
+    assert ranked_library.search_ranked("1984", limit=0) == []
+    assert ranked_library.search_ranked("nothing") == []
+
+
+def test_search_ranked_keeps_insertion_order_of_ties(ranked_library):
+    assert [book.id for book in ranked_library.search_ranked("автор", limit=3)] == \
+        ["substring_title", "exact_year", "prefix_title"]
+
+
+def test_top_matches_stops_early():
+    consumed = []
+
+    def scored():
+        for number in range(100):
+            consumed.append(number)
+            yield Library.BEST_SCORE if number % 2 else 1, number
+
+    assert Library._top_matches(scored(), 3) == [1, 3, 5]
+    assert len(consumed) == 6
+
+
+def test_top_matches_equals_full_sort():
+    rng = random.Random(7)
+    for limit in (1, 3, 10, 50):
+        scores = [rng.choice([0, 0, 1, 2, 4, 5, 7, 8, 9]) for _ in range(200)]
+        expected = sorted((-score, number) for number, score in enumerate(scores) if score)[:limit]
+        assert Library._top_matches(((score, number) for number, score in enumerate(scores)), limit) == \
+            [number for _, number in expected]
@@ -0,0 +1,120 @@
+import sys
+import pytest
+from class_book import Book
+from class_binary_snapshot import BinarySnapshot
+from class_library import Library
+from class_mapped_library import MappedLibrary
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    library = Library()
+    library.add_book(Book("Последний кольценосец", "Кирилл Еськов", 1999, book_id="id3"))
+    library.add_book(Book("1984", "Джордж Оруэлл", "1949", status=False, book_id="id1"))
+    library.add_book(Book("Gesta Francorum", "неизвестный автор", "XII век", book_id="ид2"))
+    file_path = tmp_path / "library.lmsb"
+    library.dump_to_binary(file_path)
+    return file_path
+
+
+def test_get_book_by_id(snapshot_path):
+    with MappedLibrary(snapshot_path) as library:
+        assert library.get_book_by_id("id1").title == "1984"
+        assert library.get_book_by_id("ид2").author == "неизвестный автор"
+        assert library.get_book_by_id("id2") is None
+        assert "id3" in library.books
+        assert len(library.books) == 3
+
+
+def test_iteration_keeps_file_order(snapshot_path):
+    with MappedLibrary(snapshot_path) as library:
+        assert list(library.books) == ["id3", "id1", "ид2"]
+        assert str(library) == str(Library.load_from_binary(snapshot_path))
+
+
+def test_search_book(snapshot_path):
+    with MappedLibrary(snapshot_path) as library:
+        assert [book.id for book in library.search_book("ОРУЭЛЛ")] == ["id1"]
+        assert [book.id for book in library.search_book("19")] == ["id3", "id1"]
+        assert library.search_book("nothing") == []
+
+
+def test_search_ranked(snapshot_path):
+    with MappedLibrary(snapshot_path) as library:
+        assert [book.id for book in library.search_ranked("1984")] == ["id1"]
+        assert [book.id for book in library.search_ranked("19", 1)] == ["id1"]
+
+
+def test_search_fuzzy_scans_the_records(tmp_path):
+    library = Library()
+    authors = ["Лев Толстой", "Алексей Толстой", "Толстых"]
+    for i in range(60):
+        library.add_book(Book(f"Война и мир {i % 7}", authors[i % 3], 1860 + i, book_id=f"id{i}"))
+    file_path = tmp_path / "library.lmsb"
+    library.dump_to_binary(file_path)
+    with MappedLibrary(file_path) as mapped:
+        queries = [("толстой", 10), ("Лев Толстои", 5), ("вйона 3", 3), ("мир", 100), ("xyz", 10), ("", 10)]
+        for prompt, limit in queries:
+            assert [book.id for book in mapped.search_fuzzy(prompt, limit)] == \
+                   [book.id for book in library.search_fuzzy(prompt, limit)]
+        assert mapped._fuzzy_index is None
+
+
+def test_queries(snapshot_path):
+    with MappedLibrary(snapshot_path) as library:
+        assert [book.id for book in library.checked_out_books()] == ["id1"]
+        assert library.count_by_status(True) == 2
+        assert [book.id for book in library.books_published_between(1900, 2000)] == ["id1", "id3"]
+
+
+def test_read_only(snapshot_path):
+    with MappedLibrary(snapshot_path) as library:
+        with pytest.raises(TypeError):
+            library.add_book(Book("Book", "Author", 2000))
+        with pytest.raises(TypeError):
+            library.remove_book("id1")
+        with pytest.raises(TypeError):
+            library.change_book_status("id1", "в наличии")
+
+
+def test_dump_to_json(snapshot_path, tmp_path):
+    json_path = tmp_path / "library.json"
+    with MappedLibrary(snapshot_path) as library:
+        assert library.dump_to_json(json_path)
+    assert list(Library.load_from_json(json_path).books) == ["id3", "id1", "ид2"]
+
+
+def test_large_snapshot_lookup(tmp_path):
+    library = Library()
+    for i in range(1000):
+        library.add_book(Book(f"Book {i}", "Author", 2000, book_id=f"id{i}"))
+    file_path = tmp_path / "library.lmsb"
+    library.dump_to_binary(file_path)
+    with MappedLibrary(file_path) as mapped:
+        for i in range(0, 1000, 37):
+            assert mapped.get_book_by_id(f"id{i}").title == f"Book {i}"
+
+
+@pytest.mark.skipif(sys.byteorder != 'little', reason="the index is only mapped in place on little-endian machines")
+def test_index_is_not_copied(snapshot_path):
+    library = MappedLibrary(snapshot_path)
+    index = library.books._index
+    assert isinstance(index, memoryview) and index.obj is library._map
+    library.close()
+    assert library._map.closed
+    assert library.books == {} and library.get_book_by_id("id1") is None
+
+
+def test_version_1_snapshot_is_rejected(tmp_path, capsys):
+    file_path = tmp_path / "library.lmsb"
+    record = BinarySnapshot.encode_book(Book("Book", "Author", 2000, book_id="id1"))
+    file_path.write_bytes(BinarySnapshot._header.pack(BinarySnapshot.MAGIC, 1, 0, 1) + record)
+    # Version 1 snapshots still load into a regular library
+    assert list(Library.load_from_binary(file_path).books) == ["id1"]
+    assert MappedLibrary.load_from_binary(file_path) is None
+    assert "has no ID index" in capsys.readouterr().out
+
+
+def test_missing_file(tmp_path, capsys):
+    assert MappedLibrary.load(tmp_path / "missing.lmsb") is None
+    assert "does not exist" in capsys.readouterr().out
@@ -0,0 +1,146 @@
+import pytest
+from class_application import Application
+from class_book import Book
+from class_concurrent_library import ConcurrentLibrary
+from class_library import Library
+from class_metrics import Metrics, OperationStats, profile
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    yield metrics
+    metrics.disable()
+
+
+def test_disabled_metrics_leave_the_operations_untouched(metrics):
+    search_book = Library.search_book
+    metrics.enable()
+    assert Library.search_book is not search_book
+    metrics.disable()
+    assert Library.search_book is search_book
+    assert not metrics.enabled
+    Library().search_book("x")
+    assert metrics.snapshot() == {}
+
+
+def test_records_calls_latency_and_file_traffic(metrics, tmp_path):
+    metrics.enable()
+    library = Library()
+    library.add_book(Book("Book 1", "Author A", 2001))
+    library.search_book("book")
+    library.search_book("author")
+    path = str(tmp_path / "library.json")
+    assert library.dump_to_json(path)
+    assert Library.load(path) is not None
+    assert Library.load(str(tmp_path / "missing.json")) is None
+
+    snapshot = metrics.snapshot()
+    assert snapshot["search_book"]["calls"] == 2
+    assert sum(snapshot["search_book"]["histogram"].values()) == 2
+    size = (tmp_path / "library.json").stat().st_size
+    assert snapshot["dump_to_json"]["bytes_written"] == size
+    assert snapshot["load"] == {**snapshot["load"], "calls": 2, "failures": 1, "bytes_read": size}
+    assert "search_book" in metrics.report()
+
+
+def test_unchanged_saves_write_nothing(metrics, tmp_path):
+    library = Library()
+    library.add_book(Book("Book 1", "Author A", 2001))
+    path = str(tmp_path / "library.json")
+    metrics.enable()
+    assert library.dump_to_json(path)
+    assert library.dump_to_json(path)
+    assert library.dump_to_json(path)
+    snapshot = metrics.snapshot()["dump_to_json"]
+    assert snapshot["calls"] == 3
+    assert snapshot["bytes_written"] == (tmp_path / "library.json").stat().st_size
+
+
+def test_nested_operations_are_not_recorded(metrics, tmp_path):
+    library = Library()
+    for i in range(5):
+        library.add_book(Book(f"Book {i}", "Author A", 2001))
+    path = str(tmp_path / "library.json")
+    library.dump_to_json(path)
+    metrics.enable()
+    assert len(Library.load(path).books) == 5
+    snapshot = metrics.snapshot()
+    assert list(snapshot) == ["load"]
+    assert snapshot["load"]["bytes_read"] == (tmp_path / "library.json").stat().st_size
+
+
+def test_nested_calls_of_the_same_operation_are_recorded_once(metrics, tmp_path):
+    metrics.enable()
+    library = ConcurrentLibrary()
+    library.add_book(Book("Book 1", "Author A", 2001))
+    library.search_book("book")
+    library.open_journaled(str(tmp_path / "library.json")).compact()
+    snapshot = metrics.snapshot()
+    assert snapshot["add_book"]["calls"] == 1
+    assert snapshot["search_book"]["calls"] == 1
+    assert snapshot["compact"]["calls"] == 1
+
+
+def test_application_handlers_are_recorded(metrics, monkeypatch, capsys):
+    monkeypatch.setattr("class_application.metrics", metrics)
+    app = Application()
+    app.handle_show_metrics()
+    assert "--metrics" in capsys.readouterr().out
+
+    metrics.enable()
+    app.handle_print_library()
+    app.handle_show_metrics()
+    assert "handle_print_library" in capsys.readouterr().out
+    assert metrics.snapshot()["handle_print_library"]["calls"] == 1
+
+
+def test_failures_count_exceptions(metrics):
+    metrics.enable()
+    with pytest.raises(AttributeError):
+        Library().search_book(None)
+    assert metrics.snapshot()["search_book"]["failures"] == 1
+
+
+def test_only_one_instance_instruments_an_operation(metrics):
+    search_book = Library.search_book
+    metrics.enable()
+    other = Metrics()
+    with pytest.raises(RuntimeError, match="is already instrumented by other metrics"):
+        other.enable()
+    assert not other.enabled
+    # Enabling again, e.g. with other profiled operations, replaces the own wrappers
+    metrics.enable()
+    Library().search_book("x")
+    assert metrics.snapshot()["search_book"]["calls"] == 1
+    metrics.disable()
+    assert Library.search_book is search_book
+    other.enable()
+    other.disable()
+    assert Library.search_book is search_book
+
+
+def test_histogram_buckets():
+    stats = OperationStats()
+    stats.record(0.0005, False, 0, 0)
+    stats.record(0.5, False, 0, 0)
+    stats.record(60, False, 0, 0)
+    histogram = stats.to_dict()["histogram"]
+    assert histogram["<=1ms"] == histogram["<=1000ms"] == histogram[">10000ms"] == 1
+
+
+def test_profiled_operations_write_reports(metrics, tmp_path):
+    metrics.enable({"search_book": "cpu", "add_book": "memory"}, str(tmp_path))
+    library = Library()
+    library.add_book(Book("Book 1", "Author A", 2001))
+    assert library.search_book("book")
+    reports = sorted(path.name for path in tmp_path.iterdir())
+    assert reports == ["add_book-0001.memory.txt", "search_book-0002.cpu.txt"]
+    assert "Peak:" in (tmp_path / reports[0]).read_text()
+    assert "search_book" in (tmp_path / reports[1]).read_text()
+
+
+def test_profile_returns_the_result(tmp_path):
+    assert profile(lambda: 42, str(tmp_path / "report.txt"), "memory") == 42
+    with pytest.raises(ValueError):
+        profile(lambda: 42, str(tmp_path / "report.txt"), "disk")
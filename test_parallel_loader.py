@@ -0,0 +1,122 @@
+import json
+import pytest
+from class_json_stream import NotAnArrayError
+from class_library import Library
+from class_parallel_loader import ParallelJsonLoader
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Many tiny ranges, so elements and multi-byte characters cross range boundaries
+    monkeypatch.setattr(ParallelJsonLoader, "CHUNK_SIZE", 37)
+    monkeypatch.setattr(ParallelJsonLoader, "OVERLAP", 5)
+
+
+def book_records(count):
+    return [{"id": f"id{i}", "title": f"Война и мир, том {i}", "author": f"Лев Толстой {i % 3}",
+             "year": str(1860 + i), "status": i % 2 == 0} for i in range(count)]
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+@pytest.mark.parametrize("workers", [None, 3])
+def test_parallel_load_matches_sequential(tmp_path, small_chunks, indent, workers):
+    records = book_records(40)
+    # Strings that look like the start of an element mislead the guesses of the workers
+    records[5]["title"] = '", {"id": "fake", "title": "x", "author": "y", "year": "1", "status": true}, {'
+    records[6]["author"] = ',{ , {'
+    file_path = tmp_path / "library.json"
+    file_path.write_text(json.dumps(records, indent=indent, ensure_ascii=False), encoding='utf-8')
+
+    sequential = Library.load_from_json(file_path)
+    parallel = Library.load_from_json(file_path, workers=workers)
+    assert [book.to_dict() for book in parallel.books.values()] == \
+           [book.to_dict() for book in sequential.books.values()]
+    assert not parallel.is_dirty
+
+
+def test_parallel_load_reports_bad_records_and_progress(tmp_path, small_chunks, capsys):
+    records = book_records(10)
+    del records[3]["author"]
+    records[7] = 12345
+    file_path = tmp_path / "library.json"
+    file_path.write_text(json.dumps(records))
+
+    progress = []
+    library = Library.load_from_json(file_path, progress=progress.append, workers=2)
+    assert len(library.books) == 8
+    assert capsys.readouterr().out.count("Error parsing book:") == 2
+    assert progress == sorted(progress) and progress[-1] == 10
+
+
+def test_parallel_load_regenerates_duplicate_ids(tmp_path, small_chunks):
+    records = book_records(3)
+    records[2]["id"] = "id0"
+    file_path = tmp_path / "library.json"
+    file_path.write_text(json.dumps(records))
+
+    library = Library.load_from_json(file_path, workers=2)
+    assert len(library.books) == 3
+    assert library.books["id0"].title == records[0]["title"]
+
+
+def test_empty_array(tmp_path):
+    file_path = tmp_path / "library.json"
+    file_path.write_text(" [ ] \n")
+    assert list(ParallelJsonLoader(file_path, 2)) == []
+
+
+def test_not_an_array(tmp_path):
+    file_path = tmp_path / "library.json"
+    file_path.write_text('{"id": "id1"}')
+    with pytest.raises(NotAnArrayError):
+        list(ParallelJsonLoader(file_path, 2))
+
+
+@pytest.mark.parametrize("text", ["", "  ", '[{"a": 1}, {"a": 2}', '[{"a": 1} {"a": 2}]', '[{"a": 1},]',
+                                  '[{"a": 1}] 2', '[{"a": 1}, {"a": 2'])
+def test_invalid_json(tmp_path, small_chunks, text):
+    file_path = tmp_path / "library.json"
+    file_path.write_text(text)
+    with pytest.raises(json.JSONDecodeError):
+        list(ParallelJsonLoader(file_path, 2))
+
+
+def test_worker_count(tmp_path, monkeypatch):
+    file_path = tmp_path / "library.json"
+    file_path.write_text(json.dumps(book_records(40)))
+    # A small file is parsed in the calling process whatever the number of workers
+    assert ParallelJsonLoader.worker_count(file_path, 8) == 1
+    monkeypatch.setattr(ParallelJsonLoader, "CHUNK_SIZE", -(-file_path.stat().st_size // 5))
+    assert ParallelJsonLoader.worker_count(file_path, 2) == 2
+    assert ParallelJsonLoader.worker_count(file_path, 100) == 5
+    monkeypatch.setattr(ParallelJsonLoader, "available_cpus", staticmethod(lambda: 3))
+    assert ParallelJsonLoader.worker_count(file_path) == 3
+
+
+def test_small_file_is_not_loaded_in_parallel(tmp_path, monkeypatch):
+    file_path = tmp_path / "library.json"
+    file_path.write_text(json.dumps(book_records(10)))
+    monkeypatch.setattr(ParallelJsonLoader, "__iter__", lambda self: pytest.fail("parsed in parallel"))
+    assert len(Library.load_from_json(file_path, workers=None).books) == 10
+
+
+def test_invalid_element_fails_range_without_reading_the_rest(tmp_path, monkeypatch):
+    records = book_records(2000)
+    text = json.dumps(records, ensure_ascii=False)
+    # A missing colon in the middle of the file, far from the end of the decoded text
+    bad = text.index('"id": "id1000"')
+    text = text[:bad] + '"id" "id1000"' + text[bad + len('"id": "id1000"'):]
+    file_path = tmp_path / "library.json"
+    file_path.write_text(text, encoding='utf-8')
+    size = file_path.stat().st_size
+    start = text.encode('utf-8').index(b'{"id": "id990"')
+
+    decoded = []
+    char_boundary = ParallelJsonLoader._char_boundary
+    monkeypatch.setattr(ParallelJsonLoader, "_char_boundary",
+                        staticmethod(lambda data, position: decoded.append(position) or char_boundary(data, position)))
+    with pytest.raises(json.JSONDecodeError, match="Expecting ':' delimiter"):
+        ParallelJsonLoader.parse_range(file_path, start, start + 4096, exact=True)
+    assert ParallelJsonLoader.parse_range(file_path, start - 100, start + 4096, exact=False)[0] is None
+    # The ranges stop decoding at the end of the range, not at the end of the file
+    assert max(decoded) <= start + 4096 < size - ParallelJsonLoader.OVERLAP
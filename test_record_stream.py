@@ -0,0 +1,112 @@
+import io
+import json
+import pytest
+from class_book import Book
+from class_library import Library
+from class_record_stream import RecordError, RecordStream
+
+
+@pytest.fixture
+def library():
+    library = Library()
+    library.add_book(Book("Мастер и Маргарита", "Михаил Булгаков", 1967, book_id="id1"))
+    library.add_book(Book('Книга, "в кавычках"\nи с переносом', "Автор", "XIX век", status=False, book_id="id2"))
+    return library
+
+
+@pytest.mark.parametrize("extension", ["csv", "jsonl"])
+def test_export_and_import_round_trip(library, tmp_path, extension):
+    path = tmp_path / f"library.{extension}"
+    assert library.export_records(path)
+    restored = Library()
+    assert restored.import_records(path) == (2, 0)
+    assert [book.to_dict() for book in restored.books.values()] == \
+        [book.to_dict() for book in library.books.values()]
+
+
+def test_export_streams_rows(library):
+    f = io.StringIO()
+    assert RecordStream.write_jsonl(f, library.books.values()) == 2
+    assert json.loads(f.getvalue().splitlines()[0]) == library.get_book_by_id("id1").to_dict()
+    f = io.StringIO()
+    RecordStream.write_csv(f, iter([library.get_book_by_id("id1")]))
+    assert f.getvalue() == "id,title,author,year,status\nid1,Мастер и Маргарита,Михаил Булгаков,1967,true\n"
+
+
+def test_import_csv_reports_errors_per_line(tmp_path):
+    path = tmp_path / "catalogue.csv"
+    path.write_text("title,author,year,status\n"
+                    "Book 1,Author A,2001,выдана\n"
+                    ",Author B,2002,\n"
+                    "Book 3,Author C,2003,lost\n"
+                    '"Book\n4",Author D,2004,\n'
+                    "Book 5,Author E\n"
+                    "Book 6,Author F,2006,1,extra\n", encoding='utf-8')
+    errors = []
+    library = Library()
+    assert library.import_records(path, on_error=lambda line, message: errors.append((line, message))) == (2, 4)
+    assert errors == [(3, "Missing or invalid field 'title'"), (4, "Invalid status 'lost'"),
+                      (7, "Missing or invalid field 'year'"), (8, "Too many values")]
+    books = list(library.books.values())
+    assert [(book.title, book.status) for book in books] == [("Book 1", False), ("Book\n4", True)]
+
+
+def test_import_csv_counts_blank_lines(tmp_path):
+    path = tmp_path / "catalogue.csv"
+    path.write_text("\ntitle,author,year\n\n\nBook 1,Author A,\n\n\"Book\n2\",Author B,2002\n\nBook 3,Author C\n",
+                    encoding='utf-8')
+    errors = []
+    library = Library()
+    assert library.import_records(path, on_error=lambda line, message: errors.append((line, message))) == (1, 2)
+    assert errors == [(5, "Missing or invalid field 'year'"), (10, "Missing or invalid field 'year'")]
+
+
+def test_import_jsonl_reports_errors_per_line(tmp_path, capsys):
+    path = tmp_path / "catalogue.jsonl"
+    path.write_text('{"title": "Book 1", "author": "Author A", "year": 2001, "id": "id1"}\n'
+                    '\n'
+                    '{"title": "Book 2", "author": "Author B"}\n'
+                    'not json\n'
+                    '[1]\n'
+                    '{"title": "Book 3", "author": "Author C", "year": "2003", "status": false}\n', encoding='utf-8')
+    library = Library()
+    assert library.import_records(path) == (2, 3)
+    output = capsys.readouterr().out.splitlines()
+    assert output[0] == f"Skipping line 3 of {path}: Missing or invalid field 'year'"
+    assert output[1].startswith(f"Skipping line 4 of {path}: Invalid JSON")
+    assert list(library.books)[0] == "id1"
+    assert library.search_book("book 3")[0].status is False
+
+
+def test_import_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(Library, "IMPORT_CHUNK_SIZE", 2)
+    path = tmp_path / "catalogue.jsonl"
+    path.write_text(''.join(json.dumps({"title": f"Book {number}", "author": "Author", "year": 2000}) + '\n'
+                            for number in range(5)), encoding='utf-8')
+    library = Library()
+    sizes = []
+    add_books = library.add_books
+    monkeypatch.setattr(library, "add_books", lambda books: (sizes.append(len(books)), add_books(books))[1])
+    assert library.import_records(path) == (5, 0)
+    assert sizes == [2, 2, 1]
+
+
+def test_invalid_files(tmp_path, capsys):
+    library = Library()
+    assert library.import_records(tmp_path / "catalogue.xml") == (0, 0)
+    assert "Unknown file format '.xml'" in capsys.readouterr().out
+    assert library.import_records(tmp_path / "missing.csv") == (0, 0)
+    assert not library.export_records(tmp_path / "library.txt")
+    path = tmp_path / "catalogue.csv"
+    path.write_text("name,author\nBook,Author\n", encoding='utf-8')
+    errors = []
+    assert library.import_records(path, on_error=lambda *error: errors.append(error)) == (0, 1)
+    assert errors == [(1, "Missing columns title, year")]
+
+
+def test_book_from_record_validation():
+    assert RecordStream.book_from_record({"title": "Book", "author": "Author", "year": " 2001 "}).year_as_int() == 2001
+    with pytest.raises(RecordError):
+        RecordStream.book_from_record({"title": "Book", "author": "Author", "year": True})
+    with pytest.raises(RecordError):
+        RecordStream.book_from_record({"title": "Book", "author": "Author", "year": 2001, "id": 5})
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import pytest
+from class_book import Book
+from class_concurrent_library import ConcurrentLibrary
+from class_library import Library
+from class_replica import RemoteLibrary, Replica
+from class_server import LibraryServer
+
+
+def books_of(library):
+    return sorted((book.to_dict() for book in library.books.values()), key=lambda book: book['id'])
+
+
+@pytest.fixture
+def primary():
+    library = Library()
+    library.add_books(Book(f"Book {i}", f"Author {i % 3}", 1900 + i, book_id=f"id{i}") for i in range(50))
+    library.enable_change_feed(capacity=20)
+    return library
+
+
+def test_replica_applies_only_the_changes(primary):
+    replica = Replica(primary)
+    assert replica.sync() == 0
+    assert replica.snapshots == 1 and books_of(replica.library) == books_of(primary)
+
+    primary.add_book(Book("New book", "Author", 2024, book_id="new"))
+    primary.remove_books(["id1", "id2"])
+    primary.change_book_status("id3", "выдана")
+    library = replica.library
+    assert replica.sync() == 4
+    # Nothing was transferred but the changes
+    assert replica.snapshots == 1 and replica.library is library
+    assert books_of(replica.library) == books_of(primary)
+    assert replica.library.search_book("new book")[0].id == "new"
+    assert replica.sync() == 0
+
+
+def test_replica_syncs_in_batches(primary, monkeypatch):
+    monkeypatch.setattr(Replica, "BATCH_SIZE", 3)
+    replica = Replica(primary)
+    replica.sync()
+    primary.remove_books(f"id{i}" for i in range(10))
+    assert replica.sync() == 10
+    assert books_of(replica.library) == books_of(primary)
+
+
+def test_replica_falls_back_to_a_snapshot(primary):
+    replica = Replica(primary, ConcurrentLibrary)
+    replica.sync()
+    # More changes than the feed retains
+    primary.remove_books(f"id{i}" for i in range(30))
+    assert replica.sync() == 0
+    assert replica.snapshots == 2 and isinstance(replica.library, ConcurrentLibrary)
+    assert books_of(replica.library) == books_of(primary)
+
+    # A new feed, e.g. the primary was restarted
+    primary.enable_change_feed()
+    primary.remove_book("id30")
+    assert replica.sync() == 0
+    assert replica.snapshots == 3 and books_of(replica.library) == books_of(primary)
+
+
+def test_remote_replica():
+    server = LibraryServer()
+    server.library.add_books([Book("Book 1", "Author", 2001, book_id="id1"), Book("Book 2", "Author", 2002)])
+    started = threading.Event()
+    loop = asyncio.new_event_loop()
+
+    async def start():
+        await server.start(port=0)
+        started.set()
+
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(start()), loop.run_forever()))
+    thread.start()
+    started.wait()
+    try:
+        with RemoteLibrary(port=server.addresses[0][1]) as remote:
+            replica = Replica(remote)
+            assert replica.sync() == 0 and books_of(replica.library) == books_of(server.library)
+            server.library.remove_book("id1")
+            server.library.add_book(Book("Book 3", "Author", 2003))
+            assert replica.sync() == 2 and books_of(replica.library) == books_of(server.library)
+            assert replica.snapshots == 1
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_unreachable_primary(capsys):
+    replica = Replica(RemoteLibrary(port=1, timeout=1))
+    assert replica.sync() is None
+    assert "Error syncing replica" in capsys.readouterr().out
+    assert replica.feed_id is None and replica.library.books == {}
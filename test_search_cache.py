@@ -0,0 +1,78 @@
+import pytest
+from class_book import Book
+from class_columnar_library import ColumnarLibrary
+from class_library import Library
+from class_search_cache import SearchCache
+
+
+@pytest.fixture
+def library():
+    library = Library()
+    library.add_book(Book("Мастер и Маргарита", "Михаил Булгаков", 1967, book_id="id1"))
+    library.add_book(Book("Собачье сердце", "Михаил Булгаков", 1987, book_id="id2"))
+    library.add_book(Book("Идиот", "Фёдор Достоевский", 1869, book_id="id3"))
+    library.enable_search_cache(capacity=8)
+    return library
+
+
+def test_lru_eviction():
+    cache = SearchCache(capacity=2)
+    cache.put(("a", None), ["id1"])
+    cache.put(("b", None), ["id2"])
+    assert cache.get(("a", None)) == ["id1"]
+    cache.put(("c", None), ["id3"])
+    assert cache.get(("b", None)) is None
+    assert cache.get(("c", None)) == ["id3"]
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert len(cache) == 2
+    with pytest.raises(ValueError):
+        SearchCache(capacity=0)
+
+
+def test_repeated_search_hits_cache(library):
+    assert [book.id for book in library.search_book("БУЛГАКОВ")] == ["id1", "id2"]
+    assert [book.id for book in library.search_book("булгаков")] == ["id1", "id2"]
+    assert [book.id for book in library.search_ranked("булгаков", 1)] == ["id1"]
+    assert (library.search_cache.hits, library.search_cache.misses) == (1, 2)
+
+
+def test_add_and_remove_evict_only_matching_prompts(library):
+    library.search_book("булгаков")
+    library.search_book("идиот")
+    library.search_ranked("булгаков", 5)
+
+    library.add_book(Book("Белая гвардия", "Михаил Булгаков", 1925, book_id="id4"))
+    assert len(library.search_cache) == 1
+    assert [book.id for book in library.search_book("булгаков")] == ["id1", "id2", "id4"]
+    assert [book.id for book in library.search_ranked("булгаков", 5)] == ["id1", "id2", "id4"]
+
+    library.remove_book("id3")
+    assert library.search_book("идиот") == []
+    assert [book.id for book in library.search_book("булгаков")] == ["id1", "id2", "id4"]
+    assert library.search_cache.hits == 1
+
+
+def test_status_change_keeps_cached_results_current(library):
+    library.search_book("сердце")
+    library.change_book_status("id2", "выдана")
+    assert library.search_book("сердце")[0].status is False
+    assert library.search_cache.hits == 1
+
+
+def test_bulk_operations_invalidate(library):
+    library.search_book("булгаков")
+    library.remove_books(["id1"])
+    assert [book.id for book in library.search_book("булгаков")] == ["id2"]
+
+
+def test_columnar_library_cache():
+    library = ColumnarLibrary()
+    library.enable_search_cache()
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    assert [book.id for book in library.search_book("book")] == ["id1"]
+    library.change_book_status("id1", "выдана")
+    assert library.search_book("book")[0].status is False
+    library.add_book(Book("Book 2", "Author B", 2002, book_id="id2"))
+    assert [book.id for book in library.search_book("book")] == ["id1", "id2"]
+    library.disable_search_cache()
+    assert library.search_cache is None
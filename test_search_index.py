@@ -0,0 +1,59 @@
+import random
+from class_book import Book
+from class_library import Library
+from class_search_index import SearchIndex
+
+
+def naive_search(books, prompt):
+    prompt = prompt.lower()
+    return [book for book in books
+            if prompt in book.title.lower() or prompt in book.author.lower() or prompt in str(book.year).lower()]
+
+
+def test_candidates_short_prompt_is_not_narrowed():
+    index = SearchIndex()
+    index.add(Book("Book 1", "Author A", 2001, book_id="id1"))
+    assert index.candidates("bo") is None
+
+
+def test_candidates_unknown_trigram():
+    index = SearchIndex()
+    index.add(Book("Book 1", "Author A", 2001, book_id="id1"))
+    assert index.candidates("xyz") == []
+
+
+def test_candidates_in_insertion_order():
+    index = SearchIndex()
+    index.add(Book("Война и мир", "Лев Толстой", 1869, book_id="b"))
+    index.add(Book("Анна Каренина", "Лев Толстой", 1877, book_id="a"))
+    assert index.candidates("толстой") == ["b", "a"]
+
+
+def test_remove_drops_postings():
+    index = SearchIndex()
+    book = Book("Book 1", "Author A", 2001, book_id="id1")
+    index.add(book)
+    index.remove(book)
+    assert len(index) == 0
+    assert index.candidates("book") == []
+    # Books that are not indexed are ignored
+    index.remove(book)
+
+
+def test_search_matches_full_scan():
+    rng = random.Random(42)
+    alphabet = "абвгдеёжзиклмнопрстуabcdefgh XYZ"
+    library = Library()
+    for i in range(300):
+        title = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        author = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 8))).title()
+        library.add_book(Book(title, author, rng.randint(1500, 2024), book_id=f"id{i}"))
+    for i in range(0, 300, 3):
+        library.remove_book(f"id{i}")
+
+    for _ in range(200):
+        prompt = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+        if rng.random() < 0.3:
+            prompt = prompt.upper()
+        expected = naive_search(library.books.values(), prompt)
+        assert library.search_book(prompt) == expected
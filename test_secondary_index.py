@@ -0,0 +1,56 @@
+import random
+from class_book import Book
+from class_library import Library
+from class_secondary_index import StatusIndex, YearIndex
+
+
+def test_status_index():
+    index = StatusIndex()
+    index.add("id1", True)
+    index.add("id2", False)
+    index.add("id3", True)
+    index.set_status("id1", False)
+    assert index.ids(True) == ["id3"]
+    assert index.ids(False) == ["id2", "id1"]
+    index.remove("id2", False)
+    assert index.count(False) == 1
+
+
+def test_year_index_range():
+    index = YearIndex()
+    for book_id, year in [("a", 2001), ("b", 1950), ("c", None), ("d", 2001), ("e", -500), ("f", 1949)]:
+        index.add(book_id, year)
+    assert len(index) == 5
+    assert index.ids_between(1950, 2001) == ["b", "a", "d"]
+    assert index.ids_between(-1000, 0) == ["e"]
+    assert index.ids_between(2001, 1950) == []
+    index.remove("a")
+    index.remove("c")
+    assert index.ids_between(1900, 2100) == ["f", "b", "d"]
+
+
+def test_library_status_queries():
+    library = Library()
+    library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+    library.add_book(Book("Book 2", "Author B", 2002, status=False, book_id="id2"))
+    library.add_book(Book("Book 3", "Author C", 2003, book_id="id3"))
+    library.change_book_status("id1", "выдана")
+    library.change_book_status("id3", "unknown")
+    library.remove_book("id2")
+    assert [book.id for book in library.available_books()] == ["id3"]
+    assert [book.id for book in library.checked_out_books()] == ["id1"]
+    assert library.count_by_status(True) == 1
+
+
+def test_library_year_range_matches_scan():
+    rng = random.Random(3)
+    library = Library()
+    for i in range(500):
+        library.add_book(Book(f"Book {i}", "Author", rng.choice([rng.randint(1800, 2024), "XIX век"]),
+                              book_id=f"id{i}"))
+    for i in range(0, 500, 5):
+        library.remove_book(f"id{i}")
+    expected = sorted((book for book in library.books.values()
+                       if book.year_as_int() is not None and 1900 <= book.year_as_int() <= 1950),
+                      key=Book.year_as_int)
+    assert library.books_published_between(1900, 1950) == expected
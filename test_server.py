@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import threading
+import pytest
+from class_book import Book
+from class_concurrent_library import ConcurrentLibrary
+from class_metrics import Metrics
+from class_server import LibraryServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    library = ConcurrentLibrary()
+    library.add_book(Book("Мастер и Маргарита", "Михаил Булгаков", 1967, book_id="id1"))
+    library.add_book(Book("Идиот", "Фёдор Достоевский", 1869, status=False, book_id="id2"))
+    return LibraryServer(library, data_dir=str(tmp_path))
+
+
+def request(server, **fields):
+    return asyncio.run(server.handle_request(json.dumps(fields)))
+
+
+def test_list(server):
+    response = request(server, command="list", sort_by="year", limit=1, request_id=7)
+    assert response == {"ok": True, "request_id": 7, "result": {
+        "books": [{"id": "id2", "title": "Идиот", "author": "Фёдор Достоевский", "year": "1869", "status": False}],
+        "total": 2}}
+    assert request(server, command="list", sort_by="status") == \
+        {"ok": False, "error": "Unknown sort order 'status', expected title, author or year"}
+
+
+def test_add_remove_and_status(server):
+    book_id = request(server, command="add", title="Белая гвардия", author="Михаил Булгаков", year=1925)["result"]["id"]
+    assert server.library.get_book_by_id(book_id).title == "Белая гвардия"
+    result = request(server, command="add", books=[{"title": "Book", "author": "Author", "year": "2000"}])["result"]
+    assert result["counts"] == {"added": 1}
+
+    assert request(server, command="status", id="id1", status="выдана")["result"] == {"changed": True}
+    assert request(server, command="status", id="id1", status="потеряна")["ok"] is False
+    assert request(server, command="status", id="missing", status="выдана")["error"] == "Book missing not found"
+    assert request(server, command="remove", id="id1")["result"] == {"removed": True}
+    assert request(server, command="remove", id="id1")["result"] == {"removed": False}
+
+
+def test_search(server):
+    result = request(server, command="search", query="булгаков")["result"]
+    assert [book["id"] for book in result["books"]] == ["id1"] and result["fuzzy"] is False
+    result = request(server, command="search", query="булгкаов")["result"]
+    assert [book["id"] for book in result["books"]] == ["id1"] and result["fuzzy"] is True
+
+
+def test_metrics(server, monkeypatch):
+    metrics = Metrics()
+    monkeypatch.setattr("class_server.metrics", metrics)
+    assert request(server, command="metrics")["result"] == {"enabled": False, "operations": {}}
+    metrics.enable()
+    try:
+        request(server, command="search", query="булгаков")
+        result = request(server, command="metrics")["result"]
+    finally:
+        metrics.disable()
+    assert result["enabled"] is True and result["operations"]["search_ranked"]["calls"] == 1
+
+
+def test_save_and_load(server, tmp_path):
+    assert request(server, command="save", path=str(tmp_path / "library.lmsb"))["ok"]
+    server.library.remove_book("id1")
+    assert request(server, command="load", path=str(tmp_path / "library.lmsb"))["result"] == {"books": 2}
+    assert isinstance(server.library, ConcurrentLibrary)
+    assert server.library.search_cache is not None
+    assert request(server, command="load", path=str(tmp_path / "missing.json"))["ok"] is False
+
+
+def test_paths_stay_in_data_directory(server, tmp_path):
+    assert request(server, command="save", path="library.json")["result"] == \
+        {"path": os.path.realpath(tmp_path / "library.json")}
+    assert request(server, command="load", path="library.json")["result"] == {"books": 2}
+    outside = tmp_path.parent / "outside.json"
+    os.symlink(tmp_path.parent, tmp_path / "parent")
+    for path in ("../outside.json", str(outside), "parent/outside.json", "/etc/passwd"):
+        assert request(server, command="save", path=path)["error"] == f"Path {path} is outside the data directory"
+        assert request(server, command="load", path=path)["error"] == f"Path {path} is outside the data directory"
+    assert not outside.exists()
+
+
+def test_load_replaces_books_in_place(server):
+    request(server, command="save", path="library.json")
+    library = server.library
+    feed = library.change_feed.id
+    # A change that got hold of the library before the load completes before the books are swapped
+    with library._lock.write():
+        loader = threading.Thread(target=request, args=(server,), kwargs={"command": "load", "path": "library.json"})
+        loader.start()
+        loader.join(0.2)
+        assert loader.is_alive()
+        library.remove_book("id1")
+    loader.join()
+    assert server.library is library and library.get_book_by_id("id1") is not None
+    assert library.change_feed.id != feed and library.search_ranked("Идиот")[0].id == "id2"
+
+
+@pytest.mark.parametrize("line, error", [
+    ("not json", "Invalid JSON"),
+    ("[1, 2]", "Request must be a JSON object"),
+    ('{"command": "drop"}', "Unknown command 'drop'"),
+    ('{"command": "add", "title": "Book"}', "Missing parameter 'author'"),
+    ('{"command": "list", "limit": -1}', "Invalid parameter 'limit'"),
+])
+def test_invalid_requests(server, line, error):
+    response = asyncio.run(server.handle_request(line))
+    assert response["ok"] is False
+    assert response["error"].startswith(error)
+
+
+def test_many_concurrent_clients(server):
+    async def client(port, number):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(json.dumps({"command": "add", "title": f"Book {number}", "author": "Author",
+                                 "year": 2000}).encode() + b"\n")
+        writer.write(b'{"command": "search", "query": "idiot", "limit": 1}\n')
+        responses = [json.loads(await reader.readline()) for _ in range(2)]
+        writer.close()
+        await writer.wait_closed()
+        return responses
+
+    async def run():
+        await server.start(port=0)
+        port = server.addresses[0][1]
+        try:
+            return await asyncio.gather(*(client(port, number) for number in range(200)))
+        finally:
+            await server.close()
+
+    results = asyncio.run(run())
+    assert all(add["ok"] and search["ok"] for add, search in results)
+    assert len(server.library.books) == 202
+
+
+def test_change_feed(server, tmp_path):
+    snapshot = request(server, command="snapshot")["result"]
+    assert snapshot["sequence"] == 0 and [book["id"] for book in snapshot["books"]] == ["id1", "id2"]
+    feed = snapshot["feed"]
+    request(server, command="status", id="id1", status="выдана")
+    request(server, command="remove", id="id2")
+    result = request(server, command="changes", feed=feed, since=0, limit=1)["result"]
+    assert result == {"feed": feed, "sequence": 2, "changes": [(1, {"op": "status", "id": "id1", "status": False})]}
+    assert request(server, command="changes", feed=feed, since=1)["result"]["changes"] == \
+        [(2, {"op": "remove", "id": "id2"})]
+    assert request(server, command="changes", feed=feed, since=0, limit=0)["error"] == "Invalid parameter 'limit'"
+
+    # Loading a database starts a new feed
+    assert request(server, command="save", path=str(tmp_path / "library.json"))["ok"]
+    assert request(server, command="load", path=str(tmp_path / "library.json"))["ok"]
+    assert request(server, command="changes", feed=feed, since=2)["result"] == {"changes": None}
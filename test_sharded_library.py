@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from class_book import Book
+from class_columnar_library import ColumnarLibrary
+from class_library import Library
+from class_sharded_library import ShardedLibrary
+
+
+@pytest.fixture
+def library():
+    library = ShardedLibrary(4)
+    library.add_books(Book(f"Book {i}", f"Author {i % 3}", 2000 + i, book_id=f"id{i}") for i in range(20))
+    return library
+
+
+def test_books_are_routed_by_id(library):
+    assert len(library) == 20
+    assert sum(1 for shard in library.shards if shard.books) > 1
+    for index, shard in enumerate(library.shards):
+        assert all(library.shard_index(book_id) == index for book_id in shard.books)
+    assert library.get_book_by_id("id7").title == "Book 7"
+    assert library.get_book_by_id("missing") is None
+
+
+def test_duplicate_ids_are_regenerated_and_routed(library):
+    duplicate = Book("Copy", "Author", 1999, book_id="id3")
+    library.add_book(duplicate)
+    result = library.add_books([Book("New", "Author", 1999, book_id="x"), Book("Twin", "Author", 1999, book_id="x")])
+
+    assert duplicate.id != "id3" and library.get_book_by_id(duplicate.id) is duplicate
+    assert result.count("added") == 2 and result.ids("added")[0] == "x" != result.ids("added")[1]
+    assert len(library) == 23
+    for index, shard in enumerate(library.shards):
+        assert all(library.shard_index(book_id) == index for book_id in shard.books)
+
+
+def test_bulk_results_keep_the_order_of_the_items(library):
+    ids = ["id5", "missing", "id1", "id5"]
+    result = library.remove_books(ids)
+    assert result.items == [("id5", "removed"), ("missing", "not found"), ("id1", "removed"), ("id5", "not found")]
+
+    result = library.change_books_status([("id2", "выдана"), ("id3", "потеряна"), ("id2", "выдана")])
+    assert [outcome for _, outcome in result.items] == ["updated", "invalid status", "unchanged"]
+    assert library.count_by_status(False) == 1
+    assert len(library.available_books()) == 17
+
+
+def test_search_fans_out_to_every_shard(library):
+    assert sorted(book.id for book in library.search_book("author 1")) == \
+           sorted(f"id{i}" for i in range(20) if i % 3 == 1)
+    ranked = [book.id for book in library.search_ranked("book 1", limit=3)]
+    # The exact match first, then any two of the prefix matches
+    assert ranked[0] == "id1" and set(ranked[1:]) < {f"id{i}" for i in range(10, 20)}
+    assert [book.year for book in library.books_published_between(2005, 2008)] == ["2005", "2006", "2007", "2008"]
+
+
+def test_searches_use_the_thread_pool_only_without_the_gil(library, monkeypatch):
+    pools = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr("class_sharded_library.ThreadPoolExecutor", RecordingPool)
+    monkeypatch.setattr(ShardedLibrary, "PARALLEL_SEARCH", False)
+    sequential = [book.id for book in library.search_ranked("book 1", limit=5)]
+    assert pools == []
+    monkeypatch.setattr(ShardedLibrary, "PARALLEL_SEARCH", True)
+    assert [book.id for book in library.search_ranked("book 1", limit=5)] == sequential
+    # The pool is shut down once the search is done
+    assert len(pools) == 1 and pools[0]._shutdown
+
+
+def test_save_only_rewrites_changed_shards(library, tmp_path, monkeypatch):
+    written = []
+    write_json = Library._write_json
+    monkeypatch.setattr(Library, "_write_json",
+                        lambda self, path, *args: written.append(path) or write_json(self, path, *args))
+    directory = tmp_path / "library"
+    assert library.save(str(directory))
+    assert len(written) == 4 and len(list(directory.iterdir())) == 4
+
+    written.clear()
+    library.change_book_status("id4", "выдана")
+    changed = library.shard_index("id4")
+    assert library.dirty_shards == [changed]
+    assert library.save()
+    assert written == [library.shard_path(str(directory), changed)]
+    assert not library.is_dirty
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_load(library, tmp_path, binary):
+    library.extension = ShardedLibrary(binary=binary).extension
+    assert library.save(str(tmp_path))
+    loaded = ShardedLibrary.load(str(tmp_path), ColumnarLibrary)
+    assert len(loaded.shards) == 4 and isinstance(loaded.shards[0], ColumnarLibrary)
+    assert sorted(book.to_dict()["id"] for book in loaded) == sorted(book.id for book in library)
+    assert not loaded.is_dirty
+
+
+def test_save_with_another_shard_count_or_format_removes_stale_shards(library, tmp_path):
+    assert library.save(str(tmp_path))
+    (tmp_path / "notes.txt").write_text("kept")
+    fewer = ShardedLibrary(2)
+    fewer.add_books(library)
+    assert fewer.save(str(tmp_path))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["notes.txt", "shard-000.json", "shard-001.json"]
+    loaded = ShardedLibrary.load(str(tmp_path))
+    assert len(loaded.shards) == 2 and sorted(book.id for book in loaded) == sorted(book.id for book in library)
+
+    binary = ShardedLibrary(3, binary=True)
+    binary.add_books(library)
+    assert binary.save(str(tmp_path))
+    assert sorted(path.name for path in tmp_path.iterdir()) == \
+           ["notes.txt"] + [binary.SHARD_FILE.format(index, binary.extension) for index in range(3)]
+    assert len(ShardedLibrary.load(str(tmp_path))) == 20
+
+
+def test_load_rejects_incomplete_or_misplaced_shards(library, tmp_path, capsys):
+    assert library.save(str(tmp_path))
+    (tmp_path / "shard-001.json").unlink()
+    assert ShardedLibrary.load(str(tmp_path)) is None
+    assert "doesn't hold a complete set of shards" in capsys.readouterr().out
+
+    # A book in the file of another shard can't be found by its ID
+    misplaced = ShardedLibrary(2)
+    book_id = next(f"id{i}" for i in range(10) if misplaced.shard_index(f"id{i}") == 1)
+    misplaced.shards[0].add_book(Book("Book", "Author", 2000, book_id=book_id))
+    assert misplaced.save(str(tmp_path / "misplaced"))
+    assert ShardedLibrary.load(str(tmp_path / "misplaced")) is None
+    assert "belongs to shard 1" in capsys.readouterr().out
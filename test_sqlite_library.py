@@ -0,0 +1,181 @@
+import json
+import random
+import sqlite3
+import pytest
+from class_application import Application
+from class_book import Book
+from class_library import Library
+from class_sqlite_library import SqliteBooks, SqliteLibrary
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = tmp_path / "library.sqlite"
+    with SqliteLibrary(str(path)) as library:
+        library.add_book(Book("Book 1", "Author A", 2001, book_id="id1"))
+        library.add_book(Book("Book 2", "Author B", 1950, status=False, book_id="id2"))
+        library.add_book(Book("Book 3", "Author A", "XIX век", book_id="id3"))
+    return str(path)
+
+
+@pytest.fixture
+def sqlite_library(database_path):
+    library = SqliteLibrary.load_from_sqlite(database_path)
+    yield library
+    library.close()
+
+
+def test_books_are_materialized(sqlite_library):
+    book = sqlite_library.get_book_by_id("id3")
+    assert isinstance(book, Book)
+    assert book.to_dict() == {'id': "id3", 'title': "Book 3", 'author': "Author A", 'year': "XIX век", 'status': True}
+    assert sqlite_library.get_book_by_id("invalid_id") is None
+    assert list(sqlite_library.books) == ["id1", "id2", "id3"]
+    assert str(SqliteLibrary()) == "Библиотека пуста"
+
+
+def test_changes_are_written_to_the_database(sqlite_library, database_path):
+    sqlite_library.change_book_status("id1", "выдана")
+    sqlite_library.remove_book("id2")
+    book = Book("Book 4", "Author D", 2004, book_id="id1")
+    sqlite_library.add_book(book)
+    assert book.id != "id1"
+    # The database always holds the current state
+    assert not sqlite_library.is_dirty
+    assert sqlite_library.dump_to_sqlite(database_path)
+
+    with SqliteLibrary.load_from_sqlite(database_path) as reopened:
+        assert [book.id for book in reopened.books.values()] == ["id1", "id3", book.id]
+        assert reopened.get_book_by_id("id1").status is False
+        assert reopened.count_by_status(False) == 1
+
+
+def test_bulk_operations_run_in_a_transaction(sqlite_library):
+    result = sqlite_library.change_books_status([("id1", "выдана"), ("missing", "выдана")])
+    assert result.items == [("id1", "updated"), ("missing", "not found")]
+
+    def failing_books():
+        yield Book("Book 5", "Author E", 2005, book_id="id5")
+        raise RuntimeError("broken source")
+
+    with pytest.raises(RuntimeError):
+        sqlite_library.add_books(failing_books())
+    # Nothing of the failed batch is kept
+    assert "id5" not in sqlite_library.books
+    assert sqlite_library.search_book("book 5") == []
+
+
+def test_queries_use_the_indexes(sqlite_library):
+    assert [book.id for book in sqlite_library.books_published_between(1900, 2001)] == ["id2", "id1"]
+    assert [book.id for book in sqlite_library.available_books()] == ["id1", "id3"]
+    assert [book.id for book in sqlite_library.checked_out_books()] == ["id2"]
+    assert [book.id for book in sqlite_library.books_page("year")] == ["id2", "id1", "id3"]
+    assert [book.id for book in sqlite_library.books_page("author", offset=1, limit=1)] == ["id3"]
+    with pytest.raises(ValueError):
+        sqlite_library.books_page("status")
+
+
+def test_open_database_is_not_overwritten(sqlite_library, database_path, capsys):
+    assert not sqlite_library.dump_to_json(database_path)
+    assert "open SQLite database" in capsys.readouterr().out
+    assert SqliteBooks.is_database(database_path)
+
+
+def test_year_out_of_integer_range():
+    library = SqliteLibrary()
+    library.add_book(Book("Book", "Author", 10 ** 30, book_id="id1"))
+    assert library.get_book_by_id("id1").year == str(10 ** 30)
+    assert library.books_published_between(0, 3000) == []
+
+
+@pytest.mark.parametrize("full_text", [True, False])
+def test_matches_library(monkeypatch, full_text):
+    if not full_text:
+        # SQLite without the trigram tokenizer
+        monkeypatch.setattr(SqliteBooks, "FULL_TEXT_SCHEMA", "CREATE VIRTUAL TABLE books_text USING missing_module;")
+    rng = random.Random(7)
+    words = ["война", "мир", "Толстой", "Пушкин", "1984", "Orwell", "Gesta", "век", '"кавычки"']
+    library = Library()
+    database = SqliteLibrary()
+    assert database.books.full_text is full_text
+    for i in range(300):
+        book = dict(title=' '.join(rng.sample(words, 2)), author=rng.choice(words),
+                    year=rng.choice([rng.randint(1800, 2024), "XIX век"]), status=rng.random() < 0.5,
+                    book_id=f"id{i}")
+        library.add_book(Book(**book))
+        database.add_book(Book(**book))
+    library.remove_books(f"id{i}" for i in range(0, 300, 4))
+    database.remove_books(f"id{i}" for i in range(0, 300, 4))
+
+    for prompt in ["", "в", "ой", "мир", "19", "ВЕК", "orwell gesta", '"кав', "nothing"]:
+        assert [book.to_dict() for book in database.search_book(prompt)] == \
+            [book.to_dict() for book in library.search_book(prompt)]
+        assert [book.id for book in database.search_ranked(prompt, 5)] == \
+            [book.id for book in library.search_ranked(prompt, 5)]
+    for sort_by in [None, "title", "author", "year"]:
+        assert [book.id for book in database.books_page(sort_by, 10, 20)] == \
+            [book.id for book in library.books_page(sort_by, 10, 20)]
+    assert [book.id for book in database.books_published_between(1900, 1950)] == \
+        [book.id for book in library.books_published_between(1900, 1950)]
+    assert str(database) == str(library)
+    for prompt in ["вйона", "толтсой", "мри", "orwel gest", "пушкни война", "век", "xyz", ""]:
+        assert [book.id for book in database.search_fuzzy(prompt, 7)] == \
+            [book.id for book in library.search_fuzzy(prompt, 7)]
+
+
+def test_fuzzy_search_keeps_only_the_words_in_memory(sqlite_library):
+    assert [book.id for book in sqlite_library.search_fuzzy("atuhor a")] == ["id1", "id3"]
+    assert sqlite_library._fuzzy_index is None and len(sqlite_library._vocabulary) == 0
+    sqlite_library.add_books([Book("Ревизор", "Николай Гоголь", 1836, book_id="id4")])
+    assert [book.id for book in sqlite_library.search_fuzzy("ревизр")] == ["id4"]
+
+
+def test_migrate(tmp_path, capsys):
+    source = tmp_path / "library.json"
+    source.write_text(json.dumps([
+        {"id": "id1", "title": "Война и мир", "author": "Лев Толстой", "year": "1869", "status": True},
+        {"id": "id1", "title": "Анна Каренина", "author": "Лев Толстой", "year": "1878", "status": False},
+        {"id": "id3", "title": "Без автора"},
+    ], ensure_ascii=False), encoding='utf-8')
+    target = tmp_path / "library.sqlite"
+    assert SqliteLibrary.migrate(str(source), str(target))
+    assert capsys.readouterr().out.count("Error parsing book:") == 1
+
+    library = Library.load(str(target))
+    assert type(library) is Library
+    assert [book.title for book in library.books.values()] == ["Война и мир", "Анна Каренина"]
+    with SqliteLibrary.load(str(target)) as database:
+        assert [book.title for book in database.search_book("толстой")] == ["Война и мир", "Анна Каренина"]
+        assert not database.is_dirty
+
+    source.write_text("{}")
+    assert not SqliteLibrary.migrate(str(source), str(target))
+    assert "Expected a list of books" in capsys.readouterr().out
+    # A failed migration leaves the target intact
+    assert SqliteBooks.is_database(str(target))
+
+
+def test_load_rejects_other_files(tmp_path, capsys):
+    assert SqliteLibrary.load_from_sqlite(str(tmp_path / "missing.sqlite")) is None
+    assert "does not exist" in capsys.readouterr().out
+    path = tmp_path / "library.json"
+    path.write_text("[]")
+    assert SqliteLibrary.load_from_sqlite(str(path)) is None
+    assert "Invalid SQLite database" in capsys.readouterr().out
+    path.write_bytes(SqliteBooks.MAGIC + b"garbage" * 100)
+    with pytest.raises(sqlite3.DatabaseError):
+        SqliteLibrary(str(path))
+
+
+def test_application_serves_the_database_in_place(database_path, monkeypatch, capsys):
+    app = Application()
+    inputs = iter([database_path, "id1", "выдана", database_path, "да"])
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    app.handle_load_from_file()
+    assert isinstance(app.library, SqliteLibrary)
+    app.handle_change_status()
+    app.handle_save_to_file()
+    app.library.close()
+
+    with SqliteLibrary.load_from_sqlite(database_path) as reopened:
+        assert reopened.get_book_by_id("id1").status is False